@@ -0,0 +1,129 @@
+"""
+Command line entry point, e.g. ``python -m app serve --workers 4``.
+"""
+
+import argparse
+
+
+def _serve(args: argparse.Namespace) -> None:
+    from .server import serve
+
+    serve(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        connection_budget=args.connection_budget,
+        keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        max_requests=args.max_requests,
+    )
+
+
+def _build_static(args: argparse.Namespace) -> None:
+    from .utils.static_assets import build_static
+
+    manifest = build_static(args.static_dir)
+    for source, target in sorted(manifest.items()):
+        print(f"{source} -> {target}")
+
+
+def _reconcile_media(args: argparse.Namespace) -> None:
+    import asyncio
+    from datetime import timedelta
+
+    from .cld_media.storage import get_storage
+    from .db.database import new_session
+    from .services.media_reconciler import (
+        MEDIA_ROOT_FOLDERS,
+        reconcile_media,
+        referenced_public_ids,
+    )
+
+    with new_session() as sess:
+        referenced = referenced_public_ids(sess)
+
+    try:
+        report = asyncio.run(
+            reconcile_media(
+                get_storage(),
+                referenced,
+                roots=args.folder or MEDIA_ROOT_FOLDERS,
+                grace=timedelta(hours=args.grace_hours),
+                delete=args.delete,
+                concurrency=args.concurrency,
+                on_orphan=lambda asset: print(
+                    f"{asset.resource_type}\t{asset.public_id}\t{asset.created_at:%Y-%m-%d %H:%M}"
+                ),
+            )
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(
+        f"{report.folders} folders, {report.scanned} files scanned, "
+        f"{report.orphaned} orphaned, {report.deleted} deleted"
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser(
+        "serve", help="Run the API with multiple uvicorn workers."
+    )
+    serve.add_argument("--host")
+    serve.add_argument("--port", type=int)
+    serve.add_argument(
+        "--workers", type=int, help="Number of worker processes, 0 for one per cpu."
+    )
+    serve.add_argument(
+        "--connection-budget",
+        type=int,
+        help="Total database connections shared by all workers.",
+    )
+    serve.add_argument("--keep-alive", type=int, help="Keep-alive timeout in seconds.")
+    serve.add_argument("--backlog", type=int, help="Listen socket backlog.")
+    serve.add_argument(
+        "--max-requests",
+        type=int,
+        help="Recycle a worker after this many requests, 0 to disable.",
+    )
+    serve.set_defaults(func=_serve)
+
+    build_static = commands.add_parser(
+        "build-static",
+        help="Fingerprint and precompress the files served under /static.",
+    )
+    build_static.add_argument("--static-dir", default="static")
+    build_static.set_defaults(func=_build_static)
+
+    reconcile = commands.add_parser(
+        "reconcile-media",
+        help="Report or delete stored media files that no row references.",
+    )
+    reconcile.add_argument(
+        "--folder",
+        action="append",
+        help="Folder to scan with its subfolders, may be repeated. "
+        "Defaults to sermon, podcast and book.",
+    )
+    reconcile.add_argument(
+        "--grace-hours",
+        type=float,
+        default=24,
+        help="Skip files uploaded less than this many hours ago.",
+    )
+    reconcile.add_argument(
+        "--concurrency", type=int, default=4, help="Folders listed at once."
+    )
+    reconcile.add_argument(
+        "--delete", action="store_true", help="Delete the orphans found."
+    )
+    reconcile.set_defaults(func=_reconcile_media)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
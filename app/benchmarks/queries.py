@@ -0,0 +1,149 @@
+"""
+Measure the per call cost of the hot repository queries.
+
+Runs ``query_by_id`` and ``query_sermons`` as legacy ``session.query``
+chains and as the prebuilt statements the repositories use, against an
+in-memory SQLite database by default so the Python overhead dominates.
+
+Usage: python -m app.benchmarks.queries [--calls 5000] [--url sqlite://]
+"""
+
+import argparse
+import time
+from typing import Callable, NamedTuple
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from ..db.database import Base
+from ..models import Podcast, Sermon
+from ..repository.podcast_repository import PodcastRepository
+from ..repository.sermon_repository import SermonRepository
+
+ROWS = 1000
+
+
+class Timing(NamedTuple):
+    name: str
+    us_per_call: float
+
+
+def seed(sess: Session) -> None:
+    """
+    Fill an empty database with sermons and podcasts.
+    """
+    sess.execute(
+        insert(Sermon),
+        [
+            {
+                "id": i,
+                "theme": f"theme {i}",
+                "minister": "minister",
+                "short_note": "note",
+                "cover_image": "cover.jpg",
+                "cld_image_public_id": f"cover{i}",
+                "audio_file": "audio.mp3",
+                "cld_audio_public_id": f"audio{i}",
+            }
+            for i in range(1, ROWS + 1)
+        ],
+    )
+    sess.execute(
+        insert(Podcast),
+        [{"id": i, "podcast_title": f"podcast {i}"} for i in range(1, ROWS + 1)],
+    )
+    sess.commit()
+
+
+def legacy_query_by_id(sess: Session, id: int):
+    return sess.query(Podcast).filter_by(id=id).scalar()
+
+
+def legacy_query_sermons(sess: Session, limit: int, offset: int):
+    return (
+        sess.query(Sermon).order_by(Sermon.id.desc()).limit(limit).offset(offset).all()
+    )
+
+
+def measure(name: str, call: Callable[[int], object], calls: int) -> Timing:
+    for i in range(100):
+        call(i)
+    start = time.perf_counter()
+    for i in range(calls):
+        call(i)
+    return Timing(name, (time.perf_counter() - start) / calls * 1e6)
+
+
+def run(url: str, calls: int) -> list[Timing]:
+    """
+    Return the time per call of the legacy and the prebuilt queries.
+    """
+    if url.startswith("sqlite"):
+        engine = create_engine(url, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        with Session(engine) as sess:
+            seed(sess)
+    else:
+        # an existing database with the tables and some rows
+        engine = create_engine(url)
+
+    with Session(engine) as sess:
+        podcasts = PodcastRepository(sess)
+        sermons = SermonRepository(sess)
+
+        def by_id(query):
+            # a fresh identity map each time, as in a request
+            def call(i):
+                query(i % ROWS + 1)
+                sess.expunge_all()
+
+            return call
+
+        def page(query):
+            def call(i):
+                query(5, i % 100)
+                sess.expunge_all()
+
+            return call
+
+        return [
+            measure(
+                "query_by_id, session.query",
+                by_id(lambda id: legacy_query_by_id(sess, id)),
+                calls,
+            ),
+            measure("query_by_id, prebuilt", by_id(podcasts.query_by_id), calls),
+            measure(
+                "query_sermons, session.query",
+                page(lambda limit, offset: legacy_query_sermons(sess, limit, offset)),
+                calls,
+            ),
+            measure(
+                "query_sermons, prebuilt",
+                page(lambda limit, offset: sermons.query_sermons(limit, offset)),
+                calls,
+            ),
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--url", default="sqlite://")
+    args = parser.parse_args()
+
+    timings = run(args.url, args.calls)
+    for timing in timings:
+        print(f"{timing.us_per_call:8.1f} us/call  {timing.name}")
+
+    # the prebuilt statements usually take about half as long
+    for legacy, prebuilt in zip(timings[::2], timings[1::2]):
+        print(
+            f"{legacy.us_per_call / prebuilt.us_per_call:8.2f}x "
+            f"faster  {prebuilt.name}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Replay captured traffic against a test instance and compare two builds.
+
+``run`` re-issues the requests recorded by the traffic capture middleware
+with their original spacing, divided by --speed, and writes the latency of
+each response to a JSONL results file. ``compare`` prints the latency
+percentiles of every route in two results files side by side, e.g. of the
+current release and a candidate build replaying the same capture.
+
+Only GET and HEAD requests are replayed by default: bodies aren't captured,
+so writes can't be reproduced faithfully. Requests of authenticated users
+are sent with --token and skipped without it.
+
+Usage: python -m app.benchmarks.replay run traffic.jsonl --target URL
+    [--speed 1] [--token TOKEN] [--output results.jsonl]
+       python -m app.benchmarks.replay compare base.jsonl candidate.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+from typing import Iterable, NamedTuple
+
+import httpx
+
+SAFE_METHODS = ("GET", "HEAD")
+ALL = "*"
+
+
+class Stats(NamedTuple):
+    count: int
+    errors: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def load_jsonl(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(sorted_values: list[float], share: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * share), len(sorted_values) - 1)]
+
+
+async def replay(
+    records: list[dict],
+    target: str,
+    speed: float = 1.0,
+    token: str | None = None,
+    methods: Iterable[str] = SAFE_METHODS,
+    max_concurrency: int = 100,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> list[dict]:
+    """
+    Re-issue records against target and return one result per request sent.
+
+    Requests start at their recorded offsets divided by speed, or back to
+    back when speed is 0, whether or not earlier responses arrived.
+    """
+    methods = set(methods)
+    records = sorted(
+        (
+            record
+            for record in records
+            if record["method"] in methods
+            and (record["user_class"] != "authenticated" or token)
+        ),
+        key=lambda record: record["ts"],
+    )
+    if not records:
+        return []
+
+    results: list[dict] = []
+    limit = asyncio.Semaphore(max_concurrency)
+
+    async def send(client: httpx.AsyncClient, record: dict) -> None:
+        headers = {}
+        if record["user_class"] == "authenticated":
+            headers["Authorization"] = f"Bearer {token}"
+        elif record["user_class"] == "invalid":
+            headers["Authorization"] = "Bearer invalid"
+        url = record["path"] + (f"?{record['query']}" if record["query"] else "")
+        async with limit:
+            start = time.perf_counter()
+            try:
+                response = await client.request(record["method"], url, headers=headers)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            latency = (time.perf_counter() - start) * 1000
+        results.append(
+            {
+                "method": record["method"],
+                "route": record["route"] or record["path"],
+                "status": status,
+                "latency_ms": round(latency, 3),
+                "recorded_ms": record["duration_ms"],
+            }
+        )
+
+    async with httpx.AsyncClient(
+        base_url=target, transport=transport, timeout=30.0
+    ) as client:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first = records[0]["ts"]
+        tasks = []
+        for record in records:
+            if speed:
+                delay = (record["ts"] - first) / speed - (loop.time() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(client, record)))
+        await asyncio.gather(*tasks)
+    return results
+
+
+def summarize(results: Iterable[dict]) -> dict[str, Stats]:
+    """
+    Return the latency percentiles of every route, and of all requests
+    under ``*``. Server errors and failed requests count as errors.
+    """
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    for result in results:
+        key = f"{result['method']} {result['route']}"
+        failed = result["status"] == 0 or result["status"] >= 500
+        for group in (key, ALL):
+            latencies[group].append(result["latency_ms"])
+            errors[group] += failed
+
+    summary = {}
+    for key, values in latencies.items():
+        values.sort()
+        summary[key] = Stats(
+            len(values),
+            errors[key],
+            percentile(values, 0.5),
+            percentile(values, 0.95),
+            percentile(values, 0.99),
+        )
+    return summary
+
+
+def compare(
+    base: Iterable[dict], candidate: Iterable[dict]
+) -> list[tuple[str, Stats | None, Stats | None]]:
+    """
+    Return the stats of every route in base and candidate, ``*`` first.
+    """
+    base_summary = summarize(base)
+    candidate_summary = summarize(candidate)
+    keys = sorted(
+        base_summary.keys() | candidate_summary.keys(),
+        key=lambda key: (key != ALL, key),
+    )
+    return [(key, base_summary.get(key), candidate_summary.get(key)) for key in keys]
+
+
+def _change(base: float, candidate: float) -> str:
+    if not base:
+        return "    -"
+    return f"{(candidate - base) / base * 100:+5.0f}%"
+
+
+def format_comparison(rows: list[tuple[str, Stats | None, Stats | None]]) -> str:
+    lines = [
+        f"{'route':<40} {'count':>7} {'err':>5}"
+        + "".join(f" {p:>8} {'base':>8} {'change':>6}" for p in ("p50", "p95", "p99"))
+    ]
+    for key, base, candidate in rows:
+        if base is None or candidate is None:
+            only = "base" if candidate is None else "candidate"
+            lines.append(f"{key:<40} only in {only}")
+            continue
+        line = f"{key:<40} {candidate.count:>7} {candidate.errors:>5}"
+        for field in ("p50_ms", "p95_ms", "p99_ms"):
+            before, after = getattr(base, field), getattr(candidate, field)
+            line += f" {after:8.1f} {before:8.1f} {_change(before, after):>6}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _run(args: argparse.Namespace) -> None:
+    results = asyncio.run(
+        replay(
+            load_jsonl(args.capture),
+            args.target,
+            speed=args.speed,
+            token=args.token,
+            methods=args.methods.split(","),
+            max_concurrency=args.max_concurrency,
+        )
+    )
+    with open(args.output, "w") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+    for key, stats in sorted(summarize(results).items()):
+        print(
+            f"{key:<40} {stats.count:>7} requests {stats.errors:>5} errors  "
+            f"p50 {stats.p50_ms:7.1f} p95 {stats.p95_ms:7.1f} p99 {stats.p99_ms:7.1f} ms"
+        )
+
+
+def _compare(args: argparse.Namespace) -> None:
+    print(format_comparison(compare(load_jsonl(args.base), load_jsonl(args.candidate))))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Replay a capture against a target.")
+    run.add_argument("capture")
+    run.add_argument("--target", required=True, help="e.g. http://localhost:8000")
+    run.add_argument(
+        "--speed", type=float, default=1.0, help="2 replays twice as fast, 0 at once"
+    )
+    run.add_argument("--token", help="Bearer token for authenticated requests.")
+    run.add_argument("--methods", default=",".join(SAFE_METHODS))
+    run.add_argument("--max-concurrency", type=int, default=100)
+    run.add_argument("--output", default="replay.jsonl")
+    run.set_defaults(func=_run)
+
+    compare_parser = commands.add_parser(
+        "compare", help="Compare the latencies of two replays."
+    )
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("candidate")
+    compare_parser.set_defaults(func=_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
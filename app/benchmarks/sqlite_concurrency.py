@@ -0,0 +1,164 @@
+"""
+Measure read throughput of SQLite while other threads keep writing.
+
+Runs the same mix of listing reads and podcast inserts against a database
+file with SQLite's default settings, sharing one pool, and with the
+embedded SQLite profile: WAL, a read pool and a single writer connection.
+Without WAL a steady stream of readers keeps the writers from getting the
+lock they need to commit.
+
+Usage: python -m app.benchmarks.sqlite_concurrency [--seconds 5] [--readers 16]
+    [--writers 2] [--write-rate 0]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, NamedTuple
+
+from sqlalchemy import create_engine, Engine
+from sqlalchemy.orm import Session
+
+from ..db.database import Base, RoutingSession, create_sqlite_engine
+from ..models import Podcast
+from ..repository.sermon_repository import SermonRepository
+from .queries import ROWS, seed
+
+
+class Throughput(NamedTuple):
+    profile: str
+    reads_per_second: float
+    writes_per_second: float
+    # in milliseconds, readers and writers blocking each other show here
+    read_p99_ms: float
+    write_p99_ms: float
+    errors: int
+
+
+def default_sessions(url: str) -> tuple[Engine, Callable[[], Session]]:
+    """
+    Returns the engine that creates the tables and the session factory.
+    """
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    return engine, lambda: Session(engine)
+
+
+def embedded_sessions(url: str) -> tuple[Engine, Callable[[], Session]]:
+    reader = create_sqlite_engine(url, read_only=True)
+    writer = create_sqlite_engine(url, read_only=False)
+    return writer, lambda: RoutingSession(reader, writer)
+
+
+PROFILES = {"default": default_sessions, "embedded": embedded_sessions}
+
+
+def p99_ms(seconds: list[float]) -> float:
+    if not seconds:
+        return 0.0
+    return sorted(seconds)[int(len(seconds) * 0.99)] * 1000
+
+
+def measure(
+    profile: str,
+    new_session: Callable[[], Session],
+    seconds: float,
+    readers: int,
+    writers: int,
+    write_rate: float,
+) -> Throughput:
+    stop = threading.Event()
+    lock = threading.Lock()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    times = {"reads": [], "writes": []}
+
+    def loop(work: Callable[[int], None], counter: str) -> None:
+        done = errors = 0
+        took = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                work(done)
+                done += 1
+            except Exception:
+                errors += 1
+            took.append(time.perf_counter() - start)
+        with lock:
+            counts[counter] += done
+            counts["errors"] += errors
+            times[counter].extend(took)
+
+    def read(i: int) -> None:
+        with new_session() as sess:
+            SermonRepository(sess).query_sermons(10, i * 10 % ROWS)
+
+    def write(i: int) -> None:
+        with new_session() as sess:
+            sess.add(Podcast(podcast_title=f"podcast {i}"))
+            sess.commit()
+        if write_rate:
+            time.sleep(writers / write_rate)
+
+    threads = [
+        threading.Thread(target=loop, args=(read, "reads")) for _ in range(readers)
+    ] + [threading.Thread(target=loop, args=(write, "writes")) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return Throughput(
+        profile,
+        counts["reads"] / seconds,
+        counts["writes"] / seconds,
+        p99_ms(times["reads"]),
+        p99_ms(times["writes"]),
+        counts["errors"],
+    )
+
+
+def run(
+    seconds: float, readers: int, writers: int, write_rate: float
+) -> list[Throughput]:
+    """
+    Return the throughput of each profile, on a fresh database file each.
+    The writers together write about write_rate rows a second, as fast as
+    they can when it is 0.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for profile, sessions in PROFILES.items():
+            url = f"sqlite:///{os.path.join(directory, profile)}.db"
+            engine, new_session = sessions(url)
+            Base.metadata.create_all(engine)
+            with new_session() as sess:
+                seed(sess)
+            results.append(
+                measure(profile, new_session, seconds, readers, writers, write_rate)
+            )
+            engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--write-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    for result in run(args.seconds, args.readers, args.writers, args.write_rate):
+        print(
+            f"{result.profile:>10}: {result.reads_per_second:9.1f} reads/s "
+            f"{result.writes_per_second:8.1f} writes/s  "
+            f"p99 read {result.read_p99_ms:6.1f} ms write {result.write_p99_ms:6.1f} ms  "
+            f"{result.errors} errors"
+        )
+
+
+if __name__ == "__main__":
+    main()
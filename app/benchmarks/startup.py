@@ -0,0 +1,97 @@
+"""
+Measure the cold start cost of the application.
+
+Reports the ``python -X importtime`` breakdown of ``app.main`` and the time
+from interpreter start to the first served response.
+
+Usage: python -m app.benchmarks.startup [--top 20]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import NamedTuple
+
+
+FIRST_RESPONSE_SCRIPT = """
+import time
+start = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.main import create_app
+client = TestClient(create_app())
+response = client.get("/api/v1/")
+assert response.status_code == 200, response.status_code
+print(time.perf_counter() - start)
+"""
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def _run(args: list[str]) -> subprocess.CompletedProcess:
+    # run in a fresh interpreter from the project root so nothing is cached
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_breakdown(module: str = "app.main") -> list[ImportTime]:
+    """
+    Return the import time of every module imported by ``module``.
+    """
+    result = _run(["-X", "importtime", "-c", f"import {module}"])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append(ImportTime(name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_time_ms(module: str = "app.main") -> float:
+    """
+    Return the cumulative import time of ``module`` in milliseconds.
+    """
+    for row in import_breakdown(module):
+        if row.module == module:
+            return row.cumulative_us / 1000
+    raise LookupError(f"{module} was not imported")
+
+
+def time_to_first_response_ms() -> float:
+    """
+    Return the time needed to build the app and serve the first request.
+    """
+    result = _run(["-c", FIRST_RESPONSE_SCRIPT])
+    return float(result.stdout.strip().splitlines()[-1]) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = import_breakdown(args.module)
+    total = next(r.cumulative_us for r in rows if r.module == args.module)
+
+    print(f"import {args.module}: {total / 1000:.1f} ms")
+    print(f"\n{'self ms':>9} {'cumul ms':>9}  module")
+    for row in sorted(rows, key=lambda r: r.self_us, reverse=True)[: args.top]:
+        print(f"{row.self_us / 1000:9.1f} {row.cumulative_us / 1000:9.1f}  {row.module}")
+
+    print(f"\ntime to first response: {time_to_first_response_ms():.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
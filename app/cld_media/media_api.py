@@ -1,14 +1,23 @@
+import asyncio
 from operator import itemgetter
-from typing import Any, BinaryIO
+from typing import Any, AsyncIterator, BinaryIO
 
 import cloudinary.uploader
+from fastapi import HTTPException
 from typing_extensions import Self
 import cloudinary
 
 
+from app.core.tracing import traced_class
 from app.utils.handler_exceptions import CloudinaryException
+from app.utils.multipart_stream import fixed_size_chunks
 
 
+# cloudinary requires every chunk but the last one to be at least 5MB
+UPLOAD_CHUNK_SIZE = 6_000_000
+
+
+@traced_class
 class MediaUtils(object):
     def __new__(cls) -> Self:
         if not hasattr(cls, "instance"):
@@ -21,17 +30,25 @@ class MediaUtils(object):
         image_name: str,
         folder_name: str,
         public_id: str,
+        eager: list[dict[str, Any]] | None = None,
     ) -> dict[str, Any]:
         """
-        Upload image files to cloudinary
+        Upload image files to cloudinary.
+
+        ``eager`` transformations are generated in the background right after
+        the upload so the first request for a derived image is already cached.
         """
 
-        response = cloudinary.uploader.upload(
+        # the sdk is blocking, run it off the event loop
+        response = await asyncio.to_thread(
+            cloudinary.uploader.upload,
             file,
             public_id=public_id,
             resource_type="image",
             asset_folder=folder_name,
             display_name=image_name,
+            eager=eager,
+            eager_async=bool(eager),
             # use_filename=True,
             # unique_filename=False,
         )
@@ -49,11 +66,12 @@ class MediaUtils(object):
         Upload large video files to cloudinary
         """
 
-        response: dict[str, Any] = cloudinary.uploader.upload_large(
+        response: dict[str, Any] = await asyncio.to_thread(
+            cloudinary.uploader.upload_large,
             file,
             resource_type="auto",
             public_id=public_id,
-            chunk_size=6_000_000,
+            chunk_size=UPLOAD_CHUNK_SIZE,
             eager_async=True,
             asset_folder=folder_name,
             display_name=video_name,
@@ -73,11 +91,12 @@ class MediaUtils(object):
         """
 
         try:
-            result: dict[str, Any] = cloudinary.uploader.upload_large(
+            result: dict[str, Any] = await asyncio.to_thread(
+                cloudinary.uploader.upload_large,
                 file,
                 resource_type="auto",
                 public_id=public_id,
-                chunk_size=6_000_000,
+                chunk_size=UPLOAD_CHUNK_SIZE,
                 eager_async=True,
                 display_name=audio_name,
                 asset_folder=folder_name,
@@ -92,6 +111,104 @@ class MediaUtils(object):
 
         return result
 
+    async def upload_document(
+        self,
+        file: BinaryIO,
+        document_name: str,
+        folder_name: str,
+        public_id: str,
+    ) -> dict[str, Any]:
+        """
+        Upload documents, e.g. book files, to cloudinary as raw files so
+        they are delivered byte for byte.
+        """
+        try:
+            result: dict[str, Any] = await asyncio.to_thread(
+                cloudinary.uploader.upload_large,
+                file,
+                resource_type="raw",
+                public_id=public_id,
+                chunk_size=UPLOAD_CHUNK_SIZE,
+                display_name=document_name,
+                asset_folder=folder_name,
+            )  # type: ignore
+
+        except Exception as e:
+            raise CloudinaryException(
+                status_code=400, detail="Failed to upload media file"
+            )
+
+        return result
+
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        file_name: str,
+        folder_name: str,
+        public_id: str,
+        resource_type: str = "auto",
+        **options: Any,
+    ) -> dict[str, Any]:
+        """
+        Upload a file to cloudinary while it is still being received.
+
+        The incoming data is regrouped into UPLOAD_CHUNK_SIZE chunks that are
+        sent with the chunked upload api. The next chunk is received while
+        the previous one is being sent, and receiving waits for the send, so
+        at most three chunks are held in memory.
+        """
+        upload_id = cloudinary.utils.random_public_id()
+        options.update(
+            public_id=public_id,
+            resource_type=resource_type,
+            asset_folder=folder_name,
+            display_name=file_name,
+        )
+
+        def send(chunk: bytes, start: int, total: int | None) -> dict[str, Any]:
+            # the total size is only known once the last chunk was received
+            end = start + len(chunk) - 1
+            headers = {
+                "Content-Range": f"bytes {start}-{end}/{-1 if total is None else total}",
+                "X-Unique-Upload-Id": upload_id,
+            }
+            return cloudinary.uploader.upload_large_part(
+                (file_name, chunk), http_headers=headers, **options
+            )
+
+        offset = 0
+        previous: bytes | None = None
+        in_flight: asyncio.Task | None = None
+        try:
+            async for chunk in fixed_size_chunks(chunks, UPLOAD_CHUNK_SIZE):
+                if previous is not None:
+                    if in_flight is not None:
+                        await in_flight
+                    in_flight = asyncio.create_task(
+                        asyncio.to_thread(send, previous, offset, None)
+                    )
+                    offset += len(previous)
+                previous = chunk
+
+            if in_flight is not None:
+                await in_flight
+            if previous is None:
+                raise CloudinaryException(status_code=400, detail="Empty media file")
+            result = await asyncio.to_thread(
+                send, previous, offset, offset + len(previous)
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise CloudinaryException(
+                status_code=400, detail="Failed to upload media file"
+            )
+        finally:
+            if in_flight is not None and not in_flight.done():
+                in_flight.cancel()
+
+        return result
+
     def delete_media_file(
         self,
         public_id: str,
@@ -134,6 +251,50 @@ class MediaUtils(object):
             )
         return True
 
+    def delete_media_files(
+        self, public_ids: list[str], resource_type: str = "image"
+    ) -> set[str]:
+        """
+        Delete up to 100 uploaded media files with a single api call.
+
+        Returns the public ids that no longer exist, files that were already
+        gone count as deleted.
+        """
+        import cloudinary.api
+
+        res = cloudinary.api.delete_resources(public_ids, resource_type=resource_type)
+        return {
+            public_id
+            for public_id, result in res.get("deleted", {}).items()
+            if result in ("deleted", "not_found")
+        }
+
+    def list_subfolders(self, folder: str, cursor: str | None = None) -> dict[str, Any]:
+        """
+        Return one page of the folders directly below folder.
+        """
+        import cloudinary.api
+        from cloudinary.exceptions import NotFound
+
+        try:
+            return cloudinary.api.subfolders(
+                folder, max_results=500, next_cursor=cursor
+            )
+        except NotFound:
+            return {"folders": []}
+
+    def list_folder_resources(
+        self, folder: str, cursor: str | None = None
+    ) -> dict[str, Any]:
+        """
+        Return one page of the media files in an asset folder.
+        """
+        import cloudinary.api
+
+        return cloudinary.api.resources_by_asset_folder(
+            folder, max_results=500, next_cursor=cursor
+        )
+
     def create_public_id(self, filename: str) -> str:
         """
         Generate a valid cloudinary public id to be used.
@@ -0,0 +1,729 @@
+"""
+Pluggable storage backends for uploaded media files.
+
+The routers talk to a ``StorageBackend`` instead of the cloudinary handler
+directly so that media can live either on Cloudinary or on the local disk,
+chosen by the ``STORAGE_BACKEND`` setting.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import secrets
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncIterator, BinaryIO, Iterator
+from urllib.parse import quote
+
+from ..core.constants import COVER_RENDITIONS, MAX_BULK_DELETE, SupportedMediaTypePath
+from ..core.tracing import traced_class
+from ..schemas.config import get_settings
+
+if TYPE_CHECKING:
+    # the cloudinary sdk is only imported once the backend is created
+    from .media_api import MediaUtils
+
+logger = logging.getLogger(__name__)
+
+
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+@dataclass(frozen=True)
+class StoredMedia:
+    """
+    Result of storing a media file.
+    """
+
+    public_id: str
+    url: str
+    resource_type: str
+    # size in bytes, when the backend reports it
+    size: int | None = None
+
+
+@dataclass(frozen=True)
+class RemoteAsset:
+    """
+    A file found in storage when listing a folder.
+    """
+
+    public_id: str
+    resource_type: str
+    created_at: datetime
+
+
+class StorageBackend(ABC):
+    """
+    Interface every media storage backend implements.
+    """
+
+    @abstractmethod
+    async def put(
+        self,
+        file: BinaryIO,
+        *,
+        filename: str,
+        public_id: str,
+        folder_name: str,
+        media_type: str,
+    ) -> StoredMedia:
+        """
+        Store the file under the given public id.
+        """
+
+    @abstractmethod
+    async def put_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        *,
+        filename: str,
+        public_id: str,
+        folder_name: str,
+        media_type: str,
+    ) -> StoredMedia:
+        """
+        Store a file that is still being received, chunk by chunk.
+        """
+
+    @abstractmethod
+    def stream(
+        self,
+        public_id: str,
+        resource_type: str | None = None,
+        start: int = 0,
+        end: int | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Yield the stored bytes between ``start`` and ``end`` (inclusive).
+        """
+
+    @abstractmethod
+    def delete(self, public_id: str, resource_type: str | None = None) -> bool:
+        """
+        Delete the stored file. Returns True once the file is gone.
+        """
+
+    def delete_many(
+        self, public_ids: list[str], resource_type: str | None = None
+    ) -> set[str]:
+        """
+        Delete several stored files. Returns the public ids that are gone.
+        """
+        return {
+            public_id
+            for public_id in public_ids
+            if self.delete(public_id, resource_type=resource_type)
+        }
+
+    @abstractmethod
+    def url(self, public_id: str, resource_type: str | None = None) -> str:
+        """
+        Return the public url of the stored file.
+        """
+
+    @abstractmethod
+    def list_folders(self, root: str) -> list[str]:
+        """
+        Return root and every folder below it that may hold stored files.
+        """
+
+    @abstractmethod
+    def list_assets(
+        self, folder: str, cursor: str | None = None
+    ) -> tuple[list[RemoteAsset], str | None]:
+        """
+        Return one page of the files directly in folder and the cursor of the
+        next page, None after the last one.
+        """
+
+    def create_public_id(self, filename: str) -> str:
+        """
+        Generate a valid public id from the uploaded file name: its stem,
+        without any directory, with characters other than letters, digits,
+        "_" and "-" replaced by "_". Names without a stem get a random id.
+        """
+        name = re.split(r"[\\/]", filename)[-1]
+        stem = re.sub(r"[^\w-]", "_", name.strip(" ").split(".")[0])
+        return stem or secrets.token_hex(8)
+
+    def renditions(self, public_id: str) -> dict[str, str]:
+        """
+        Return the url of every cover rendition of an image, keyed by name.
+
+        Backends that can't resize images serve the original for every size.
+        """
+        url = self.url(public_id, "image")
+        return {name: url for name in COVER_RENDITIONS}
+
+
+def _extension(filename: str) -> str:
+    """
+    Return the extension of the last path segment of filename, only letters,
+    digits and "_", or "bin" when it has none.
+    """
+    name = re.split(r"[\\/]", filename)[-1]
+    _, dot, extension = name.rpartition(".")
+    extension = re.sub(r"\W", "", extension) if dot else ""
+    return extension or "bin"
+
+
+def _resource_type(media_type: str) -> str:
+    """
+    Map a SupportedMediaTypePath name to a cloudinary resource type.
+    """
+    if media_type == SupportedMediaTypePath.IMAGE.name:
+        return "image"
+    if media_type in (
+        SupportedMediaTypePath.AUDIO.name,
+        SupportedMediaTypePath.VIDEO.name,
+    ):
+        # cloudinary stores audio files as the video resource type
+        return "video"
+    return "raw"
+
+
+def cover_transformation(name: str) -> dict[str, int | str]:
+    """
+    Return the cloudinary transformation for the given cover rendition.
+    """
+    return {
+        **COVER_RENDITIONS[name],
+        "gravity": "auto",
+        "quality": "auto",
+        "fetch_format": "auto",
+    }
+
+
+@traced_class
+class CloudinaryStorage(StorageBackend):
+    """
+    Storage backend that keeps media files on Cloudinary.
+    """
+
+    def __init__(self, handler: "MediaUtils") -> None:
+        import urllib3
+
+        self.handler = handler
+        self.http = urllib3.PoolManager()
+
+    async def put(
+        self,
+        file: BinaryIO,
+        *,
+        filename: str,
+        public_id: str,
+        folder_name: str,
+        media_type: str,
+    ) -> StoredMedia:
+        if media_type == SupportedMediaTypePath.IMAGE.name:
+            res = await self.handler.upload_image(
+                file=file,
+                image_name=filename,
+                folder_name=folder_name,
+                public_id=public_id,
+                eager=[cover_transformation(name) for name in COVER_RENDITIONS],
+            )
+        elif media_type == SupportedMediaTypePath.AUDIO.name:
+            res = await self.handler.upload_audio(
+                file=file,
+                audio_name=filename,
+                folder_name=folder_name,
+                public_id=public_id,
+            )
+        elif media_type == SupportedMediaTypePath.DOCUMENT.name:
+            res = await self.handler.upload_document(
+                file=file,
+                document_name=filename,
+                folder_name=folder_name,
+                public_id=public_id,
+            )
+        else:
+            res = await self.handler.upload_video(
+                file=file,
+                video_name=filename,
+                folder_name=folder_name,
+                public_id=public_id,
+            )
+        return StoredMedia(
+            public_id=public_id,
+            url=res["url"],
+            resource_type=res.get("resource_type", _resource_type(media_type)),
+            size=res.get("bytes"),
+        )
+
+    async def put_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        *,
+        filename: str,
+        public_id: str,
+        folder_name: str,
+        media_type: str,
+    ) -> StoredMedia:
+        if media_type == SupportedMediaTypePath.IMAGE.name:
+            res = await self.handler.upload_stream(
+                chunks,
+                file_name=filename,
+                folder_name=folder_name,
+                public_id=public_id,
+                resource_type="image",
+                eager=[cover_transformation(name) for name in COVER_RENDITIONS],
+                eager_async=True,
+            )
+        else:
+            res = await self.handler.upload_stream(
+                chunks,
+                file_name=filename,
+                folder_name=folder_name,
+                public_id=public_id,
+                resource_type=(
+                    "raw"
+                    if media_type == SupportedMediaTypePath.DOCUMENT.name
+                    else "auto"
+                ),
+                eager_async=True,
+            )
+        return StoredMedia(
+            public_id=public_id,
+            url=res["url"],
+            resource_type=res.get("resource_type", _resource_type(media_type)),
+            size=res.get("bytes"),
+        )
+
+    def stream(
+        self,
+        public_id: str,
+        resource_type: str | None = None,
+        start: int = 0,
+        end: int | None = None,
+    ) -> Iterator[bytes]:
+        headers = {}
+        if start or end is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+
+        res = self.http.request(
+            "GET",
+            self.url(public_id, resource_type),
+            headers=headers,
+            preload_content=False,
+        )
+        try:
+            yield from res.stream(STREAM_CHUNK_SIZE)
+        finally:
+            res.release_conn()
+
+    def delete(self, public_id: str, resource_type: str | None = None) -> bool:
+        return self.handler.delete_media_file(public_id, resource_type=resource_type)
+
+    def delete_many(
+        self, public_ids: list[str], resource_type: str | None = None
+    ) -> set[str]:
+        deleted: set[str] = set()
+        for start in range(0, len(public_ids), MAX_BULK_DELETE):
+            deleted |= self.handler.delete_media_files(
+                public_ids[start : start + MAX_BULK_DELETE],
+                resource_type=resource_type or "image",
+            )
+        return deleted
+
+    def list_folders(self, root: str) -> list[str]:
+        folders = [root]
+        for folder in folders:
+            cursor = None
+            while True:
+                res = self.handler.list_subfolders(folder, cursor)
+                folders.extend(sub["path"] for sub in res.get("folders", []))
+                cursor = res.get("next_cursor")
+                if cursor is None:
+                    break
+        return folders
+
+    def list_assets(
+        self, folder: str, cursor: str | None = None
+    ) -> tuple[list[RemoteAsset], str | None]:
+        res = self.handler.list_folder_resources(folder, cursor)
+        assets = [
+            RemoteAsset(
+                public_id=resource["public_id"],
+                resource_type=resource["resource_type"],
+                created_at=datetime.fromisoformat(
+                    resource["created_at"].replace("Z", "+00:00")
+                ),
+            )
+            for resource in res.get("resources", [])
+        ]
+        return assets, res.get("next_cursor")
+
+    def url(self, public_id: str, resource_type: str | None = None) -> str:
+        from cloudinary.utils import cloudinary_url
+
+        url, _ = cloudinary_url(
+            public_id, resource_type=resource_type or "image", secure=True
+        )
+        return url
+
+    def renditions(self, public_id: str) -> dict[str, str]:
+        from cloudinary.utils import cloudinary_url
+
+        # the urls are built locally from the same parameters used for the
+        # eager transformations, so no api call is needed
+        return {
+            name: cloudinary_url(
+                public_id,
+                resource_type="image",
+                secure=True,
+                transformation=[cover_transformation(name)],
+            )[0]
+            for name in COVER_RENDITIONS
+        }
+
+
+def _copy_zero_copy(src_fd: int, dst_fd: int, offset: int, count: int) -> None:
+    """
+    Copy ``count`` bytes between two file descriptors inside the kernel.
+
+    Uses copy_file_range where available and falls back to sendfile.
+    """
+    copy = getattr(os, "copy_file_range", None)
+    while count > 0:
+        if copy is not None:
+            try:
+                sent = copy(src_fd, dst_fd, count, offset)
+            except OSError:
+                # e.g. cross filesystem copies on older kernels
+                copy = None
+                continue
+        else:
+            sent = os.sendfile(dst_fd, src_fd, offset, count)
+        if sent == 0:
+            break
+        offset += sent
+        count -= sent
+
+
+def copy_file(src: BinaryIO, dst: BinaryIO) -> None:
+    """
+    Copy the remaining content of ``src`` into ``dst``.
+
+    Files that are backed by a real file descriptor are copied without
+    passing the data through userspace, everything else (e.g. an upload that
+    is still spooled in memory) is copied with shutil.
+    """
+    if getattr(src, "_rolled", True):
+        try:
+            src_fd = src.fileno()
+        except (AttributeError, OSError, ValueError):
+            src_fd = None
+
+        if src_fd is not None:
+            offset = src.tell()
+            count = os.fstat(src_fd).st_size - offset
+            dst.flush()
+            try:
+                _copy_zero_copy(src_fd, dst.fileno(), offset, count)
+            except OSError:
+                pass
+            else:
+                src.seek(offset + count)
+                return
+            dst.seek(0)
+            dst.truncate()
+            src.seek(offset)
+
+    shutil.copyfileobj(src, dst)
+
+
+def write_atomic(src: BinaryIO, path: str) -> str:
+    """
+    Write ``src`` to ``path`` through a temporary file and an atomic rename so
+    that readers never see a partially written file.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            copy_file(src, out)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+@traced_class
+class LocalStorage(StorageBackend):
+    """
+    Storage backend that keeps media files on the local disk.
+
+    Files are stored below the root folder they were uploaded into, e.g.
+    ``sermon``, so folders can be listed separately, and a directory per
+    resource type: like on Cloudinary a public id names one file per
+    resource type. Below it they are sharded into two levels of directories
+    derived from a hash of the public id so that no single directory grows
+    too large.
+    """
+
+    def __init__(self, root: str, base_url: str) -> None:
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def _directory(
+        self, public_id: str, resource_type: str | None, folder: str
+    ) -> str:
+        """
+        Return the directory, relative to the root, that stores the file.
+        """
+        if not public_id or public_id.startswith(".") or "/" in public_id:
+            raise ValueError(f"Invalid public id: {public_id!r}")
+        if not folder or folder.startswith("."):
+            raise ValueError(f"Invalid folder: {folder!r}")
+
+        digest = hashlib.sha1(public_id.encode()).hexdigest()
+        # cloudinary also defaults to images
+        return os.path.join(
+            folder.split("/")[0], resource_type or "image", digest[:2], digest[2:4]
+        )
+
+    def _stored(self, public_id: str, resource_type: str | None) -> list[str]:
+        """
+        Return the paths of the files stored under the public id, whatever
+        their extension and folder.
+        """
+        prefix = public_id + "."
+        paths = []
+        for folder in _subdirectories(self.root):
+            directory = os.path.join(
+                self.root, self._directory(public_id, resource_type, folder)
+            )
+            try:
+                with os.scandir(directory) as entries:
+                    paths.extend(
+                        entry.path
+                        for entry in entries
+                        if entry.name.startswith(prefix)
+                        and "." not in entry.name[len(prefix) :]
+                        and entry.is_file()
+                    )
+            except FileNotFoundError:
+                pass
+        return paths
+
+    def _find(self, public_id: str, resource_type: str | None = None) -> str | None:
+        """
+        Return the path of the stored file regardless of its extension.
+        """
+        paths = self._stored(public_id, resource_type)
+        return paths[0] if paths else None
+
+    def _replaced(self, path: str, public_id: str, resource_type: str) -> None:
+        # a file stored under the same public id with another extension is
+        # overwritten, as on cloudinary
+        for other in self._stored(public_id, resource_type):
+            if other != path:
+                try:
+                    os.unlink(other)
+                except FileNotFoundError:
+                    pass
+
+    def write(
+        self,
+        file: BinaryIO,
+        filename: str,
+        public_id: str,
+        resource_type: str,
+        folder_name: str,
+    ) -> str:
+        """
+        Store the file and return the relative path it was stored under.
+        """
+        file_ext = _extension(filename)
+        relative_path = os.path.join(
+            self._directory(public_id, resource_type, folder_name),
+            f"{public_id}.{file_ext}",
+        )
+        path = write_atomic(file, os.path.join(self.root, relative_path))
+        self._replaced(path, public_id, resource_type)
+        return relative_path
+
+    async def put(
+        self,
+        file: BinaryIO,
+        *,
+        filename: str,
+        public_id: str,
+        folder_name: str,
+        media_type: str,
+    ) -> StoredMedia:
+        resource_type = _resource_type(media_type)
+        relative_path = await asyncio.to_thread(
+            self.write, file, filename, public_id, resource_type, folder_name
+        )
+        logger.debug("stored media file", extra={"path": relative_path})
+        return StoredMedia(
+            public_id=public_id,
+            url=self._url_for(relative_path),
+            resource_type=resource_type,
+            size=os.path.getsize(os.path.join(self.root, relative_path)),
+        )
+
+    async def put_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        *,
+        filename: str,
+        public_id: str,
+        folder_name: str,
+        media_type: str,
+    ) -> StoredMedia:
+        resource_type = _resource_type(media_type)
+        file_ext = _extension(filename)
+        relative_path = os.path.join(
+            self._directory(public_id, resource_type, folder_name),
+            f"{public_id}.{file_ext}",
+        )
+        path = os.path.join(self.root, relative_path)
+        directory = os.path.dirname(path)
+
+        await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                async for chunk in chunks:
+                    await asyncio.to_thread(out.write, chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        await asyncio.to_thread(self._replaced, path, public_id, resource_type)
+
+        logger.debug("stored media file", extra={"path": relative_path})
+        return StoredMedia(
+            public_id=public_id,
+            url=self._url_for(relative_path),
+            resource_type=resource_type,
+            size=os.path.getsize(path),
+        )
+
+    def stream(
+        self,
+        public_id: str,
+        resource_type: str | None = None,
+        start: int = 0,
+        end: int | None = None,
+    ) -> Iterator[bytes]:
+        path = self._find(public_id, resource_type)
+        if path is None:
+            raise FileNotFoundError(public_id)
+
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            stop = size if end is None else min(end + 1, size)
+            offset = start
+            while offset < stop:
+                chunk = os.pread(fd, min(STREAM_CHUNK_SIZE, stop - offset), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                yield chunk
+        finally:
+            os.close(fd)
+
+    def delete(self, public_id: str, resource_type: str | None = None) -> bool:
+        for path in self._stored(public_id, resource_type):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            logger.debug("deleted media file", extra={"path": path})
+        return True
+
+    def list_folders(self, root: str) -> list[str]:
+        # only the root folder of an upload is kept on disk, the shard
+        # directories below it are listed for any of its subfolders
+        top = root.strip("/").split("/")[0]
+        if not top or top.startswith("."):
+            raise ValueError(f"Invalid folder: {root!r}")
+        folders = []
+        for resource_type in _subdirectories(os.path.join(self.root, top)):
+            for outer in _subdirectories(os.path.join(self.root, top, resource_type)):
+                folders.extend(
+                    f"{top}/{resource_type}/{outer}/{inner}"
+                    for inner in _subdirectories(
+                        os.path.join(self.root, top, resource_type, outer)
+                    )
+                )
+        return folders
+
+    def list_assets(
+        self, folder: str, cursor: str | None = None
+    ) -> tuple[list[RemoteAsset], str | None]:
+        assets = []
+        with os.scandir(os.path.join(self.root, folder)) as entries:
+            for entry in entries:
+                # skip uploads that are still being written
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                assets.append(
+                    RemoteAsset(
+                        public_id=entry.name.rsplit(".", 1)[0],
+                        resource_type=folder.split("/")[1],
+                        created_at=datetime.fromtimestamp(
+                            entry.stat().st_mtime, timezone.utc
+                        ),
+                    )
+                )
+        return assets, None
+
+    def _url_for(self, relative_path: str) -> str:
+        return f"{self.base_url}/{quote(relative_path.replace(os.sep, '/'))}"
+
+    def url(self, public_id: str, resource_type: str | None = None) -> str:
+        path = self._find(public_id, resource_type)
+        if path is None:
+            raise FileNotFoundError(public_id)
+        return self._url_for(os.path.relpath(path, self.root))
+
+
+def _subdirectories(path: str) -> list[str]:
+    try:
+        with os.scandir(path) as entries:
+            return sorted(
+                entry.name
+                for entry in entries
+                if entry.is_dir() and not entry.name.startswith(".")
+            )
+    except FileNotFoundError:
+        return []
+
+
+@lru_cache
+def get_storage() -> StorageBackend:
+    """
+    Returns the storage backend selected by the STORAGE_BACKEND setting.
+
+    The backend is created on first use so that the cloudinary sdk is only
+    imported and configured by processes that actually handle media.
+    """
+    settings = get_settings()
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.MEDIA_ROOT, settings.MEDIA_URL)
+
+    import cloudinary
+    from .media_api import cloudinaryHandler
+
+    cloudinary.config(
+        cloud_name=settings.CLOUD_NAME,
+        api_key=settings.API_KEY,
+        api_secret=settings.API_SECRET,
+        secure=True,
+    )
+    return CloudinaryStorage(cloudinaryHandler)
@@ -0,0 +1,88 @@
+"""
+LRU cache of fixed size byte windows of stored files.
+
+E-readers request a book a few pages at a time and keep coming back to the
+same parts, so range reads are served from aligned windows kept in memory.
+Only the windows a request touches are fetched, the cache is bounded by
+bytes, and whole files are never read into memory.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Iterator
+
+from .storage import StorageBackend
+
+WindowKey = tuple[str, int, int]
+
+
+class WindowCache:
+    """Byte window cache shared by the requests of a process.
+
+    Args:
+        window_size (int): Size of a window, reads are aligned to it.
+        max_bytes (int): Total size of the cached windows.
+    """
+
+    def __init__(self, window_size: int, max_bytes: int) -> None:
+        self.window_size = window_size
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._windows: OrderedDict[WindowKey, bytes] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def _window(
+        self,
+        storage: StorageBackend,
+        public_id: str,
+        resource_type: str | None,
+        file_size: int,
+        index: int,
+    ) -> bytes:
+        # the file size is part of the key so a replaced file isn't served
+        # from the windows of the old one
+        key = (public_id, file_size, index)
+        with self._lock:
+            data = self._windows.get(key)
+            if data is not None:
+                self._windows.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        start = index * self.window_size
+        end = min(start + self.window_size, file_size) - 1
+        data = b"".join(storage.stream(public_id, resource_type, start, end))
+
+        with self._lock:
+            if key not in self._windows:
+                self._windows[key] = data
+                self._bytes += len(data)
+            while self._bytes > self.max_bytes and self._windows:
+                _, evicted = self._windows.popitem(last=False)
+                self._bytes -= len(evicted)
+        return data
+
+    def read(
+        self,
+        storage: StorageBackend,
+        public_id: str,
+        resource_type: str | None,
+        file_size: int,
+        start: int,
+        end: int,
+    ) -> Iterator[bytes]:
+        """
+        Yield the bytes between start and end (inclusive) of a stored file,
+        one window at a time.
+        """
+        for index in range(start // self.window_size, end // self.window_size + 1):
+            data = self._window(storage, public_id, resource_type, file_size, index)
+            offset = index * self.window_size
+            yield data[max(start - offset, 0) : end - offset + 1]
@@ -10,6 +10,7 @@ class SupportedMediaTypePath(Enum):
     VIDEO = "videos"
     AUDIO = "audios"
     IMAGE = "images"
+    DOCUMENT = "documents"
 
 
 AUDIO_FILE_TYPES: list[str] = [
@@ -29,6 +30,13 @@ IMAGE_FILE_TYPES: list[str] = [
 ]
 
 
+# book files, mapped to the content type they are served with
+DOCUMENT_FILE_TYPES: dict[str, str] = {
+    "pdf": "application/pdf",
+    "epub": "application/epub+zip",
+}
+
+
 VIDEO_FILE_TYPES: list[str] = [
     "mp4",
     "mov",
@@ -41,3 +49,20 @@ VIDEO_FILE_TYPES: list[str] = [
     "dash",  # Dynamic Adaptive Streaming over HTTP – used for adaptive bitrate streaming
     "ismv",
 ]
+
+
+# Derived renditions generated for sermon and podcast cover images.
+# The same parameters are used for the eager transformations requested on
+# upload and for building delivery urls, so the urls always hit a derived asset.
+COVER_RENDITIONS: dict[str, dict[str, int | str]] = {
+    "thumbnail": {"width": 160, "height": 160, "crop": "fill"},
+    "card": {"width": 480, "height": 270, "crop": "fill"},
+    "hero": {"width": 1280, "height": 720, "crop": "fill"},
+}
+
+
+# Cloudinary's delete_resources accepts at most this many public ids per call.
+MAX_BULK_DELETE = 100
+
+# Width in seconds of a bucket of the listening retention histograms.
+RETENTION_BUCKET_SECONDS = 60
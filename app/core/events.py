@@ -0,0 +1,56 @@
+"""
+In-process publish/subscribe for content changes.
+
+Services publish an event once a change to a sermon, podcast or book is
+committed, subsystems that keep derived state (caches, live update streams)
+subscribe to the topics they depend on instead of being called by the
+services directly. Events only reach subscribers of the publishing process.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# the kinds of content changes are published for
+CONTENT_TOPICS = ("sermon", "podcast", "book")
+
+# subscribe to this topic to receive every event
+ALL_TOPICS = "*"
+
+Subscriber = Callable[[str, dict[str, Any]], None]
+
+_subscribers: dict[str, list[Subscriber]] = defaultdict(list)
+
+
+def subscribe(topic: str, callback: Subscriber) -> None:
+    """
+    Call callback with (topic, payload) for every event published on topic.
+
+    Callbacks run synchronously in the publishing thread, which may be a
+    worker thread, so they must be quick and thread safe.
+    """
+    _subscribers[topic].append(callback)
+
+
+def unsubscribe(topic: str, callback: Subscriber) -> None:
+    """
+    Stop calling callback for events on topic.
+    """
+    try:
+        _subscribers[topic].remove(callback)
+    except ValueError:
+        pass
+
+
+def publish(topic: str, **payload: Any) -> None:
+    """
+    Publish an event. A failing subscriber doesn't affect the others or the
+    publisher.
+    """
+    for callback in (*_subscribers[topic], *_subscribers[ALL_TOPICS]):
+        try:
+            callback(topic, payload)
+        except Exception:
+            logger.exception("subscriber of %s events failed", topic)
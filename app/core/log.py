@@ -0,0 +1,166 @@
+"""
+Structured JSON logging that never blocks the caller.
+
+Records are put on a bounded queue by the handler of the root logger and
+written as one JSON object per line by a background thread, so logging
+from a request handler or the event loop costs no I/O; when the queue is
+full records are dropped and counted instead of waiting. Every record
+carries the ids of the request and trace it was logged in, debug
+records can be sampled and levels are set per logger, e.g.
+``LOG_LEVELS="app.repository=DEBUG,httpx=WARNING"``.
+"""
+
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, TextIO
+
+from . import metrics
+from .tracing import current_trace_id
+
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# attributes every LogRecord has, the others were passed with extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: QueueListener | None = None
+_handler: "NonBlockingQueueHandler | None" = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as a single line JSON object, with the fields passed
+    with ``extra=`` at the top level.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Adds the ids of the current request and trace to records and samples
+    debug records.
+
+    Args:
+        debug_sample_rate (float): Share of the debug records kept.
+    """
+
+    def __init__(self, debug_sample_rate: float = 1.0) -> None:
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and random.random() >= self.debug_sample_rate:
+            return False
+        record.request_id = request_id.get()
+        record.trace_id = current_trace_id()
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Queue handler that drops records when the queue is full.
+    """
+
+    def __init__(self, records: queue.Queue) -> None:
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the message is rendered here, its arguments may change once the
+        # caller continues; formatting to JSON is left to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_levels(levels: str) -> dict[str, str]:
+    """
+    Return the logger levels of a ``name=LEVEL,...`` string.
+    """
+    parsed = {}
+    for item in levels.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            parsed[name.strip()] = level.strip().upper()
+    return parsed
+
+
+def configure_logging(
+    level: str = "INFO",
+    levels: str = "",
+    debug_sample_rate: float = 1.0,
+    queue_size: int = 10_000,
+    stream: TextIO | None = None,
+) -> None:
+    """
+    Send the records of all loggers through the queue to stream, stdout by
+    default, replacing an earlier configuration.
+    """
+    global _listener, _handler
+    stop_logging()
+
+    records: queue.Queue = queue.Queue(queue_size)
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+    _handler = NonBlockingQueueHandler(records)
+    _handler.addFilter(ContextFilter(debug_sample_rate))
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(level.upper())
+    for name, logger_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    handler = _handler
+    metrics.register(
+        "tbc_log_records_dropped_total",
+        "counter",
+        "Log records dropped because the log queue was full.",
+        lambda: [({}, handler.dropped)],
+    )
+
+
+def stop_logging() -> None:
+    """
+    Write the queued records and detach the handler, e.g. on shutdown.
+    """
+    global _listener, _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
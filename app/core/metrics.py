@@ -0,0 +1,41 @@
+"""
+Minimal in-process metrics registry exposed in the Prometheus text format.
+
+Subsystems register a collector function that returns the current samples
+of a metric; nothing is computed until the metrics endpoint is scraped.
+"""
+
+from typing import Callable, Iterable
+
+Sample = tuple[dict[str, str], float]
+
+_metrics: dict[str, tuple[str, str, Callable[[], Iterable[Sample]]]] = {}
+
+
+def register(
+    name: str, kind: str, help: str, collect: Callable[[], Iterable[Sample]]
+) -> None:
+    """
+    Register (or replace) a metric.
+
+    Args:
+        name (str): Metric name, e.g. ``tbc_bulkhead_queue_depth``.
+        kind (str): Prometheus type, ``gauge`` or ``counter``.
+        help (str): Description of the metric.
+        collect (Callable): Returns the (labels, value) samples of the metric.
+    """
+    _metrics[name] = (kind, help, collect)
+
+
+def render() -> str:
+    """
+    Render every registered metric in the Prometheus text format.
+    """
+    lines = []
+    for name, (kind, help, collect) in sorted(_metrics.items()):
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in collect():
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+    return "\n".join(lines) + "\n"
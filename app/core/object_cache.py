@@ -0,0 +1,155 @@
+"""
+Bounded in-process cache for hot single item reads.
+
+Entries expire after a TTL and the least recently used ones are dropped
+once the cache is full. Concurrent misses for the same key are coalesced:
+the first caller loads the value and the others wait for its result, so a
+burst of requests for an item that isn't cached costs one load.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, TypeVar
+
+from . import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_caches: dict[str, "ObjectCache"] = {}
+
+
+class _Flight(Generic[V]):
+    """
+    A load in progress that other callers can wait for.
+    """
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: V | None = None
+        self.error: BaseException | None = None
+        # set when the key was invalidated while loading, the loaded value
+        # may predate the change and isn't cached
+        self.invalidated = False
+
+    def wait(self) -> V:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value  # type: ignore
+
+
+class ObjectCache(Generic[K, V]):
+    """LRU cache with a TTL and single-flight loading.
+
+    Args:
+        max_size (int): Entries kept at most.
+        ttl (float): Seconds an entry is served before it is loaded again.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._flights: dict[K, _Flight[V]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K, load: Callable[[], V]) -> V:
+        """
+        Return the cached value of key, calling load on a miss. None is
+        returned but not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            return flight.wait()
+
+        try:
+            value = load()
+        except BaseException as e:
+            with self._lock:
+                del self._flights[key]
+            flight.error = e
+            flight.done.set()
+            raise
+
+        with self._lock:
+            del self._flights[key]
+            if value is not None and not flight.invalidated:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        flight.value = value
+        flight.done.set()
+        return value
+
+    def invalidate(self, key: K) -> None:
+        """
+        Drop the cached value of key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.invalidated = True
+
+    def on_event(self, topic: str, payload: dict[str, Any]) -> None:
+        """
+        Events hub callback, drops the changed item.
+        """
+        self.invalidate(payload["id"])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for flight in self._flights.values():
+                flight.invalidated = True
+
+
+def register_cache(name: str, cache: ObjectCache) -> None:
+    """
+    Expose the counters of cache as metrics labelled with name.
+    """
+    _caches[name] = cache
+    for metric, kind, help, attr in (
+        ("tbc_object_cache_hits_total", "counter", "Reads served from cache.", "hits"),
+        ("tbc_object_cache_misses_total", "counter", "Reads that loaded.", "misses"),
+        (
+            "tbc_object_cache_coalesced_total",
+            "counter",
+            "Reads that waited for a load already in progress.",
+            "coalesced",
+        ),
+        ("tbc_object_cache_size", "gauge", "Cached entries.", "size"),
+    ):
+        metrics.register(
+            metric,
+            kind,
+            help,
+            lambda attr=attr: [
+                ({"cache": cache_name}, getattr(registered, attr))
+                for cache_name, registered in _caches.items()
+            ],
+        )
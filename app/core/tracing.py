@@ -0,0 +1,381 @@
+"""
+Lightweight in-process tracing of requests.
+
+The tracing middleware opens a trace for every request, continuing the
+trace of a W3C ``traceparent`` header when the caller sent one. Routes,
+services, repositories and the media handlers record spans into the trace
+of the current context, also from worker threads. Sampling happens once the
+request finished: slow and failed traces are always kept, the others at
+TRACING_SAMPLE_RATE, and kept traces go to an in-memory ring, viewable at
+``/api/v1/admin/traces/``, and optionally to a JSONL file.
+
+Outside a trace, e.g. in background tasks, spans cost a context variable
+lookup.
+"""
+
+import functools
+import inspect
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Iterator, TypeVar
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from . import metrics
+from .write_behind import JsonLinesFile
+from ..schemas.config import get_settings
+
+T = TypeVar("T")
+
+TRACEPARENT = re.compile(r"00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+
+
+class Trace:
+    """
+    The spans recorded for one request.
+    """
+
+    __slots__ = (
+        "trace_id",
+        "parent_id",
+        "sampled",
+        "max_spans",
+        "start",
+        "spans",
+        "dropped",
+    )
+
+    def __init__(
+        self, trace_id: str, parent_id: str | None, sampled: bool, max_spans: int
+    ) -> None:
+        self.trace_id = trace_id
+        # the caller's span, when the trace was continued
+        self.parent_id = parent_id
+        # whether the caller sampled the trace
+        self.sampled = sampled
+        self.max_spans = max_spans
+        self.start = time.time()
+        self.spans: list[Span] = []
+        self.dropped = 0
+
+
+class Span:
+    """
+    A timed operation within a trace.
+    """
+
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+    )
+
+    def __init__(
+        self, trace: Trace, parent_id: str | None, name: str, attributes: dict
+    ) -> None:
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: int | None = None
+        self.error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+
+_current: ContextVar[Span | None] = ContextVar("span", default=None)
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def current_trace_id() -> str | None:
+    span = _current.get()
+    return span.trace.trace_id if span is not None else None
+
+
+def parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    """
+    Return the trace id, parent span id and sampled flag of a traceparent
+    header, or None when it isn't valid.
+    """
+    match = TRACEPARENT.fullmatch((header or "").strip().lower())
+    if match is None:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def traceparent() -> str | None:
+    """
+    Returns the traceparent header for calls made within the current span.
+    """
+    span = _current.get()
+    if span is None:
+        return None
+    return f"00-{span.trace.trace_id}-{span.span_id}-01"
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """
+    Record the enclosed block as a span of the current trace. Yields None
+    outside a trace.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+
+    trace = parent.trace
+    current = Span(trace, parent.span_id, name, attributes)
+    if len(trace.spans) < trace.max_spans:
+        trace.spans.append(current)
+    else:
+        trace.dropped += 1
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.perf_counter_ns()
+        _current.reset(token)
+
+
+def traced(fn: Callable[..., T], name: str | None = None) -> Callable[..., T]:
+    """
+    Wrap fn to record its calls as spans.
+    """
+    name = name or fn.__qualname__
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return await fn(*args, **kwargs)
+            with span(name):
+                return await fn(*args, **kwargs)
+
+        return async_wrapper  # type: ignore
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _current.get() is None:
+            return fn(*args, **kwargs)
+        with span(name):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def traced_class(cls: type[T]) -> type[T]:
+    """
+    Class decorator recording the calls of the public methods as spans.
+    Generators are left alone, their span would end before they ran.
+    """
+    for attr, value in list(vars(cls).items()):
+        if (
+            attr.startswith("_")
+            or not inspect.isfunction(value)
+            or inspect.isgeneratorfunction(value)
+            or inspect.isasyncgenfunction(value)
+        ):
+            continue
+        setattr(cls, attr, traced(value))
+    return cls
+
+
+class TracedRoute(APIRoute):
+    """
+    Route class recording request validation and the endpoint as a span.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handler = super().get_route_handler()
+        name = f"route {self.path}"
+
+        async def traced_handler(request: Request) -> Response:
+            if _current.get() is None:
+                return await handler(request)
+            with span(name):
+                return await handler(request)
+
+        return traced_handler
+
+
+class TraceRing:
+    """
+    The most recent kept traces, in memory.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._traces: deque[dict] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, trace: dict) -> None:
+        with self._lock:
+            self._traces.append(trace)
+
+    def recent(self, limit: int | None = None) -> list[dict]:
+        with self._lock:
+            return list(reversed(self._traces))[:limit]
+
+    def get(self, trace_id: str) -> dict | None:
+        with self._lock:
+            for trace in self._traces:
+                if trace["trace_id"] == trace_id:
+                    return trace
+        return None
+
+
+class Tracer:
+    """Starts traces and keeps the slow, failed and sampled ones.
+
+    Args:
+        sample_rate (float): Share of the fast, successful traces kept.
+        slow_ms (float): Traces taking at least this long are kept.
+        ring_size (int): Kept traces held in memory.
+        max_spans (int): Spans recorded per trace at most.
+        file (JsonLinesFile | None): Also append kept traces to this file.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float,
+        slow_ms: float,
+        ring_size: int,
+        max_spans: int,
+        file: JsonLinesFile | None = None,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.max_spans = max_spans
+        self.ring = TraceRing(ring_size)
+        self.file = file
+        self.finished = 0
+        self.kept = 0
+
+    @contextmanager
+    def trace(self, name: str, header: str | None = None) -> Iterator[Span]:
+        """
+        Record the enclosed block as the root span of a new trace,
+        continuing the trace of a traceparent header.
+        """
+        parent = parse_traceparent(header)
+        if parent is not None:
+            trace = Trace(*parent, max_spans=self.max_spans)
+        else:
+            trace = Trace(
+                f"{random.getrandbits(128):032x}", None, False, self.max_spans
+            )
+        root = Span(trace, trace.parent_id, name, {})
+        trace.spans.append(root)
+        token = _current.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            root.end_ns = time.perf_counter_ns()
+            _current.reset(token)
+            self.finish(trace, root)
+
+    def finish(self, trace: Trace, root: Span) -> None:
+        """
+        Keep the trace if it is slow, failed or sampled.
+        """
+        self.finished += 1
+        duration = root.duration_ms
+        failed = root.error is not None or root.attributes.get("status", 0) >= 500
+        if not (
+            failed
+            or duration >= self.slow_ms
+            or trace.sampled
+            or random.random() < self.sample_rate
+        ):
+            return
+
+        self.kept += 1
+        exported = {
+            "trace_id": trace.trace_id,
+            "name": root.name,
+            "start": trace.start,
+            "duration_ms": round(duration, 3),
+            "error": failed,
+            "dropped_spans": trace.dropped,
+            "spans": [
+                {
+                    "span_id": s.span_id,
+                    "parent_id": s.parent_id,
+                    "name": s.name,
+                    "offset_ms": round((s.start_ns - root.start_ns) / 1e6, 3),
+                    "duration_ms": round(s.duration_ms, 3),
+                    "attributes": s.attributes,
+                    "error": s.error,
+                }
+                for s in trace.spans
+            ],
+        }
+        self.ring.add(exported)
+        if self.file is not None:
+            self.file.record(exported)
+
+
+@lru_cache
+def get_tracer() -> Tracer:
+    """
+    Returns the tracer of this process, created on first use.
+    """
+    settings = get_settings()
+    file = None
+    if settings.TRACING_EXPORT_PATH:
+        file = JsonLinesFile(
+            settings.TRACING_EXPORT_PATH, interval=5.0, max_pending=100
+        )
+    tracer = Tracer(
+        sample_rate=settings.TRACING_SAMPLE_RATE,
+        slow_ms=settings.TRACING_SLOW_MS,
+        ring_size=settings.TRACING_RING_SIZE,
+        max_spans=settings.TRACING_MAX_SPANS,
+        file=file,
+    )
+    metrics.register(
+        "tbc_traces_total",
+        "counter",
+        "Requests traced.",
+        lambda: [({}, tracer.finished)],
+    )
+    metrics.register(
+        "tbc_traces_kept_total",
+        "counter",
+        "Traces kept as slow, failed or sampled.",
+        lambda: [({}, tracer.kept)],
+    )
+    return tracer
@@ -0,0 +1,164 @@
+"""
+Write-behind buffering for high frequency writes.
+
+Instead of one database write per event, events are collected in memory and
+written as a single batch every few seconds, or as soon as enough of them
+are pending. A batch that fails to write is merged back and retried with the
+next one, and the buffer is flushed once more when the app shuts down.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Generic, List, TypeVar
+
+logger = logging.getLogger(__name__)
+
+B = TypeVar("B")
+
+
+class BatchBuffer(ABC, Generic[B]):
+    """Base class of the write-behind buffers.
+
+    Args:
+        interval (float): Seconds between flushes.
+        max_pending (int): Flush early once this many events are pending.
+    """
+
+    def __init__(self, interval: float, max_pending: int) -> None:
+        self.interval = interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._batch: B = self.new_batch()
+        self._pending = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self.flushed = 0
+        self.failures = 0
+
+    @abstractmethod
+    def new_batch(self) -> B:
+        """
+        Return an empty batch.
+        """
+
+    @abstractmethod
+    def merge(self, batch: B, failed: B) -> None:
+        """
+        Merge a batch that failed to write back into the current one.
+        """
+
+    @abstractmethod
+    def write(self, batch: B) -> None:
+        """
+        Write a batch to the database. Runs in a worker thread.
+        """
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _record(self, update: Callable[[B], None], count: int = 1) -> None:
+        """
+        Apply update to the current batch, waking the flusher when it is full.
+        """
+        with self._lock:
+            update(self._batch)
+            self._pending += count
+            full = self._pending >= self.max_pending
+        if full and self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def peek(self, read: Callable[[B], object]) -> object:
+        """
+        Read from the batch that wasn't written yet.
+        """
+        with self._lock:
+            return read(self._batch)
+
+    def flush_sync(self) -> int:
+        """
+        Write the pending batch. Returns the number of events written.
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch, count = self._batch, self._pending
+            self._batch, self._pending = self.new_batch(), 0
+
+        try:
+            self.write(batch)
+        except Exception:
+            with self._lock:
+                self.merge(self._batch, batch)
+                self._pending += count
+            self.failures += 1
+            raise
+        self.flushed += count
+        return count
+
+    async def flush(self) -> int:
+        return await asyncio.to_thread(self.flush_sync)
+
+    async def run(self) -> None:
+        """
+        Flush every interval seconds, or sooner once the buffer is full,
+        until cancelled.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception(
+                    "flushing %s failed, retrying with the next batch",
+                    type(self).__name__,
+                )
+
+    async def close(self) -> None:
+        """
+        Write what is still pending, e.g. on shutdown.
+        """
+        self._loop = None
+        await self.flush()
+
+
+class JsonLinesFile(BatchBuffer[List[str]]):
+    """Appends JSON records to a file in batches.
+
+    Args:
+        path (str): The file the records are appended to.
+        interval (float): Seconds between writes.
+        max_pending (int): Write early once this many records are pending.
+    """
+
+    def __init__(self, path: str, interval: float, max_pending: int) -> None:
+        super().__init__(interval, max_pending)
+        self.path = path
+
+    def new_batch(self) -> List[str]:
+        return []
+
+    def merge(self, batch: List[str], failed: List[str]) -> None:
+        batch[:0] = failed
+
+    def write(self, batch: List[str]) -> None:
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # a single append, lines of several workers don't interleave
+            os.write(fd, "".join(batch).encode())
+        finally:
+            os.close(fd)
+
+    def record(self, entry: dict[str, Any]) -> None:
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+        self._record(lambda batch: batch.append(line))
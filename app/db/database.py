@@ -1,13 +1,195 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from functools import lru_cache
+from typing import Any, Callable
+
+from sqlalchemy import create_engine, event, Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.sql.dml import UpdateBase
+
+from ..schemas.config import get_settings
+
+
+def is_sqlite_file(url: str) -> bool:
+    """
+    Whether url is a SQLite database file, which runs with the embedded
+    SQLite profile. In-memory databases can't be shared by several pools.
+    """
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def create_sqlite_engine(url: str, read_only: bool) -> Engine:
+    """
+    Returns an engine of the embedded SQLite profile.
+
+    The database runs in WAL mode, so readers never wait for the writer.
+    The read engine keeps SQLITE_READ_POOL_SIZE query only connections and
+    opens more when all are in use: a request holds the connections of its
+    sessions until it ends, so a capped read pool deadlocks requests that
+    wait for their second connection. The write engine has a single
+    connection: writers of this process queue for it instead of failing
+    with "database is locked", writers of other processes wait for the lock
+    up to SQLITE_BUSY_TIMEOUT.
+    """
+    settings = get_settings()
+    engine = create_engine(
+        url,
+        echo=False,
+        pool_size=settings.SQLITE_READ_POOL_SIZE if read_only else 1,
+        # opening a SQLite connection is cheap, readers never wait for one
+        max_overflow=-1 if read_only else 0,
+        pool_timeout=settings.SQLITE_BUSY_TIMEOUT,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT,
+        },
+    )
+
+    @event.listens_for(engine, "connect")
+    def configure(dbapi_connection, connection_record):
+        # reads run in autocommit, writes begin their transaction below
+        # instead of the driver
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in (
+            "journal_mode=WAL",
+            # durable at checkpoints, a crash may only lose the last commits
+            "synchronous=NORMAL",
+            f"busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT * 1000)}",
+            f"mmap_size={settings.SQLITE_MMAP_SIZE}",
+            # negative sizes are in KiB
+            f"cache_size=-{settings.SQLITE_CACHE_SIZE}",
+            "temp_store=MEMORY",
+        ):
+            cursor.execute(f"PRAGMA {pragma}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    if not read_only:
+
+        @event.listens_for(engine, "begin")
+        def begin(conn):
+            # take the lock up front, a deferred transaction that upgrades
+            # to a write fails at once when another process holds it
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+class RoutingSession(Session):
+    """Session of the embedded SQLite profile.
+
+    Reads go to the read pool, flushes and insert, update and delete
+    statements to the writer. Once a transaction wrote, its reads go to the
+    writer as well so they see its changes.
+
+    Args:
+        reader (Engine): The read only engine.
+        writer (Engine): The single connection write engine.
+    """
+
+    def __init__(self, reader: Engine, writer: Engine, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.reader = reader
+        self.writer = writer
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info["writing"] = True
+        return self.writer if self.info.get("writing") else self.reader
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _end_writing(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("writing", None)
+
+
+@lru_cache
+def get_engine() -> Engine:
+    """
+    Returns the database engine, created on first use. With the embedded
+    SQLite profile it is the engine all writes go through.
+    """
+    settings = get_settings()
+    if is_sqlite_file(settings.DATABASE_URL):
+        return create_sqlite_engine(settings.DATABASE_URL, read_only=False)
+    if settings.DATABASE_URL.startswith("sqlite"):
+        return create_engine(settings.DATABASE_URL, echo=False)
+
+    connect_args = {}
+    if settings.DATABASE_URL.startswith("postgresql+psycopg:"):
+        # psycopg 3 prepares a statement on the server once it was run this
+        # many times on a connection, psycopg2 has no prepared statements
+        connect_args["prepare_threshold"] = settings.DB_PREPARE_THRESHOLD or None
+
+    return create_engine(
+        settings.DATABASE_URL,
+        echo=False,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        connect_args=connect_args,
+    )
+
+
+@lru_cache
+def get_read_engine() -> Engine:
+    """
+    Returns the engine of the read pool with the embedded SQLite profile,
+    the database engine otherwise.
+    """
+    settings = get_settings()
+    if is_sqlite_file(settings.DATABASE_URL):
+        return create_sqlite_engine(settings.DATABASE_URL, read_only=True)
+    return get_engine()
+
+
+def new_session() -> Session:
+    """
+    Returns a new database session, routing reads and writes to their own
+    pools with the embedded SQLite profile.
+    """
+    writer = get_engine()
+    reader = get_read_engine()
+    if reader is writer:
+        return Session(writer)
+    return RoutingSession(reader, writer)
+
+
+def dispose_engine() -> None:
+    """
+    Close the pooled connections of the engines if they were created.
+    """
+    for cached in (get_read_engine, get_engine):
+        if cached.cache_info().currsize:
+            cached().dispose()
+        cached.cache_clear()
 
-from ..schemas.config import settings
 
-DATABASE_URL = settings.DATABASE_URL
+def upsert_insert(session: Session) -> Callable[..., Any]:
+    """
+    Returns the dialect specific ``insert`` of the session's database, which
+    supports ``on_conflict_do_update``.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
 
 
-engine = create_engine(DATABASE_URL, echo=False)
+def __getattr__(name: str):
+    # ``engine`` used to be created at import time
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # SessionLocal = sessionmaker(autoflush=False, bind=engine)
@@ -17,14 +17,15 @@ from .schemas.token import TokenData
 from .core.security import verify_password
 from .core.jwt_token import decode_access_token
 from .models.user import User
+from .repository.user_repository import USER_BY_EMAIL
 
-from .db.database import engine
+from .db.database import new_session
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/users/login")
 
 
 async def get_session_db():
-    with Session(engine) as session:
+    with new_session() as session:
         yield session
 
 
@@ -33,17 +34,7 @@ def get_user(session, email: str):
     Get user from database
     """
 
-    user = (
-        session.query(
-            User.id,
-            User.username,
-            User.email,
-            User.hashed_password,
-            User.is_active,
-        )
-        .filter_by(email=email)
-        .first()
-    )
+    user = session.execute(USER_BY_EMAIL, {"email": email}).first()
     if user is None:
         return False
     user = user._asdict()
@@ -95,3 +86,18 @@ async def get_current_active_user(
         )
 
     return current_user
+
+
+async def get_current_admin_user(
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> User:
+    """
+    Returns the current user if it is an admin
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+
+    return current_user
@@ -1,16 +1,51 @@
+import asyncio
+import logging
 import os
+from datetime import timedelta
+from typing import Any
 from fastapi import FastAPI, Request
 from contextlib import asynccontextmanager
 
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-
-import cloudinary
-from cloudinary.utils import cloudinary_url
+from starlette.datastructures import URLPath
+from starlette.routing import BaseRoute, Match, Mount, NoMatchFound
+from starlette.types import Receive, Scope, Send
 
 from .models.user import Base
-from .routers import user, podcast, sermon
-from .db.database import engine
+from .routers import (
+    user,
+    podcast,
+    sermon,
+    metrics,
+    analytics,
+    feed,
+    book,
+    changes,
+    export,
+    public,
+    admin,
+)
+from .middleware.bulkhead import BulkheadMiddleware
+from .middleware.idempotency import IdempotencyMiddleware, purge_expired_keys
+from .middleware.traffic_capture import TrafficCaptureMiddleware, get_traffic_recorder
+from .middleware.request_id import RequestIdMiddleware
+from .middleware.tracing import TracingMiddleware
+from .core import events
+from .core.log import configure_logging, stop_logging
+from .core.tracing import get_tracer
+from .db.database import get_engine, dispose_engine
+from .cld_media.storage import get_storage
+from .services.media_outbox_service import create_drainer
+from .services.book_service import get_window_cache
+from .services.feed_service import get_feed_cache
+from .services.media_stats_service import get_play_counter
+from .services.podcast_service import get_podcast_cache
+from .services.sermon_service import get_sermon_cache
+from .services.listening_service import create_rollup, get_listening_buffer
+from .services.change_stream import get_broadcaster, get_change_feed
+from .services.cdn_purge import get_purge_queue
+from .utils.static_assets import PrecompressedStaticFiles, STATIC_DIR
 from .utils.handler_exceptions import (
     PodcastNotFoundException,
     UnauthoriziedUserException,
@@ -19,49 +54,96 @@ from .utils.handler_exceptions import (
     UnknownException,
     DatabaseException,
 )
-from .core.constants import MEDIA_DIR
 
-from .schemas.config import settings
+from .schemas.config import Settings, get_settings, set_settings
 
-# Configuration
-cloudinary.config(
-    cloud_name=settings.CLOUD_NAME,
-    api_key=settings.API_KEY,
-    api_secret=settings.API_SECRET,  # Click 'View API Keys' above to copy your API secret
-    secure=True,
-)
+logger = logging.getLogger(__name__)
 
 
 def create_db_tables():
     """
     Create tables if not created
     """
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
-    Create tables if not created
+    Set up the subsystems that need the settings and release them on shutdown.
     """
     # create_db_tables()
-    yield
-
-
-app = FastAPI()
-
+    settings = get_settings()
+    configure_logging(
+        settings.LOG_LEVEL,
+        settings.LOG_LEVELS,
+        debug_sample_rate=settings.LOG_DEBUG_SAMPLE_RATE,
+        queue_size=settings.LOG_QUEUE_SIZE,
+    )
+    drain_task = None
+    if settings.MEDIA_OUTBOX_ENABLED:
+        drainer = create_drainer()
+        drain_task = asyncio.create_task(
+            drainer.run(settings.MEDIA_OUTBOX_INTERVAL)
+        )
 
-os.makedirs(MEDIA_DIR, exist_ok=True)
+    play_counter = get_play_counter()
+    flush_task = asyncio.create_task(play_counter.run())
+    listening_buffer = get_listening_buffer()
+    listening_task = asyncio.create_task(listening_buffer.run())
+    purge_queue = get_purge_queue()
+    cdn_purge_task = asyncio.create_task(purge_queue.run())
+    rollup_task = asyncio.create_task(
+        create_rollup().run(settings.ANALYTICS_ROLLUP_INTERVAL)
+    )
+    broadcaster = get_broadcaster()
+    keepalive_task = asyncio.create_task(broadcaster.run(settings.SSE_KEEPALIVE))
+    change_feed_task = asyncio.create_task(
+        get_change_feed().run(settings.SSE_POLL_INTERVAL)
+    )
+    purge_task = asyncio.create_task(
+        purge_expired_keys(3600, timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS))
+    )
+    buffers = [play_counter, listening_buffer, purge_queue]
+    capture_task = None
+    if settings.TRAFFIC_CAPTURE_ENABLED:
+        traffic_recorder = get_traffic_recorder()
+        capture_task = asyncio.create_task(traffic_recorder.run())
+        buffers.append(traffic_recorder)
+    trace_file_task = None
+    trace_file = get_tracer().file if settings.TRACING_ENABLED else None
+    if trace_file is not None:
+        trace_file_task = asyncio.create_task(trace_file.run())
+        buffers.append(trace_file)
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+    yield
 
+    # end the change streams so the server doesn't wait for them
+    change_feed_task.cancel()
+    keepalive_task.cancel()
+    broadcaster.close()
 
-app.include_router(router=user.router)
-app.include_router(router=podcast.router)
-app.include_router(router=sermon.router)
+    if drain_task is not None:
+        drain_task.cancel()
+    flush_task.cancel()
+    listening_task.cancel()
+    cdn_purge_task.cancel()
+    rollup_task.cancel()
+    purge_task.cancel()
+    if capture_task is not None:
+        capture_task.cancel()
+    if trace_file_task is not None:
+        trace_file_task.cancel()
+    # write what is still buffered before the engine goes away
+    for buffer in buffers:
+        try:
+            await buffer.close()
+        except Exception:
+            logger.exception("flushing %s on shutdown failed", type(buffer).__name__)
+    dispose_engine()
+    stop_logging()
 
 
-@app.exception_handler(PodcastNotFoundException)
 def podcast404_exception_handler(req: Request, ex: PodcastNotFoundException):
     """
     Exception handler for missing podcast resources.
@@ -74,7 +156,6 @@ def podcast404_exception_handler(req: Request, ex: PodcastNotFoundException):
     )
 
 
-@app.exception_handler(UnauthoriziedUserException)
 def unauthorizied_exception_handler(req: Request, ex: UnauthoriziedUserException):
     """
     Exception handler for unauthorizied access to podcast resources.
@@ -84,7 +165,6 @@ def unauthorizied_exception_handler(req: Request, ex: UnauthoriziedUserException
     )
 
 
-@app.exception_handler(PartialUpdateException)
 def partial_update_exception_handler(req: Request, ex: PartialUpdateException):
     """
     Exception handler that is raised when no data is included in the patch operation.
@@ -94,7 +174,6 @@ def partial_update_exception_handler(req: Request, ex: PartialUpdateException):
     )
 
 
-@app.exception_handler(UnknownException)
 def unknown_exception_handler(req: Request, ex: UnknownException):
     """
     Exception handler that is raised when there is an unhandled error.
@@ -104,7 +183,6 @@ def unknown_exception_handler(req: Request, ex: UnknownException):
     )
 
 
-@app.exception_handler(DatabaseException)
 def database_exception_handler(req: Request, ex: DatabaseException):
     """
     Exception handler that is raised when there is a database error.
@@ -114,7 +192,6 @@ def database_exception_handler(req: Request, ex: DatabaseException):
     )
 
 
-@app.exception_handler(CloudinaryException)
 def media_upload_exception_handler(req: Request, ex: CloudinaryException):
     """
     Exception handler that is raise when media upload fails.
@@ -124,6 +201,135 @@ def media_upload_exception_handler(req: Request, ex: CloudinaryException):
     )
 
 
-@app.get("/api/v1/")
 async def root() -> dict[str, str]:
     return {"message": "Welcome to THE BEAUTIFUL CHURCH API", "version NO.": "1.0"}
+
+
+class LocalMediaRoute(BaseRoute):
+    """
+    Serves the files of the local storage backend at MEDIA_URL. The settings
+    are read on the first request, so the route can be added before they
+    are known; with another backend it matches nothing.
+    """
+
+    def __init__(self) -> None:
+        self._mount: Mount | None = None
+        self._resolved = False
+
+    def _resolve(self) -> Mount | None:
+        if not self._resolved:
+            settings = get_settings()
+            if settings.STORAGE_BACKEND == "local":
+                os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+                self._mount = Mount(
+                    settings.MEDIA_URL,
+                    app=StaticFiles(directory=settings.MEDIA_ROOT),
+                    name="media",
+                )
+            self._resolved = True
+        return self._mount
+
+    def matches(self, scope: Scope) -> tuple[Match, Scope]:
+        mount = self._resolve()
+        if mount is None:
+            return Match.NONE, {}
+        return mount.matches(scope)
+
+    def url_path_for(self, name: str, /, **path_params: Any) -> URLPath:
+        mount = self._resolve()
+        if mount is None:
+            raise NoMatchFound(name, path_params)
+        return mount.url_path_for(name, **path_params)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self._mount.handle(scope, receive, send)
+
+
+# process wide singletons built from the settings, created again on first
+# use after create_app is given new settings
+SETTINGS_SINGLETONS = (
+    get_storage,
+    get_tracer,
+    get_traffic_recorder,
+    get_sermon_cache,
+    get_podcast_cache,
+    get_feed_cache,
+    get_window_cache,
+    get_play_counter,
+    get_listening_buffer,
+    get_purge_queue,
+    get_broadcaster,
+    get_change_feed,
+)
+
+
+def reset_singletons() -> None:
+    """
+    Drop the singletons built from the previous settings, the dropped ones
+    stop receiving content changes.
+    """
+    for factory in SETTINGS_SINGLETONS:
+        if factory.cache_info().currsize:
+            on_event = getattr(factory(), "on_event", None)
+            if on_event is not None:
+                for topic in events.CONTENT_TOPICS:
+                    events.unsubscribe(topic, on_event)
+        factory.cache_clear()
+
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """
+    Build the application.
+
+    Nothing here touches the database, the media backend or the environment;
+    those are created on first use so that importing the app stays cheap.
+    """
+    if settings is not None:
+        set_settings(settings)
+        dispose_engine()
+        reset_singletons()
+
+    app = FastAPI(lifespan=lifespan)
+
+    app.mount(
+        "/static", PrecompressedStaticFiles(directory=STATIC_DIR), name="static"
+    )
+    app.router.routes.append(LocalMediaRoute())
+
+    app.include_router(router=user.router)
+    app.include_router(router=podcast.router)
+    app.include_router(router=sermon.router)
+    app.include_router(router=metrics.router)
+    app.include_router(router=analytics.router)
+    app.include_router(router=feed.router)
+    app.include_router(router=book.router)
+    app.include_router(router=changes.router)
+    app.include_router(router=export.router)
+    app.include_router(router=public.router)
+    app.include_router(router=admin.router)
+
+    app.add_middleware(BulkheadMiddleware)
+    # outside the bulkheads, replayed and waiting retries don't take a slot
+    app.add_middleware(IdempotencyMiddleware)
+    # outermost, the recorded duration includes queueing and shedding
+    app.add_middleware(TrafficCaptureMiddleware)
+    # every record logged while handling a request carries its id
+    app.add_middleware(RequestIdMiddleware)
+    # outermost, the root span covers the whole request
+    app.add_middleware(TracingMiddleware)
+
+    app.add_exception_handler(PodcastNotFoundException, podcast404_exception_handler)
+    app.add_exception_handler(
+        UnauthoriziedUserException, unauthorizied_exception_handler
+    )
+    app.add_exception_handler(PartialUpdateException, partial_update_exception_handler)
+    app.add_exception_handler(UnknownException, unknown_exception_handler)
+    app.add_exception_handler(DatabaseException, database_exception_handler)
+    app.add_exception_handler(CloudinaryException, media_upload_exception_handler)
+
+    app.add_api_route("/api/v1/", root, methods=["GET"])
+
+    return app
+
+
+app = create_app()
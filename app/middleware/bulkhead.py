@@ -0,0 +1,194 @@
+"""
+Per route class concurrency limits with bounded queues and load shedding.
+
+Requests are classified as ``uploads``, ``auth`` or ``reads`` and each class
+gets its own bulkhead, so a burst of large uploads can't starve cheap reads.
+A request that can't get a slot within the queue time, or finds the queue
+full, is answered right away with 503 and Retry-After.
+"""
+
+import asyncio
+import math
+from collections import deque
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..core import metrics
+from ..schemas.config import get_settings
+
+AUTH_PATHS = {"/api/v1/users/login", "/api/v1/users/signup"}
+# long lived streams would hold a slot for as long as they are connected,
+# they are limited by the number of subscribers instead
+STREAM_PATHS = {"/api/v1/changes/"}
+WRITE_METHODS = {"POST", "PUT", "PATCH"}
+
+
+class Bulkhead:
+    """
+    Async concurrency limiter with a bounded FIFO wait queue.
+    """
+
+    def __init__(
+        self, name: str, max_concurrent: int, max_queue: int, max_queue_time: float
+    ) -> None:
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_time = max_queue_time
+        self.active = 0
+        self.shed = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """
+        Wait for a slot. Returns False if the request has to be shed.
+        """
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.max_queue_time)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over right at the deadline
+                return True
+            self._remove(waiter)
+            self.shed += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._remove(waiter)
+            raise
+        return True
+
+    def release(self) -> None:
+        """
+        Hand the slot to the next waiter or free it.
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _remove(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+def classify(scope: Scope) -> str:
+    """
+    Return the route class of a request.
+    """
+    if scope["path"] in AUTH_PATHS:
+        return "auth"
+    if scope["method"] in WRITE_METHODS:
+        content_type = Headers(scope=scope).get("content-type", "")
+        if content_type.startswith("multipart/"):
+            return "uploads"
+    return "reads"
+
+
+def create_bulkheads() -> dict[str, Bulkhead]:
+    """
+    Build the bulkheads of every route class from the settings.
+    """
+    settings = get_settings()
+    queue_time = settings.BULKHEAD_MAX_QUEUE_TIME
+    return {
+        "uploads": Bulkhead(
+            "uploads",
+            settings.BULKHEAD_UPLOADS_CONCURRENCY,
+            settings.BULKHEAD_UPLOADS_QUEUE,
+            queue_time,
+        ),
+        "auth": Bulkhead(
+            "auth",
+            settings.BULKHEAD_AUTH_CONCURRENCY,
+            settings.BULKHEAD_AUTH_QUEUE,
+            queue_time,
+        ),
+        "reads": Bulkhead(
+            "reads",
+            settings.BULKHEAD_READS_CONCURRENCY,
+            settings.BULKHEAD_READS_QUEUE,
+            queue_time,
+        ),
+    }
+
+
+class BulkheadMiddleware:
+    """
+    ASGI middleware that runs every request inside its route class bulkhead.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._bulkheads: dict[str, Bulkhead] | None = None
+
+    @property
+    def bulkheads(self) -> dict[str, Bulkhead]:
+        # built on the first request so creating the app doesn't read settings
+        if self._bulkheads is None:
+            self._bulkheads = create_bulkheads()
+            self._register_metrics()
+        return self._bulkheads
+
+    def _register_metrics(self) -> None:
+        bulkheads = self._bulkheads.values()
+        metrics.register(
+            "tbc_bulkhead_queue_depth",
+            "gauge",
+            "Requests waiting for a slot.",
+            lambda: [({"class": b.name}, b.queue_depth) for b in bulkheads],
+        )
+        metrics.register(
+            "tbc_bulkhead_active",
+            "gauge",
+            "Requests currently being served.",
+            lambda: [({"class": b.name}, b.active) for b in bulkheads],
+        )
+        metrics.register(
+            "tbc_bulkhead_shed_total",
+            "counter",
+            "Requests rejected with 503.",
+            lambda: [({"class": b.name}, b.shed) for b in bulkheads],
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in STREAM_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        bulkhead = self.bulkheads[classify(scope)]
+        if not await bulkhead.acquire():
+            response = JSONResponse(
+                status_code=503,
+                content={"message": "error: Server is busy, please retry later"},
+                headers={"Retry-After": str(math.ceil(bulkhead.max_queue_time))},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            bulkhead.release()
@@ -0,0 +1,204 @@
+"""
+Idempotency-Key support for the endpoints that create media.
+
+A create request that carries an Idempotency-Key header leases the key
+before it runs, and its response is stored with the key once it finished.
+A retry with the same key is answered from the stored response without
+running the endpoint, so the media is neither uploaded nor inserted twice;
+a retry that arrives while the first request still runs waits for it.
+Requests that failed with a server error release their key so they can be
+retried.
+"""
+
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.jwt_token import decode_access_token
+from ..db.database import new_session
+from ..models.idempotency import IdempotencyKey
+from ..repository.idempotency_repository import COMPLETED, IdempotencyRepository
+from ..schemas.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_PATHS = {
+    "/api/v1/sermon/",
+    "/api/v1/sermon/stream",
+    "/api/v1/podcasts/",
+    "/api/v1/podcasts/stream",
+    "/api/v1/books/",
+}
+
+# responses larger than this aren't stored, the key is released instead
+MAX_STORED_BODY = 64 * 1024
+
+# seconds between checks whether the request owning a key finished
+POLL_INTERVAL = 0.5
+
+
+def fingerprint(scope: Scope) -> str:
+    """
+    Return the fingerprint of a request, a key may only be reused for the
+    same endpoint.
+
+    The body isn't part of it: it would have to be received in full, which
+    is the upload a retry is meant to skip.
+    """
+    request = f"{scope['method']} {scope['path']}?{scope['query_string'].decode()}"
+    return hashlib.sha256(request.encode()).hexdigest()
+
+
+def _run(fn, *args):
+    with new_session() as sess:
+        return fn(IdempotencyRepository(sess), *args)
+
+
+def _error(
+    status_code: int, detail: str, headers: dict[str, str] | None = None
+) -> Response:
+    return JSONResponse(
+        status_code=status_code,
+        content={"message": f"error: {detail}"},
+        headers=headers,
+    )
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware that deduplicates create requests by Idempotency-Key.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in IDEMPOTENT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        user_email = self._user_email(headers)
+        if not key or user_email is None:
+            # without a valid token the endpoint answers 401 itself
+            await self.app(scope, receive, send)
+            return
+        if len(key) > 255:
+            await _error(400, "Idempotency-Key is too long")(scope, receive, send)
+            return
+
+        settings = get_settings()
+        lease = timedelta(seconds=settings.IDEMPOTENCY_LEASE)
+        request_fingerprint = fingerprint(scope)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.IDEMPOTENCY_WAIT
+
+        while True:
+            record: IdempotencyKey | None = await asyncio.to_thread(
+                _run,
+                IdempotencyRepository.claim,
+                user_email,
+                key,
+                request_fingerprint,
+                lease,
+            )
+            if record is None:
+                await self._run_request(scope, receive, send, user_email, key)
+                return
+            if record.fingerprint != request_fingerprint:
+                response = _error(
+                    422, "Idempotency-Key was already used for a different request"
+                )
+                break
+            if record.status == COMPLETED:
+                response = Response(
+                    content=record.response_body,
+                    status_code=record.response_status,
+                    media_type=record.content_type,
+                    headers={"Idempotent-Replayed": "true"},
+                )
+                break
+            if loop.time() >= deadline:
+                response = _error(
+                    409,
+                    "A request with this Idempotency-Key is still in progress",
+                    {"Retry-After": str(int(settings.IDEMPOTENCY_WAIT))},
+                )
+                break
+            await asyncio.sleep(POLL_INTERVAL)
+
+        await response(scope, receive, send)
+
+    @staticmethod
+    def _user_email(headers: Headers) -> str | None:
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        try:
+            return decode_access_token(token).email
+        except Exception:
+            return None
+
+    async def _run_request(
+        self, scope: Scope, receive: Receive, send: Send, user_email: str, key: str
+    ) -> None:
+        """
+        Run the request that owns the key and store its response.
+        """
+        status_code = 500
+        content_type = None
+        body = bytearray()
+
+        async def capture(message: Message) -> None:
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = Headers(raw=message["headers"]).get("content-type")
+            elif message["type"] == "http.response.body":
+                if len(body) <= MAX_STORED_BODY:
+                    body.extend(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            await asyncio.shield(
+                asyncio.to_thread(_run, IdempotencyRepository.release, user_email, key)
+            )
+            raise
+
+        if status_code >= 500 or len(body) > MAX_STORED_BODY:
+            await asyncio.to_thread(_run, IdempotencyRepository.release, user_email, key)
+        else:
+            await asyncio.to_thread(
+                _run,
+                IdempotencyRepository.complete,
+                user_email,
+                key,
+                status_code,
+                content_type,
+                body.decode("utf-8", "replace"),
+            )
+
+
+async def purge_expired_keys(interval: float, ttl: timedelta) -> None:
+    """
+    Delete the keys older than ttl every interval seconds.
+    """
+    while True:
+        before = datetime.now(timezone.utc) - ttl
+        try:
+            await asyncio.to_thread(_run, IdempotencyRepository.delete_expired, before)
+        except Exception:
+            logger.exception("purging expired idempotency keys failed")
+        await asyncio.sleep(interval)
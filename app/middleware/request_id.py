@@ -0,0 +1,47 @@
+"""
+Request ids for correlating the log records of a request.
+
+The id comes from the X-Request-ID header of the request when it carries a
+usable one, e.g. set by the load balancer, and is generated otherwise. It
+is returned in the X-Request-ID response header and added to every record
+logged while the request is handled, including in worker threads.
+"""
+
+import re
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.log import request_id
+
+HEADER = "x-request-id"
+VALID_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware that sets the request id of every request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = Headers(scope=scope).get(HEADER, "")
+        current = incoming if VALID_ID.fullmatch(incoming) else uuid.uuid4().hex
+        token = request_id.set(current)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[HEADER] = current
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
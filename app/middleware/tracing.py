@@ -0,0 +1,61 @@
+"""
+Opens a trace for every request, see ``app.core.tracing``.
+"""
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.tracing import Tracer, get_tracer
+from ..schemas.config import get_settings
+from .bulkhead import STREAM_PATHS
+
+
+class TracingMiddleware:
+    """ASGI middleware recording each request as the root span of a trace.
+
+    Args:
+        app (ASGIApp): The application.
+        tracer (Tracer | None): Defaults to the process tracer, or to none
+            when TRACING_ENABLED is off.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer | None = None) -> None:
+        self.app = app
+        self._tracer = tracer
+        self._enabled: bool | None = None if tracer is None else True
+
+    @property
+    def tracer(self) -> Tracer | None:
+        # read on the first request so creating the app doesn't read settings
+        if self._enabled is None:
+            self._enabled = get_settings().TRACING_ENABLED
+            if self._enabled:
+                self._tracer = get_tracer()
+        return self._tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        tracer = self.tracer
+        if (
+            tracer is None
+            or scope["type"] != "http"
+            # a stream would be a trace as long as the connection
+            or scope["path"] in STREAM_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        header = Headers(scope=scope).get("traceparent")
+        with tracer.trace(f"{scope['method']} {scope['path']}", header) as root:
+            root.set(method=scope["method"], path=scope["path"])
+
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    root.set(status=message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    root.name = f"{scope['method']} {route}"
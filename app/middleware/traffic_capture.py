@@ -0,0 +1,174 @@
+"""
+Sampled capture of request metadata for replaying production traffic.
+
+A sample of the requests is recorded as one JSON line each: method, path,
+query, route, sizes, status, duration and the class of the caller. Query
+values that could be credentials are redacted, headers and bodies are never
+recorded, only the size and content type of the request body. The lines are
+written in batches off the event loop, ``python -m app.benchmarks.replay``
+re-issues them against a test instance.
+"""
+
+import random
+import time
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core import metrics
+from ..core.jwt_token import decode_access_token
+from ..core.write_behind import JsonLinesFile
+from ..schemas.config import get_settings
+from .bulkhead import STREAM_PATHS
+
+# query parameters whose names contain one of these are redacted
+SECRET_PARAMS = ("token", "password", "secret", "key", "signature", "code")
+REDACTED = "REDACTED"
+
+
+def sanitize_query(query_string: str) -> str:
+    """
+    Return query_string with the values of credential-like parameters
+    replaced by REDACTED.
+    """
+    params = [
+        (name, REDACTED if any(s in name.lower() for s in SECRET_PARAMS) else value)
+        for name, value in parse_qsl(query_string, keep_blank_values=True)
+    ]
+    return urlencode(params)
+
+
+def user_class(headers: Headers) -> str:
+    """
+    Return ``anonymous``, ``authenticated`` or ``invalid`` for the
+    credentials a request carries.
+    """
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if not token:
+        return "anonymous"
+    if scheme.lower() != "bearer":
+        return "invalid"
+    try:
+        decode_access_token(token)
+    except Exception:
+        return "invalid"
+    return "authenticated"
+
+
+class TrafficRecorder(JsonLinesFile):
+    """
+    Appends captured requests to a JSONL file in batches.
+    """
+
+
+@lru_cache
+def get_traffic_recorder() -> TrafficRecorder:
+    """
+    Returns the traffic recorder of this process, created on first use.
+    """
+    settings = get_settings()
+    recorder = TrafficRecorder(
+        settings.TRAFFIC_CAPTURE_PATH,
+        interval=settings.TRAFFIC_CAPTURE_FLUSH_INTERVAL,
+        max_pending=settings.TRAFFIC_CAPTURE_MAX_PENDING,
+    )
+    metrics.register(
+        "tbc_traffic_captured_total",
+        "counter",
+        "Requests recorded for replay.",
+        lambda: [({}, recorder.flushed)],
+    )
+    return recorder
+
+
+class TrafficCaptureMiddleware:
+    """ASGI middleware recording a sample of the requests.
+
+    Args:
+        app (ASGIApp): The application.
+        recorder (TrafficRecorder | None): Defaults to the process recorder.
+        sample_rate (float | None): Share of the requests recorded, defaults
+            to TRAFFIC_CAPTURE_SAMPLE_RATE when capture is enabled.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        recorder: TrafficRecorder | None = None,
+        sample_rate: float | None = None,
+    ) -> None:
+        self.app = app
+        self._recorder = recorder
+        self._sample_rate = sample_rate
+
+    @property
+    def sample_rate(self) -> float:
+        # read on the first request so creating the app doesn't read settings
+        if self._sample_rate is None:
+            settings = get_settings()
+            self._sample_rate = (
+                settings.TRAFFIC_CAPTURE_SAMPLE_RATE
+                if settings.TRAFFIC_CAPTURE_ENABLED
+                else 0.0
+            )
+        return self._sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            # a stream lasts as long as the client stays, replaying it hangs
+            or scope["path"] in STREAM_PATHS
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        ts = time.time()
+        start = time.perf_counter()
+        headers = Headers(scope=scope)
+        # the body may not be read at all, e.g. when the request is rejected
+        content_length = headers.get("content-length")
+        request_bytes = 0
+        status_code = 500
+        response_bytes = 0
+
+        async def counting_receive() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Message) -> None:
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            route = scope.get("route")
+            recorder = self._recorder or get_traffic_recorder()
+            recorder.record(
+                {
+                    "ts": round(ts, 6),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": getattr(route, "path", None),
+                    "query": sanitize_query(scope["query_string"].decode("latin-1")),
+                    "content_type": headers.get("content-type", "").split(";")[0]
+                    or None,
+                    "request_bytes": int(content_length)
+                    if content_length and content_length.isdigit()
+                    else request_bytes,
+                    "response_bytes": response_bytes,
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                    "user_class": user_class(headers),
+                }
+            )
@@ -2,3 +2,9 @@ from .podcast import *
 from .user import *
 from .sermon import *
 from .book import *
+from .media_outbox import *
+from .media_stats import *
+from .listening import *
+from .row_count import *
+from .idempotency import *
+from .content_change import *
@@ -1,5 +1,5 @@
 from typing import Optional
-from sqlalchemy import ForeignKey
+from sqlalchemy import BigInteger, ForeignKey, Index, true
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from sqlalchemy import String, DateTime
@@ -17,12 +17,26 @@ class Book(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(250), nullable=False)
     book_cover: Mapped[Optional[str]] = mapped_column(nullable=True)
+    cld_image_public_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    book_file: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    cld_book_public_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    file_size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
     is_published: Mapped[bool] = mapped_column(default=False)
     uploaded_on: Mapped[Optional[DateTime]] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
-    user_id = mapped_column(ForeignKey("user_account.id"))
+    user_id = mapped_column(ForeignKey("user_account.id"), index=True)
     author: Mapped["User"] = relationship(back_populates="books")
 
     def __repr__(self) -> str:
         return f"Book(id={self.id!r}, name={self.title!r}, is_published={self.is_published}, user_id={self.user_id})"
+
+
+# listings only ever show published books, so only those are indexed
+Index(
+    "ix_books_published_uploaded_on_id",
+    Book.uploaded_on.desc(),
+    Book.id.desc(),
+    postgresql_where=Book.is_published == true(),
+    sqlite_where=Book.is_published == true(),
+)
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from ..db.database import Base
+
+
+class ContentChange(Base):
+    """
+    ORM Mapped class for a published content change.
+
+    Every worker appends the changes it publishes and polls the changes of
+    the others, so live streams see the changes of every worker. Rows are
+    pruned once they are older than SSE_CHANGE_RETENTION.
+    """
+
+    __tablename__ = "content_changes"
+    __table_args__ = (Index("ix_content_changes_inserted_at", "inserted_at"),)
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True
+    )
+    topic: Mapped[str] = mapped_column(String(20))
+    # the event payload as JSON
+    payload: Mapped[str] = mapped_column(Text)
+    # set by the database, the pollers wait for rows to settle by this time
+    inserted_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"ContentChange(id={self.id!r}, topic={self.topic!r})"
@@ -0,0 +1,35 @@
+from typing import Optional
+
+from sqlalchemy import DateTime, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from ..db.database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    ORM Mapped class for an Idempotency-Key sent with a create request.
+
+    The first request with a key leases it while it runs and stores its
+    response, retries with the same key get that response back.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    # the subject of the access token, keys are scoped per user
+    user_email: Mapped[str] = mapped_column(String(255), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64))
+    # "in_progress" or "completed"
+    status: Mapped[str] = mapped_column(String(20))
+    locked_until: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True))
+    response_status: Mapped[Optional[int]]
+    content_type: Mapped[Optional[str]] = mapped_column(String(255))
+    response_body: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[Optional[DateTime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
+
+    def __repr__(self) -> str:
+        return f"IdempotencyKey(user_email={self.user_email!r}, key={self.key!r}, status={self.status!r})"
@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from ..db.database import Base
+
+
+class ListeningEvent(Base):
+    """
+    ORM Mapped class for a raw listening event, rows are only ever appended.
+
+    There is no foreign key to sermons so that ingestion never touches the
+    sermons table.
+    """
+
+    __tablename__ = "listening_events"
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True
+    )
+    sermon_id: Mapped[int] = mapped_column()
+    # where playback started and how long it ran, in seconds
+    position: Mapped[int] = mapped_column()
+    duration: Mapped[int] = mapped_column()
+    client: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    # set by the database, the rollup waits for rows to settle by this time
+    inserted_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"ListeningEvent(id={self.id!r}, sermon_id={self.sermon_id!r}, position={self.position!r}, duration={self.duration!r})"
+
+
+class ListeningHourly(Base):
+    """
+    ORM Mapped class for the listening totals of a sermon per hour.
+    """
+
+    __tablename__ = "listening_hourly"
+
+    sermon_id: Mapped[int] = mapped_column(primary_key=True)
+    hour: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    events: Mapped[int] = mapped_column(default=0)
+    seconds_listened: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class ListeningRetention(Base):
+    """
+    ORM Mapped class for the retention histogram of a sermon: how many
+    listens covered each minute of the audio.
+    """
+
+    __tablename__ = "listening_retention"
+
+    sermon_id: Mapped[int] = mapped_column(primary_key=True)
+    minute: Mapped[int] = mapped_column(primary_key=True)
+    listens: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class RollupWatermark(Base):
+    """
+    ORM Mapped class for the last event id a rollup job has aggregated.
+    """
+
+    __tablename__ = "rollup_watermarks"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    last_id: Mapped[int] = mapped_column(BigInteger, default=0)
@@ -0,0 +1,34 @@
+from typing import Optional
+
+from sqlalchemy import DateTime, Index, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from ..db.database import Base
+
+
+class MediaDeletion(Base):
+    """
+    ORM Mapped class for a pending delete of a stored media file.
+
+    Rows are written in the same transaction that removes or replaces the
+    record owning the file and are drained in the background.
+    """
+
+    __tablename__ = "media_deletion_outbox"
+    __table_args__ = (Index("ix_media_deletion_outbox_due", "next_attempt_at"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    public_id: Mapped[str] = mapped_column(String)
+    resource_type: Mapped[str] = mapped_column(String(20), default="image")
+    attempts: Mapped[int] = mapped_column(default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[Optional[DateTime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    next_attempt_at: Mapped[Optional[DateTime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"MediaDeletion(id={self.id!r}, public_id={self.public_id!r}, attempts={self.attempts!r})"
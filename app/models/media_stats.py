@@ -0,0 +1,23 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db.database import Base
+
+
+class MediaStats(Base):
+    """
+    ORM Mapped class for the play and download counts of a sermon or podcast.
+
+    Counts are kept apart from the media rows so that counting doesn't write
+    to the rows every read goes to.
+    """
+
+    __tablename__ = "media_stats"
+
+    media_kind: Mapped[str] = mapped_column(String(20), primary_key=True)
+    media_id: Mapped[int] = mapped_column(primary_key=True)
+    plays: Mapped[int] = mapped_column(default=0)
+    downloads: Mapped[int] = mapped_column(default=0)
+
+    def __repr__(self) -> str:
+        return f"MediaStats(media_kind={self.media_kind!r}, media_id={self.media_id!r}, plays={self.plays!r}, downloads={self.downloads!r})"
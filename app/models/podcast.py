@@ -4,7 +4,7 @@ from sqlalchemy import ForeignKey
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column, relationship
 from sqlalchemy.sql import func
-from sqlalchemy import String, DateTime
+from sqlalchemy import String, DateTime, Index
 
 from ..db.database import Base
 from .user import User
@@ -23,10 +23,15 @@ class Podcast(Base):
     created_at: Mapped[Optional[DateTime]] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
+    updated_at: Mapped[Optional[DateTime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
     cover_image: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     cld_image_public_id: Mapped[Optional[str]] = mapped_column(String)
+    video_file: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    cld_video_public_id: Mapped[Optional[str]] = mapped_column(String)
 
-    user_id = mapped_column(ForeignKey("user_account.id"))
+    user_id = mapped_column(ForeignKey("user_account.id"), index=True)
 
     # relationship
     creator: Mapped["User"] = relationship(back_populates="podcasts")
@@ -38,6 +43,10 @@ class Podcast(Base):
         return f"(title:{self.podcast_title!r}, running_episodes:{self.running_episodes!r},created_at:{self.created_at!r},user_id:{self.user_id!r})"
 
 
+# listings are ordered newest first, the id breaks ties
+Index("ix_podcasts_created_at_id", Podcast.created_at.desc(), Podcast.id.desc())
+
+
 class PodcastEpisode(Base):
     __tablename__ = "podcast_episodes"
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -45,7 +54,7 @@ class PodcastEpisode(Base):
     episode_number: Mapped[int] = mapped_column()
     video_file: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     cld_video_public_id: Mapped[Optional[str]] = mapped_column(String)
-    podcast_id = mapped_column(ForeignKey("podcasts.id"))
+    podcast_id = mapped_column(ForeignKey("podcasts.id"), index=True)
 
     # relationship
     podcasts: Mapped["Podcast"] = relationship(back_populates="podcast_episodes")
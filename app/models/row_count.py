@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db.database import Base
+
+
+class RowCount(Base):
+    """
+    ORM Mapped class for the number of rows in a table.
+
+    The count is adjusted in the same transaction that inserts or deletes
+    rows, so list endpoints can report their total without a COUNT(*).
+    """
+
+    __tablename__ = "row_counts"
+
+    table_name: Mapped[str] = mapped_column(String(63), primary_key=True)
+    row_count: Mapped[int] = mapped_column(BigInteger, default=0)
+
+    def __repr__(self) -> str:
+        return f"RowCount(table_name={self.table_name!r}, row_count={self.row_count!r})"
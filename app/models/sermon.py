@@ -1,5 +1,8 @@
+from typing import Optional
+
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy import ForeignKey, String, DateTime
+from sqlalchemy.sql import func
 
 from ..db.database import Base
 from .user import User
@@ -19,8 +22,11 @@ class Sermon(Base):
     cld_image_public_id: Mapped[str] = mapped_column(String, default=None)
     audio_file: Mapped[str] = mapped_column(String)
     cld_audio_public_id: Mapped[str] = mapped_column(String, default=None)
+    updated_at: Mapped[Optional[DateTime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
 
-    user_id = mapped_column(ForeignKey("user_account.id"))
+    user_id = mapped_column(ForeignKey("user_account.id"), index=True)
     uploaded_by: Mapped["User"] = relationship(back_populates="sermon")
 
     def __repr__(self) -> str:
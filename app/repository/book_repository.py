@@ -0,0 +1,87 @@
+import logging
+from typing import Annotated, List
+
+from fastapi import Depends
+from sqlalchemy import select, true
+from sqlalchemy.orm import Session
+
+from ..core.tracing import traced_class
+from ..db.database import new_session
+from ..models.book import Book
+from .media_outbox_repository import enqueue_media_deletion
+
+logger = logging.getLogger(__name__)
+
+
+async def get_session_db():
+    with new_session() as session:
+        yield session
+
+
+@traced_class
+class BookRepository:
+    """For CRUD transaction of Book.
+
+    Args:
+        sess (Annotated[Session, Depends): Database Session Provider.
+    """
+
+    def __init__(self, sess: Annotated[Session, Depends(get_session_db)]) -> None:
+        self.sess = sess
+
+    def insert_book(self, book: Book) -> bool:
+        """
+        Add book to the database.
+        """
+        try:
+            self.sess.add(book)
+            self.sess.commit()
+        except Exception:
+            logger.exception("inserting book failed")
+            return False
+        return True
+
+    def query_published(self, limit: int, offset: int) -> List[Book]:
+        """
+        Return published books, newest first.
+
+        The filter matches the partial index on published books.
+        """
+        stmt = (
+            select(Book)
+            .where(Book.is_published == true())
+            .order_by(Book.uploaded_on.desc(), Book.id.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+        return list(self.sess.scalars(stmt))
+
+    def query_by_id(self, id: int) -> Book | None:
+        """
+        Get a Book object by ID.
+        """
+        return self.sess.get(Book, id)
+
+    def update_published(self, id: int, is_published: bool) -> bool:
+        """
+        Publish or unpublish a book.
+        """
+        book = self.sess.get(Book, id)
+        if book is None:
+            return False
+        book.is_published = is_published
+        self.sess.commit()
+        return True
+
+    def delete_book(self, id: int) -> bool:
+        """
+        Delete a book, its cover and file are deleted in the background.
+        """
+        book = self.sess.get(Book, id)
+        if book is None:
+            return False
+        enqueue_media_deletion(self.sess, book.cld_image_public_id, "image")
+        enqueue_media_deletion(self.sess, book.cld_book_public_id, "raw")
+        self.sess.delete(book)
+        self.sess.commit()
+        return True
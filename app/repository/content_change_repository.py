@@ -0,0 +1,81 @@
+import json
+from datetime import datetime, timedelta, timezone
+from itertools import takewhile
+from typing import Any, List
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..core.tracing import traced_class
+from ..models.content_change import ContentChange
+
+
+@traced_class
+class ContentChangeRepository:
+    """For the log of content changes shared by the workers.
+
+    Args:
+        sess (Session): Database Session.
+    """
+
+    def __init__(self, sess: Session) -> None:
+        self.sess = sess
+
+    def append(self, topic: str, payload: dict[str, Any]) -> None:
+        """
+        Append a change to the log.
+        """
+        self.sess.execute(
+            insert(ContentChange).values(
+                topic=topic, payload=json.dumps(payload, default=str)
+            )
+        )
+        self.sess.commit()
+
+    def last_settled_id(self, settle: timedelta) -> int:
+        """
+        Return the id of the newest change inserted at least settle ago, or 0.
+        """
+        return (
+            self.sess.scalar(
+                select(func.max(ContentChange.id)).where(
+                    ContentChange.inserted_at < datetime.now(timezone.utc) - settle
+                )
+            )
+            or 0
+        )
+
+    def query_after(
+        self, last_id: int, settle: timedelta, limit: int
+    ) -> List[ContentChange]:
+        """
+        Return up to limit changes after last_id, oldest first.
+
+        Ids are handed out before the inserts commit, so a change may become
+        visible after changes with higher ids. The result therefore ends at
+        the first change inserted less than settle ago.
+        """
+        rows = self.sess.execute(
+            select(
+                ContentChange,
+                (
+                    ContentChange.inserted_at
+                    < datetime.now(timezone.utc) - settle
+                ).label("settled"),
+            )
+            .where(ContentChange.id > last_id)
+            .order_by(ContentChange.id)
+            .limit(limit)
+        ).all()
+        return [row.ContentChange for row in takewhile(lambda row: row.settled, rows)]
+
+    def prune(self, older_than: timedelta) -> None:
+        """
+        Delete the changes inserted more than older_than ago.
+        """
+        self.sess.execute(
+            delete(ContentChange).where(
+                ContentChange.inserted_at < datetime.now(timezone.utc) - older_than
+            )
+        )
+        self.sess.commit()
@@ -0,0 +1,29 @@
+from typing import Iterator, Sequence
+
+from sqlalchemy import Row, select
+from sqlalchemy.orm import InstrumentedAttribute
+
+from ..db.database import new_session
+
+
+def stream_rows(
+    columns: Sequence[InstrumentedAttribute], batch_size: int
+) -> Iterator[Row]:
+    """
+    Yield the given columns of every row of their table in primary key
+    order, fetching batch_size rows at a time through a server side cursor.
+
+    The session is owned by the generator and stays open until it is
+    exhausted or closed, a request scoped session would be closed before
+    a streamed response is sent.
+    """
+    with new_session() as sess:
+        result = sess.execute(
+            select(*columns)
+            .order_by(columns[0])
+            .execution_options(yield_per=batch_size)
+        )
+        try:
+            yield from result
+        finally:
+            result.close()
@@ -8,6 +8,7 @@ from fastapi import Depends
 from ..repository.sermon_repository import SermonRepository
 from .user_repository import UserRepository
 from .podcast_repository import PodcastRepository
+from .book_repository import BookRepository
 
 
 def get_user_repo(
@@ -30,3 +31,10 @@ def get_sermon_repo(repo: Annotated[SermonRepository, Depends(SermonRepository)]
     """
     Returns an instance of Sermon Repository."""
     return repo
+
+
+def get_book_repo(repo: Annotated[BookRepository, Depends(BookRepository)]):
+    """
+    Returns an instance of the book repository.
+    """
+    return repo
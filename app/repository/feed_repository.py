@@ -0,0 +1,96 @@
+from typing import Annotated, Any, List
+
+from fastapi import Depends
+from sqlalchemy import (
+    DateTime,
+    String,
+    cast,
+    literal,
+    null,
+    select,
+    true,
+    union_all,
+)
+from sqlalchemy.orm import Session
+
+from ..core.tracing import traced_class
+from ..db.database import new_session
+from ..models import Book, Podcast, Sermon
+
+
+async def get_session_db():
+    with new_session() as session:
+        yield session
+
+
+def _no(type_: Any):
+    # typed NULL so every branch of the union has the same column types
+    return cast(null(), type_)
+
+
+@traced_class
+class FeedRepository:
+    """For reading the latest items of every content type at once.
+
+    Args:
+        sess (Annotated[Session, Depends): Database Session Provider.
+    """
+
+    def __init__(self, sess: Annotated[Session, Depends(get_session_db)]) -> None:
+        self.sess = sess
+
+    def query_latest(self, limit: int) -> List[Any]:
+        """
+        Return the latest sermons, podcasts and published books, up to limit
+        of each, with one UNION ALL query.
+        """
+        sermons = (
+            select(
+                literal("sermon").label("kind"),
+                Sermon.id,
+                Sermon.theme.label("title"),
+                Sermon.minister.label("subtitle"),
+                Sermon.cover_image,
+                Sermon.cld_image_public_id,
+                Sermon.audio_file.label("media_url"),
+                # sermons have no timestamp, the id gives the order
+                _no(DateTime(timezone=True)).label("created_at"),
+            )
+            .order_by(Sermon.id.desc())
+            .limit(limit)
+            .subquery()
+        )
+        podcasts = (
+            select(
+                literal("podcast").label("kind"),
+                Podcast.id,
+                Podcast.podcast_title.label("title"),
+                _no(String).label("subtitle"),
+                Podcast.cover_image,
+                Podcast.cld_image_public_id,
+                _no(String).label("media_url"),
+                Podcast.created_at,
+            )
+            .order_by(Podcast.created_at.desc(), Podcast.id.desc())
+            .limit(limit)
+            .subquery()
+        )
+        books = (
+            select(
+                literal("book").label("kind"),
+                Book.id,
+                Book.title,
+                _no(String).label("subtitle"),
+                Book.book_cover.label("cover_image"),
+                Book.cld_image_public_id,
+                _no(String).label("media_url"),
+                Book.uploaded_on.label("created_at"),
+            )
+            .where(Book.is_published == true())
+            .order_by(Book.uploaded_on.desc(), Book.id.desc())
+            .limit(limit)
+            .subquery()
+        )
+
+        stmt = union_all(select(sermons), select(podcasts), select(books))
+        return list(self.sess.execute(stmt))
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from ..core.tracing import traced_class
+from ..db.database import upsert_insert
+from ..models.idempotency import IdempotencyKey
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+@traced_class
+class IdempotencyRepository:
+    """For claiming and settling idempotency keys.
+
+    Args:
+        sess (Session): Database Session.
+    """
+
+    def __init__(self, sess: Session) -> None:
+        self.sess = sess
+
+    def claim(
+        self, user_email: str, key: str, fingerprint: str, lease: timedelta
+    ) -> IdempotencyKey | None:
+        """
+        Lease the key for a request. Returns None when the caller owns the
+        key now, otherwise the record of the request that owns it.
+
+        A lease that ran out, because the worker running the request died,
+        is taken over.
+        """
+        now = datetime.now(timezone.utc)
+        insert = upsert_insert(self.sess)
+        stmt = insert(IdempotencyKey).values(
+            user_email=user_email,
+            key=key,
+            fingerprint=fingerprint,
+            status=IN_PROGRESS,
+            locked_until=now + lease,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_email, IdempotencyKey.key],
+            set_={"locked_until": stmt.excluded.locked_until},
+            where=(IdempotencyKey.status == IN_PROGRESS)
+            & (IdempotencyKey.locked_until < now)
+            & (IdempotencyKey.fingerprint == stmt.excluded.fingerprint),
+        )
+        while True:
+            claimed = self.sess.execute(stmt).rowcount == 1
+            self.sess.commit()
+            if claimed:
+                return None
+            record = self.sess.scalar(
+                select(IdempotencyKey).where(
+                    IdempotencyKey.user_email == user_email, IdempotencyKey.key == key
+                )
+            )
+            # None if the owner released the key in the meantime
+            if record is not None:
+                return record
+
+    def complete(
+        self,
+        user_email: str,
+        key: str,
+        response_status: int,
+        content_type: str | None,
+        body: str,
+    ) -> None:
+        """
+        Store the response of the request that owns the key.
+        """
+        self.sess.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_email == user_email, IdempotencyKey.key == key)
+            .values(
+                status=COMPLETED,
+                locked_until=None,
+                response_status=response_status,
+                content_type=content_type,
+                response_body=body,
+            )
+        )
+        self.sess.commit()
+
+    def release(self, user_email: str, key: str) -> None:
+        """
+        Forget the key, e.g. after the request failed, so it can be retried.
+        """
+        self.sess.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_email == user_email, IdempotencyKey.key == key
+            )
+        )
+        self.sess.commit()
+
+    def delete_expired(self, before: datetime) -> int:
+        """
+        Delete the keys created before the given time.
+        """
+        result = self.sess.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.created_at < before)
+        )
+        self.sess.commit()
+        return result.rowcount
@@ -0,0 +1,199 @@
+import csv
+import io
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from itertools import takewhile
+from typing import Annotated, Any, List
+
+from fastapi import Depends
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from ..core.constants import RETENTION_BUCKET_SECONDS
+from ..core.tracing import traced_class
+from ..db.database import new_session, upsert_insert
+from ..models.listening import (
+    ListeningEvent,
+    ListeningHourly,
+    ListeningRetention,
+    RollupWatermark,
+)
+
+
+LISTENING_ROLLUP = "listening"
+
+EVENT_COLUMNS = ("sermon_id", "position", "duration", "client", "occurred_at")
+
+
+async def get_session_db():
+    with new_session() as session:
+        yield session
+
+
+@traced_class
+class ListeningRepository:
+    """For the listening events and their rollups.
+
+    Args:
+        sess (Annotated[Session, Depends): Database Session Provider.
+    """
+
+    def __init__(self, sess: Annotated[Session, Depends(get_session_db)]) -> None:
+        self.sess = sess
+
+    def insert_events(self, rows: List[dict[str, Any]]) -> None:
+        """
+        Append listening events in bulk, with COPY on PostgreSQL and a
+        single executemany elsewhere.
+        """
+        connection = self.sess.connection()
+        if connection.dialect.driver == "psycopg2":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow([row[column] for column in EVENT_COLUMNS])
+            buffer.seek(0)
+
+            cursor = connection.connection.cursor()
+            cursor.copy_expert(
+                f"COPY {ListeningEvent.__tablename__} ({', '.join(EVENT_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        else:
+            self.sess.execute(insert(ListeningEvent), rows)
+        self.sess.commit()
+
+    def _claim_watermark(self) -> RollupWatermark | None:
+        insert_watermark = upsert_insert(self.sess)
+        self.sess.execute(
+            insert_watermark(RollupWatermark)
+            .values(name=LISTENING_ROLLUP, last_id=0)
+            .on_conflict_do_nothing()
+        )
+        self.sess.commit()
+        # the lock is held until the rollup commits, a rollup running in
+        # another worker makes this one skip its turn
+        return self.sess.scalars(
+            select(RollupWatermark)
+            .where(RollupWatermark.name == LISTENING_ROLLUP)
+            .with_for_update(skip_locked=True)
+        ).first()
+
+    def rollup(self, batch_size: int, settle: timedelta) -> int:
+        """
+        Aggregate the next batch of events into the hourly totals and the
+        retention histograms. Returns the number of events aggregated.
+
+        Ids are handed out before the inserts commit, so an event may become
+        visible after events with higher ids. The batch therefore ends at the
+        first event inserted less than settle ago, and the watermark never
+        passes an insert that may not have committed yet.
+        """
+        watermark = self._claim_watermark()
+        if watermark is None:
+            self.sess.rollback()
+            return 0
+
+        rows = self.sess.execute(
+            select(
+                ListeningEvent.id,
+                ListeningEvent.sermon_id,
+                ListeningEvent.position,
+                ListeningEvent.duration,
+                ListeningEvent.occurred_at,
+                (
+                    ListeningEvent.inserted_at < datetime.now(timezone.utc) - settle
+                ).label("settled"),
+            )
+            .where(ListeningEvent.id > watermark.last_id)
+            .order_by(ListeningEvent.id)
+            .limit(batch_size)
+        ).all()
+        events = list(takewhile(lambda event: event.settled, rows))
+        if not events:
+            self.sess.commit()
+            return 0
+
+        hourly: dict[tuple[int, datetime], list[int]] = defaultdict(lambda: [0, 0])
+        retention: dict[tuple[int, int], int] = defaultdict(int)
+        for event in events:
+            hour = event.occurred_at.replace(minute=0, second=0, microsecond=0)
+            totals = hourly[event.sermon_id, hour]
+            totals[0] += 1
+            totals[1] += event.duration
+
+            first = event.position // RETENTION_BUCKET_SECONDS
+            last = (event.position + event.duration - 1) // RETENTION_BUCKET_SECONDS
+            for minute in range(first, last + 1):
+                retention[event.sermon_id, minute] += 1
+
+        upsert = upsert_insert(self.sess)
+        stmt = upsert(ListeningHourly).values(
+            [
+                {
+                    "sermon_id": sermon_id,
+                    "hour": hour,
+                    "events": count,
+                    "seconds_listened": seconds,
+                }
+                for (sermon_id, hour), (count, seconds) in sorted(hourly.items())
+            ]
+        )
+        self.sess.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ListeningHourly.sermon_id, ListeningHourly.hour],
+                set_={
+                    "events": ListeningHourly.events + stmt.excluded.events,
+                    "seconds_listened": ListeningHourly.seconds_listened
+                    + stmt.excluded.seconds_listened,
+                },
+            )
+        )
+
+        stmt = upsert(ListeningRetention).values(
+            [
+                {"sermon_id": sermon_id, "minute": minute, "listens": listens}
+                for (sermon_id, minute), listens in sorted(retention.items())
+            ]
+        )
+        self.sess.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ListeningRetention.sermon_id, ListeningRetention.minute],
+                set_={"listens": ListeningRetention.listens + stmt.excluded.listens},
+            )
+        )
+
+        watermark.last_id = events[-1].id
+        self.sess.commit()
+        return len(events)
+
+    def query_retention(self, sermon_id: int) -> List[ListeningRetention]:
+        """
+        Return the retention histogram of a sermon, ordered by minute.
+        """
+        return list(
+            self.sess.scalars(
+                select(ListeningRetention)
+                .where(ListeningRetention.sermon_id == sermon_id)
+                .order_by(ListeningRetention.minute)
+            )
+        )
+
+    def query_hourly(
+        self, sermon_id: int, since: datetime, until: datetime
+    ) -> List[ListeningHourly]:
+        """
+        Return the hourly totals of a sermon between since and until.
+        """
+        return list(
+            self.sess.scalars(
+                select(ListeningHourly)
+                .where(
+                    ListeningHourly.sermon_id == sermon_id,
+                    ListeningHourly.hour >= since,
+                    ListeningHourly.hour < until,
+                )
+                .order_by(ListeningHourly.hour)
+            )
+        )
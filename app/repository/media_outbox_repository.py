@@ -0,0 +1,108 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from ..core.tracing import traced_class
+from ..models.media_outbox import MediaDeletion
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_media_deletion(
+    sess: Session, public_id: str | None, resource_type: str
+) -> None:
+    """
+    Record that a stored media file must be deleted.
+
+    Nothing is committed here, the row is written by the caller's transaction
+    together with the change that made the file unused.
+    """
+    if public_id:
+        sess.add(MediaDeletion(public_id=public_id, resource_type=resource_type))
+        logger.debug("queued media deletion", extra={"public_id": public_id})
+
+
+@traced_class
+class MediaOutboxRepository:
+    """For claiming and settling pending media deletions.
+
+    Args:
+        sess (Session): Database Session.
+    """
+
+    def __init__(self, sess: Session) -> None:
+        self.sess = sess
+
+    def claim_due(
+        self, limit: int, max_attempts: int, lease: timedelta
+    ) -> List[MediaDeletion]:
+        """
+        Return up to limit deletions that are due, longest overdue first, and
+        lease them, so other workers skip them while the remote call is in
+        flight.
+        """
+        now = datetime.now(timezone.utc)
+        stmt = (
+            select(MediaDeletion)
+            .where(
+                MediaDeletion.next_attempt_at <= now,
+                MediaDeletion.attempts < max_attempts,
+            )
+            .order_by(MediaDeletion.next_attempt_at, MediaDeletion.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        rows = list(self.sess.scalars(stmt))
+        if rows:
+            self.sess.execute(
+                update(MediaDeletion)
+                .where(MediaDeletion.id.in_([row.id for row in rows]))
+                .values(
+                    attempts=MediaDeletion.attempts + 1,
+                    next_attempt_at=now + lease,
+                )
+                .execution_options(synchronize_session=False)
+            )
+        self.sess.commit()
+        return rows
+
+    def referenced(
+        self, public_ids: List[str], columns: Iterable[InstrumentedAttribute]
+    ) -> set[str]:
+        """
+        Return the public ids that a row references again, e.g. after a file
+        with the same name was uploaded.
+        """
+        referenced: set[str] = set()
+        if public_ids:
+            for column in columns:
+                referenced.update(
+                    self.sess.scalars(select(column).where(column.in_(public_ids)))
+                )
+        return referenced
+
+    def complete(self, ids: List[int]) -> None:
+        """
+        Remove deletions that went through.
+        """
+        if ids:
+            self.sess.execute(delete(MediaDeletion).where(MediaDeletion.id.in_(ids)))
+            self.sess.commit()
+
+    def reschedule(self, ids: List[int], error: str, delay: timedelta) -> None:
+        """
+        Retry failed deletions after delay.
+        """
+        if ids:
+            self.sess.execute(
+                update(MediaDeletion)
+                .where(MediaDeletion.id.in_(ids))
+                .values(
+                    last_error=error[:1000],
+                    next_attempt_at=datetime.now(timezone.utc) + delay,
+                )
+            )
+            self.sess.commit()
@@ -0,0 +1,77 @@
+from typing import Annotated, Iterable
+
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..core.tracing import traced_class
+from ..db.database import new_session, upsert_insert
+from ..models import MediaStats, Podcast, Sermon
+
+
+MEDIA_MODELS = {"sermon": Sermon, "podcast": Podcast}
+
+
+async def get_session_db():
+    with new_session() as session:
+        yield session
+
+
+@traced_class
+class MediaStatsRepository:
+    """For reading and adding to the play and download counts.
+
+    Args:
+        sess (Annotated[Session, Depends): Database Session Provider.
+    """
+
+    def __init__(self, sess: Annotated[Session, Depends(get_session_db)]) -> None:
+        self.sess = sess
+
+    def add_counts(self, counts: dict[tuple[str, int], list[int]]) -> None:
+        """
+        Add [plays, downloads] increments keyed by (media kind, media id)
+        with one upsert. Increments of deleted media are dropped.
+        """
+        existing: set[tuple[str, int]] = set()
+        for kind, model in MEDIA_MODELS.items():
+            ids = [media_id for media_kind, media_id in counts if media_kind == kind]
+            if ids:
+                rows = self.sess.scalars(select(model.id).where(model.id.in_(ids)))
+                existing.update((kind, media_id) for media_id in rows)
+
+        # a fixed row order keeps concurrent flushes from deadlocking
+        values = [
+            {
+                "media_kind": kind,
+                "media_id": media_id,
+                "plays": counts[kind, media_id][0],
+                "downloads": counts[kind, media_id][1],
+            }
+            for kind, media_id in sorted(existing)
+        ]
+        if not values:
+            return
+
+        insert = upsert_insert(self.sess)
+        stmt = insert(MediaStats).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MediaStats.media_kind, MediaStats.media_id],
+            set_={
+                "plays": MediaStats.plays + stmt.excluded.plays,
+                "downloads": MediaStats.downloads + stmt.excluded.downloads,
+            },
+        )
+        self.sess.execute(stmt)
+        self.sess.commit()
+
+    def query_counts(self, kind: str, ids: Iterable[int]) -> dict[int, list[int]]:
+        """
+        Return [plays, downloads] of the given media, keyed by id.
+        """
+        rows = self.sess.execute(
+            select(MediaStats.media_id, MediaStats.plays, MediaStats.downloads).where(
+                MediaStats.media_kind == kind, MediaStats.media_id.in_(list(ids))
+            )
+        )
+        return {media_id: [plays, downloads] for media_id, plays, downloads in rows}
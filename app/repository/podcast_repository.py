@@ -1,19 +1,37 @@
+import logging
 from typing import Annotated, List
+from sqlalchemy import Integer, bindparam, select
 from sqlalchemy.orm import Session
 
 from fastapi import Depends
 
 
-from ..db.database import engine
+from ..core.tracing import traced_class
+from ..db.database import new_session
 from ..models import Podcast
 from ..models.user import User
+from .media_outbox_repository import enqueue_media_deletion
+from .row_count_repository import adjust_row_count, count_rows
+
+logger = logging.getLogger(__name__)
+
+
+# built once, only the parameters change between calls
+PODCAST_BY_ID = select(Podcast).where(Podcast.id == bindparam("id"))
+LATEST_PODCASTS = (
+    select(Podcast)
+    .order_by(Podcast.created_at.desc(), Podcast.id.desc())
+    .limit(bindparam("limit", type_=Integer))
+    .offset(bindparam("offset", type_=Integer))
+)
 
 
 async def get_session_db():
-    with Session(engine) as session:
+    with new_session() as session:
         yield session
 
 
+@traced_class
 class PodcastRepository:
     """For CRUD transaction of Podcast.
 
@@ -30,33 +48,54 @@ class PodcastRepository:
         """
         try:
             self.sess.add(podcast)
+            adjust_row_count(self.sess, Podcast.__table__, 1)
             self.sess.commit()
-        except Exception as e:
-            print(e)  # TODO: add log
+        except Exception:
+            logger.exception("inserting podcast failed")
             return False
         return True
 
     def query_podcast(self, limit: int, offset: int) -> List[Podcast]:
         """
-        Returns a list of Podcast objects.
+        Returns a list of Podcast objects, newest first.
+        """
+        params = {"limit": limit, "offset": offset}
+        return list(self.sess.scalars(LATEST_PODCASTS, params))
+
+    def count_podcasts(
+        self, exact: bool = False, estimate_threshold: int = 0
+    ) -> tuple[int, bool]:
+        """
+        Return the number of podcasts and whether it is an estimate.
         """
-        query = self.sess.query(Podcast).limit(limit).offset(offset).all()
-        return query
+        return count_rows(self.sess, Podcast.__table__, exact, estimate_threshold)
 
     def query_by_id(self, id: int) -> Podcast | None:
         """
         Get a Podcast object by ID.
         """
-        query = self.sess.query(Podcast).filter_by(id=id).scalar()
-        return query
+        return self.sess.scalar(PODCAST_BY_ID, {"id": id})
+
+    def detach(self, obj: Podcast) -> None:
+        """
+        Detach obj from the session so it stays usable after the session
+        commits or closes, e.g. in a cache.
+        """
+        self.sess.expunge(obj)
 
     def update_podcast(self, id: int, data: Podcast) -> bool:
         """
         Update a Podcast object.
         """
-        query = self.sess.query(Podcast).filter_by(id=id).scalar()
+        query = self.sess.scalar(PODCAST_BY_ID, {"id": id})
         if query is not None:
-            query.title = data.title
+            # files that are replaced are deleted in the background
+            if query.cld_image_public_id != data.cld_image_public_id:
+                enqueue_media_deletion(self.sess, query.cld_image_public_id, "image")
+            if query.cld_video_public_id != data.cld_video_public_id:
+                enqueue_media_deletion(self.sess, query.cld_video_public_id, "video")
+
+            query.podcast_title = data.podcast_title
             query.running_episodes = data.running_episodes
             query.user_id = data.user_id
             query.cover_image = data.cover_image
@@ -70,8 +109,15 @@ class PodcastRepository:
         return False
 
     def delete_podcast(self, id: int) -> bool:
-        query = self.sess.query(Podcast).filter_by(id=id).scalar()
+        """
+        Delete a Podcast object, its cover image and video are deleted in
+        the background.
+        """
+        query = self.sess.scalar(PODCAST_BY_ID, {"id": id})
         if query is not None:
+            enqueue_media_deletion(self.sess, query.cld_image_public_id, "image")
+            enqueue_media_deletion(self.sess, query.cld_video_public_id, "video")
+            adjust_row_count(self.sess, Podcast.__table__, -1)
             self.sess.delete(query)
             self.sess.commit()
             return True
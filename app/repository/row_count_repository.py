@@ -0,0 +1,61 @@
+from sqlalchemy import Table, func, select, text
+from sqlalchemy.orm import Session
+
+from ..db.database import upsert_insert
+from ..models.row_count import RowCount
+
+
+def adjust_row_count(sess: Session, table: Table, delta: int) -> None:
+    """
+    Add delta to the row count of table.
+
+    Nothing is committed here, the count is written by the caller's
+    transaction together with the rows it inserts or deletes.
+    """
+    insert = upsert_insert(sess)
+    stmt = insert(RowCount).values(table_name=table.name, row_count=delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RowCount.table_name],
+        set_={"row_count": RowCount.row_count + stmt.excluded.row_count},
+    )
+    sess.execute(stmt)
+
+
+def planner_estimate(sess: Session, table: Table) -> int | None:
+    """
+    Return the row count PostgreSQL's planner assumes for table, or None
+    when there is no estimate.
+    """
+    if sess.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = sess.scalar(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": table.name},
+    )
+    # -1 until the table was first vacuumed or analyzed
+    if estimate is None or estimate < 0:
+        return None
+    return estimate
+
+
+def count_rows(
+    sess: Session, table: Table, exact: bool = False, estimate_threshold: int = 0
+) -> tuple[int, bool]:
+    """
+    Return the number of rows in table and whether it is an estimate.
+
+    The maintained row count is used when there is one. Otherwise the
+    planner estimate is used for tables of at least estimate_threshold
+    rows, and smaller tables are counted. With exact the table is always
+    counted.
+    """
+    if not exact:
+        count = sess.scalar(
+            select(RowCount.row_count).where(RowCount.table_name == table.name)
+        )
+        if count is not None:
+            return count, False
+        estimate = planner_estimate(sess, table)
+        if estimate is not None and estimate >= estimate_threshold:
+            return estimate, True
+    return sess.scalar(select(func.count()).select_from(table)), False
@@ -1,19 +1,37 @@
+import logging
 from typing import Annotated, List
+from sqlalchemy import Integer, bindparam, select
 from sqlalchemy.orm import Session
 
 from fastapi import Depends
 
 
-from ..db.database import engine
+from ..core.tracing import traced_class
+from ..db.database import new_session
 from ..models.sermon import Sermon
 from ..schemas.sermon import UpdateSermon
+from .media_outbox_repository import enqueue_media_deletion
+from .row_count_repository import adjust_row_count, count_rows
+
+logger = logging.getLogger(__name__)
+
+
+# statements are built once, so SQLAlchemy only has to bind parameters and
+# finds their compiled form in its cache on every call
+SERMON_BY_ID = select(Sermon).where(Sermon.id == bindparam("id"))
+ALL_SERMONS = select(Sermon).order_by(Sermon.id.desc())
+SERMONS_FROM = ALL_SERMONS.offset(bindparam("offset", type_=Integer))
+LATEST_SERMONS = ALL_SERMONS.limit(bindparam("limit", type_=Integer)).offset(
+    bindparam("offset", type_=Integer)
+)
 
 
 async def get_session_db():
-    with Session(engine) as session:
+    with new_session() as session:
         yield session
 
 
+@traced_class
 class SermonRepository:
     def __init__(self, sess: Annotated[Session, Depends(get_session_db)]) -> None:
         self.sess = sess
@@ -24,39 +42,59 @@ class SermonRepository:
         """
         try:
             self.sess.add(sermon)
+            adjust_row_count(self.sess, Sermon.__table__, 1)
             self.sess.commit()
-        except Exception as e:
-            print(e)  # TODO: add log
+        except Exception:
+            logger.exception("inserting sermon failed")
             return False
         return True
 
+    def detach(self, obj: Sermon) -> None:
+        """
+        Detach obj from the session so it stays usable after the session
+        commits or closes, e.g. in a cache.
+        """
+        self.sess.expunge(obj)
+
     def query_sermon(self, id: int) -> Sermon | None:
         """
         Return a sermon with the given id.
         """
 
-        query = self.sess.query(Sermon).filter_by(id=id).first()
-
-        return query
+        return self.sess.scalar(SERMON_BY_ID, {"id": id})
 
     def query_sermons(self, limit=None, offset=None) -> List[Sermon]:
         """
-        Return a list of sermon objects.
+        Return a list of sermon objects, newest first.
         """
 
-        query = self.sess.query(Sermon).limit(limit).offset(offset).all()
-        return query
+        if limit is None:
+            return list(self.sess.scalars(SERMONS_FROM, {"offset": offset or 0}))
+        params = {"limit": limit, "offset": offset or 0}
+        return list(self.sess.scalars(LATEST_SERMONS, params))
+
+    def count_sermons(
+        self, exact: bool = False, estimate_threshold: int = 0
+    ) -> tuple[int, bool]:
+        """
+        Return the number of sermons and whether it is an estimate.
+        """
+        return count_rows(self.sess, Sermon.__table__, exact, estimate_threshold)
 
     def delete_sermon(self, id: int) -> bool | None:
         """
-        Delete sermon with the given Id
+        Delete sermon with the given Id, its media files are deleted in the
+        background.
         """
 
-        query = self.sess.query(Sermon).filter_by(id=id).scalar()
+        query = self.sess.scalar(SERMON_BY_ID, {"id": id})
         if query is None:
             return None
 
         if query:
+            enqueue_media_deletion(self.sess, query.cld_image_public_id, "image")
+            enqueue_media_deletion(self.sess, query.cld_audio_public_id, "video")
+            adjust_row_count(self.sess, Sermon.__table__, -1)
             self.sess.delete(query)
             self.sess.commit()
             return True
@@ -67,11 +105,17 @@ class SermonRepository:
         """
         Update a given sermon in the db.
         """
-        query = self.sess.query(Sermon).filter_by(id=id).scalar()
+        query = self.sess.scalar(SERMON_BY_ID, {"id": id})
         if query is None:
             return None
 
         if query:
+            # files that are replaced are deleted in the background
+            if query.cld_image_public_id != sermon.cld_image_public_id:
+                enqueue_media_deletion(self.sess, query.cld_image_public_id, "image")
+            if query.cld_audio_public_id != sermon.cld_audio_public_id:
+                enqueue_media_deletion(self.sess, query.cld_audio_public_id, "video")
+
             query.theme = sermon.theme
             query.minister = sermon.minister
             query.short_note = sermon.short_note
@@ -1,18 +1,38 @@
+import logging
 from typing import List, Annotated
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 
 from fastapi import Depends
 
+from ..core.tracing import traced_class
 from ..models.user import User
-from ..db.database import engine
+from ..db.database import new_session
+
+logger = logging.getLogger(__name__)
+
+
+# looked up on every authenticated request, so the statement is built once
+USER_BY_EMAIL = (
+    select(
+        User.id,
+        User.username,
+        User.email,
+        User.hashed_password,
+        User.is_active,
+        User.is_admin,
+    )
+    .where(User.email == bindparam("email"))
+    .limit(1)
+)
 
 
 async def get_session_db():
-    with Session(engine) as session:
+    with new_session() as session:
         yield session
 
 
+@traced_class
 class UserRepository:
 
     def __init__(self, sess: Annotated[Session, Depends(get_session_db)]):
@@ -25,9 +45,8 @@ class UserRepository:
         try:
             self.sess.add(user)
             self.sess.commit()
-        except Exception as e:
-            # TODO: add a logger to log exeception
-            print(e)
+        except Exception:
+            logger.exception("inserting user failed")
             return False
         return True
 
@@ -40,16 +59,4 @@ class UserRepository:
         """
         Get a user by using the provided email. Returns none if no user is found
         """
-        query = (
-            self.sess.query(
-                User.id,
-                User.username,
-                User.email,
-                User.hashed_password,
-                User.is_active,
-            )
-            .filter_by(email=email)
-            .first()
-        )
-
-        return query
+        return self.sess.execute(USER_BY_EMAIL, {"email": email}).first()
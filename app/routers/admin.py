@@ -0,0 +1,48 @@
+"""
+Routers for operating the application, admins only.
+"""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from ..core.tracing import TracedRoute, get_tracer
+from ..dependencies import get_current_admin_user
+from ..models.user import User
+
+router = APIRouter(prefix="/api/v1/admin", tags=["admin"], route_class=TracedRoute)
+
+
+@router.get("/traces/")
+def list_traces(
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    min_duration_ms: Annotated[float, Query(ge=0)] = 0,
+) -> list[dict]:
+    """
+    The most recent kept traces of this worker, newest first, without their
+    spans.
+    """
+    traces = get_tracer().ring.recent()
+    return [
+        {key: value for key, value in trace.items() if key != "spans"}
+        for trace in traces
+        if trace["duration_ms"] >= min_duration_ms
+    ][:limit]
+
+
+@router.get("/traces/{trace_id}")
+def get_trace(
+    trace_id: str,
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+) -> dict:
+    """
+    A kept trace with its spans.
+    """
+    trace = get_tracer().ring.get(trace_id)
+    if trace is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trace not found, it was evicted or kept by another worker",
+        )
+    return trace
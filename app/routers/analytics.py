@@ -0,0 +1,62 @@
+"""
+Routers for listening analytics.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, List, Optional
+
+from fastapi import APIRouter, Body, Depends, status
+
+from ..core.tracing import TracedRoute
+from ..dependencies import get_current_user
+from ..models.user import User
+from ..schemas.listening import HourlyListening, ListeningEventIn, RetentionBucket
+from ..services.factory import get_listening_service
+from ..services.listening_service import ListeningService
+
+router = APIRouter(
+    prefix="/api/v1/analytics", tags=["analytics"], route_class=TracedRoute
+)
+
+
+@router.post("/listening/", status_code=status.HTTP_202_ACCEPTED)
+async def ingest_listening_events(
+    handler: Annotated[ListeningService, Depends(get_listening_service)],
+    events: List[ListeningEventIn] = Body(..., max_length=500),
+) -> dict[str, int]:
+    """
+    Record listening events sent by players, up to 500 per request.
+
+    Events are buffered and inserted in bulk, they show up in the rollups
+    after the next rollup run.
+    """
+    accepted = handler.record_events(events)
+    return {"accepted": accepted}
+
+
+@router.get("/sermons/{id}/retention/", response_model=List[RetentionBucket])
+async def get_sermon_retention(
+    id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    handler: Annotated[ListeningService, Depends(get_listening_service)],
+):
+    """
+    Return how many listens covered each minute of a sermon.
+    """
+    return handler.get_retention(id)
+
+
+@router.get("/sermons/{id}/hourly/", response_model=List[HourlyListening])
+async def get_sermon_hourly(
+    id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    handler: Annotated[ListeningService, Depends(get_listening_service)],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """
+    Return the hourly listening totals of a sermon, the last 7 days by default.
+    """
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(days=7)
+    return handler.get_hourly(id, since, until)
@@ -0,0 +1,234 @@
+"""
+Routers for Book.
+"""
+
+from datetime import datetime
+from typing import Annotated, List, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    UploadFile,
+    status,
+)
+from fastapi.responses import Response, StreamingResponse
+
+from ..cld_media.storage import StorageBackend, get_storage
+from ..core.constants import DOCUMENT_FILE_TYPES, SupportedMediaTypePath
+from ..core.tracing import TracedRoute
+from ..dependencies import get_current_user
+from ..models.book import Book
+from ..models.user import User
+from ..schemas.book import CreateBook, ResponseBook
+from ..schemas.media import CoverImage
+from ..services.book_service import BookService
+from ..services.factory import get_book_service
+from ..utils.handler_exceptions import UnauthoriziedUserException
+from ..utils.http_range import parse_range
+from ..utils.media_files_handler import validate_file
+
+router = APIRouter(prefix="/api/v1/books", tags=["books"], route_class=TracedRoute)
+
+
+def book_response(book: Book, storage: StorageBackend) -> ResponseBook:
+    """
+    Serialize a book together with the renditions of its cover image.
+    """
+    data = ResponseBook.model_validate(book, from_attributes=True)
+    data.cover = CoverImage.from_storage(
+        storage, book.cld_image_public_id, book.book_cover  # type: ignore
+    )
+    if book.cld_book_public_id:
+        data.file_url = router.url_path_for("get_book_file", id=str(book.id))
+    return data
+
+
+def get_owned_book(id: int, handler: BookService, user: User) -> Book:
+    """
+    Return the book with the given id if it belongs to user.
+    """
+    book = handler.get_book(id)
+    if book is None:
+        raise HTTPException(
+            detail="Resource not found", status_code=status.HTTP_404_NOT_FOUND
+        )
+    if book.user_id != user.id:
+        raise UnauthoriziedUserException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Permission Denied"
+        )
+    return book
+
+
+@router.get("/", response_model=List[ResponseBook])
+def get_books(
+    handler: Annotated[BookService, Depends(get_book_service)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+    limit: Optional[int] = 5,
+    offset: Optional[int] = 0,
+):
+    """
+    Get published books, newest first.
+    """
+    books = handler.get_published_books(limit=limit, offset=offset)
+    return [book_response(book, storage) for book in books]
+
+
+@router.post("/", status_code=status.HTTP_200_OK)
+async def create_book(
+    handler: Annotated[BookService, Depends(get_book_service)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+    title: str = Form(..., description="Title of the book", max_length=250),
+    is_published: bool = Form(default=False),
+    cover: UploadFile = File(..., description="Cover image"),
+    book_file: UploadFile = File(..., description="PDF or EPUB file"),
+):
+    """
+    Create new book.
+    """
+    is_valid_image = validate_file(
+        file=cover, media_type=SupportedMediaTypePath.IMAGE.name
+    )
+    is_valid_document = validate_file(
+        file=book_file, media_type=SupportedMediaTypePath.DOCUMENT.name
+    )
+    if not is_valid_image or not is_valid_document:
+        raise HTTPException(
+            detail="Please provide the valid image or book file.",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    today = datetime.today()
+    img_res = await storage.put(
+        cover.file,
+        filename=cover.filename,  # type: ignore
+        folder_name=f"book/images/{today.year}",
+        public_id=storage.create_public_id(cover.filename),  # type: ignore
+        media_type=SupportedMediaTypePath.IMAGE.name,
+    )
+    file_res = await storage.put(
+        book_file.file,
+        filename=book_file.filename,  # type: ignore
+        folder_name=f"book/files/{today.year}",
+        public_id=storage.create_public_id(book_file.filename),  # type: ignore
+        media_type=SupportedMediaTypePath.DOCUMENT.name,
+    )
+
+    new_book = CreateBook(
+        title=title,
+        book_cover=img_res.url,
+        cld_image_public_id=img_res.public_id,
+        book_file=file_res.url,
+        cld_book_public_id=file_res.public_id,
+        file_size=file_res.size if file_res.size is not None else book_file.size,
+        is_published=is_published,
+        user_id=current_user.id,
+    )
+    if not handler.insert_book(new_book):
+        raise HTTPException(
+            detail="Failed to create book", status_code=status.HTTP_400_BAD_REQUEST
+        )
+    return {"status": "successful", "message": "Book created successfully"}
+
+
+@router.get("/{id}/", response_model=ResponseBook)
+def get_book(
+    id: int,
+    handler: Annotated[BookService, Depends(get_book_service)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+):
+    """
+    Get a published book.
+    """
+    book = handler.get_book(id)
+    if book is None or not book.is_published:
+        raise HTTPException(
+            detail="Resource not found", status_code=status.HTTP_404_NOT_FOUND
+        )
+    return book_response(book, storage)
+
+
+@router.api_route("/{id}/file", methods=["GET", "HEAD"])
+def get_book_file(
+    id: int,
+    request: Request,
+    handler: Annotated[BookService, Depends(get_book_service)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+):
+    """
+    Download a published book file. Range requests are answered with only
+    the requested bytes, so readers can fetch a book page by page.
+    """
+    book = handler.get_book(id)
+    if (
+        book is None
+        or not book.is_published
+        or not book.cld_book_public_id
+        or book.file_size is None
+    ):
+        raise HTTPException(
+            detail="Resource not found", status_code=status.HTTP_404_NOT_FOUND
+        )
+
+    size = book.file_size
+    file_ext = (book.book_file or "").split(".")[-1].lower()
+    headers = {"Accept-Ranges": "bytes"}
+    media_type = DOCUMENT_FILE_TYPES.get(file_ext, "application/octet-stream")
+
+    if request.method == "HEAD":
+        headers["Content-Length"] = str(size)
+        return Response(media_type=media_type, headers=headers)
+
+    byte_range = parse_range(request.headers.get("range"), size)
+    if byte_range is None:
+        # full downloads are streamed straight through, they would only
+        # push the hot windows out of the cache
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            storage.stream(book.cld_book_public_id, "raw"),
+            media_type=media_type,
+            headers=headers,
+        )
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        handler.read_file(book, storage, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+@router.patch("/{id}/publish/", status_code=status.HTTP_200_OK)
+def publish_book(
+    id: int,
+    handler: Annotated[BookService, Depends(get_book_service)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    is_published: bool = True,
+) -> dict[str, str]:
+    """
+    Publish or unpublish a book.
+    """
+    get_owned_book(id, handler, current_user)
+    handler.set_published(id, is_published)
+    return {"message": "ok"}
+
+
+@router.delete("/{id}/", status_code=status.HTTP_204_NO_CONTENT)
+def delete_book(
+    id: int,
+    handler: Annotated[BookService, Depends(get_book_service)],
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    """
+    Delete a book. The cover and file are removed from storage in the
+    background.
+    """
+    get_owned_book(id, handler, current_user)
+    handler.delete_book(id)
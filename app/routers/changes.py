@@ -0,0 +1,48 @@
+"""
+Router for the live stream of content changes.
+"""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from ..core.tracing import TracedRoute
+from ..dependencies import get_current_user
+from ..models.user import User
+from ..services.change_stream import (
+    ChangeBroadcaster,
+    TooManySubscribers,
+    get_broadcaster,
+)
+
+router = APIRouter(prefix="/api/v1/changes", tags=["changes"], route_class=TracedRoute)
+
+
+@router.get("/", response_class=StreamingResponse)
+async def stream_changes(
+    current_user: Annotated[User, Depends(get_current_user)],
+    broadcaster: Annotated[ChangeBroadcaster, Depends(get_broadcaster)],
+    last_event_id: Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    """
+    Stream created, updated and deleted events of sermons, podcasts and
+    books as Server-Sent Events.
+
+    Reconnecting clients send the id of the last event they received in
+    Last-Event-ID and get the events they missed. An event named ``reset``
+    means the missed events are gone and lists should be reloaded.
+    """
+    try:
+        subscription = broadcaster.subscribe(last_event_id)
+    except TooManySubscribers:
+        raise HTTPException(
+            detail="Too many open change streams, please retry later",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "30"},
+        )
+    return StreamingResponse(
+        broadcaster.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,45 @@
+"""
+Routers for streaming exports.
+"""
+
+from datetime import datetime, timezone
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from ..core.tracing import TracedRoute
+from ..dependencies import get_current_admin_user
+from ..models.user import User
+from ..services.export_service import (
+    MEDIA_TYPES,
+    ExportFormat,
+    ExportKind,
+    ExportService,
+)
+from ..services.factory import get_export_service
+
+router = APIRouter(prefix="/api/v1/export", tags=["export"], route_class=TracedRoute)
+
+
+@router.get("/{kind}", response_class=StreamingResponse)
+def export(
+    kind: ExportKind,
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+    handler: Annotated[ExportService, Depends(get_export_service)],
+    format: ExportFormat = "ndjson",
+) -> StreamingResponse:
+    """
+    Download every user, sermon or podcast as NDJSON or CSV, admins only.
+
+    Rows are sent while they are read, a failure half way through ends the
+    download early instead of returning an error status.
+    """
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    return StreamingResponse(
+        handler.export(kind, format),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{kind}-{stamp}.{format}"'
+        },
+    )
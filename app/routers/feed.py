@@ -0,0 +1,28 @@
+"""
+Router for the home feed.
+"""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, Response
+
+from ..core.tracing import TracedRoute
+from ..dependencies import get_current_user
+from ..models.user import User
+from ..schemas.feed import Feed
+from ..services.factory import get_feed_service
+from ..services.feed_service import FeedService
+
+router = APIRouter(prefix="/api/v1/feed", tags=["feed"], route_class=TracedRoute)
+
+
+@router.get("/", responses={200: {"model": Feed}})
+def get_feed(
+    current_user: Annotated[User, Depends(get_current_user)],
+    handler: Annotated[FeedService, Depends(get_feed_service)],
+    limit: int = Query(default=5, ge=1, le=20),
+) -> Response:
+    """
+    Return the latest sermons, podcasts and books for the home screen.
+    """
+    return Response(content=handler.get_feed(limit), media_type="application/json")
@@ -0,0 +1,19 @@
+"""
+Router exposing the in-process metrics.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..core import metrics
+from ..core.tracing import TracedRoute
+
+router = APIRouter(prefix="/api/v1/metrics", tags=["metrics"], route_class=TracedRoute)
+
+
+@router.get("/", response_class=PlainTextResponse)
+async def get_metrics() -> str:
+    """
+    Return the metrics in the Prometheus text format.
+    """
+    return metrics.render()
@@ -3,8 +3,18 @@ Routers for Podcast.
 """
 
 from datetime import datetime
-from typing import Annotated, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Form, UploadFile, File
+from typing import Annotated
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    Form,
+    UploadFile,
+    File,
+    Request,
+    Query,
+)
 
 
 from ..dependencies import get_current_user
@@ -12,49 +22,121 @@ from ..utils.validators import validate_partial_data
 from ..schemas.podcast import (
     CreatePodcast,
     PartialUpdatePodcast,
+    PodcastListItem,
     UpdatePodcast,
 )
+from ..schemas.media import CoverImage
+from ..schemas.pagination import Page
+from ..models import Podcast
 from ..models.user import User
 from ..services.podcast_service import PodcastService
-from ..services.factory import get_podcast_service
+from ..services.media_stats_service import MediaEvent, MediaStatsService
+from ..services.factory import get_media_stats_service, get_podcast_service
 from ..utils.handler_exceptions import (
     PodcastNotFoundException,
     UnauthoriziedUserException,
 )
-from ..cld_media.media_api import cloudinaryHandler
-from ..utils.media_files_handler import validate_file
+from ..cld_media.storage import StorageBackend, get_storage
+from ..utils.media_files_handler import (
+    discard_uploads,
+    stream_form_uploads,
+    validate_file,
+)
 from ..core.constants import SupportedMediaTypePath
+from ..core.tracing import TracedRoute
+from ..utils.pagination import build_page
+
+
+router = APIRouter(tags=["podcast"], prefix="/api/v1/podcasts", route_class=TracedRoute)
 
 
-router = APIRouter(tags=["podcast"], prefix="/api/v1/podcasts")
+def podcast_response(
+    podcast: Podcast, storage: StorageBackend, counts: list[int] | None = None
+) -> PodcastListItem:
+    """
+    Serialize a podcast together with the renditions of its cover image and
+    its [plays, downloads] counts.
+    """
+    data = PodcastListItem.model_validate(podcast, from_attributes=True)
+    if counts is not None:
+        data.plays, data.downloads = counts
+    data.cover = CoverImage.from_storage(
+        storage, podcast.cld_image_public_id, podcast.cover_image
+    )
+    return data
 
 
-@router.get("/")
+@router.get("/", response_model=Page[PodcastListItem])
 async def get_all_podcasts(
+    request: Request,
     handler: Annotated[PodcastService, Depends(get_podcast_service)],
-    limit: Optional[int] = 5,
-    offset: Optional[int] = 0,
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+    stats: Annotated[MediaStatsService, Depends(get_media_stats_service)],
+    limit: int = Query(default=5, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    exact: bool = Query(default=False, description="Count the total exactly"),
 ):
-    """Return all podcast.
+    """Return a page of podcasts.
 
     Args:
         handler (Annotated[PodcastService, Depends): Provider or dependable for the endpoint
+        exact (bool): Count the total exactly instead of using the maintained
+            count or the planner's estimate.
 
     Returns:
-        Podcast: List of podcast objects
+        Page: Podcast objects with their cover renditions, the total number
+        of podcasts and the url of the next page
+    """
+    podcasts = handler.get_all_podcasts(limit=limit + 1, offset=offset)
+    counts = stats.get_counts(
+        "podcast", [podcast.id for podcast in podcasts[:limit]]
+    )
+    return build_page(
+        request,
+        podcasts,
+        lambda podcast: podcast_response(podcast, storage, counts.get(podcast.id)),
+        limit,
+        offset,
+        handler.count_podcasts(exact),
+    )
+
+
+@router.post("/{id}/events", status_code=status.HTTP_202_ACCEPTED)
+def record_podcast_event(
+    id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    handler: Annotated[PodcastService, Depends(get_podcast_service)],
+    stats: Annotated[MediaStatsService, Depends(get_media_stats_service)],
+    event: MediaEvent = "play",
+) -> dict[str, str]:
     """
-    return handler.get_all_podcasts(limit=limit, offset=offset)
+    Count a play or download of a podcast.
 
+    The count is buffered in memory and written with the next batch.
+    """
+    if handler.get_podcast(id) is None:
+        raise PodcastNotFoundException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Podcast resource not Found"
+        )
+    stats.record_event("podcast", id, event)
+    return {"status": "accepted"}
 
-@router.get("/{id}")
-async def get_podcast(
+
+@router.get("/{id}", response_model=PodcastListItem)
+def get_podcast(
     id: int,
     current_user: Annotated[User, Depends(get_current_user)],
     handler: Annotated[PodcastService, Depends(get_podcast_service)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+    stats: Annotated[MediaStatsService, Depends(get_media_stats_service)],
 ):
+    """
+    Get a podcast with its cover renditions and play counts.
+    """
     query_result = handler.get_podcast(id)
     if query_result is not None:
-        return query_result
+        counts = stats.get_counts("podcast", [query_result.id])
+        return podcast_response(query_result, storage, counts.get(query_result.id))
     raise PodcastNotFoundException(
         status_code=status.HTTP_404_NOT_FOUND, detail="Podcast resource not Found"
     )
@@ -65,6 +147,7 @@ async def create_podcast(
     # podcast_data: CreatePodcast,
     handler: Annotated[PodcastService, Depends(get_podcast_service)],
     current_user: Annotated[User, Depends(get_current_user)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
     title: str = Form(..., description="Title of the podcast"),
     running_episodes: int = Form(..., description="Episode number"),
     cover_image: UploadFile = File(..., description="Feature Image"),
@@ -73,8 +156,8 @@ async def create_podcast(
     """
     Create podcast file.
     """
-    img_public_id = cloudinaryHandler.create_public_id(cover_image.filename)
-    video_public_id = cloudinaryHandler.create_public_id(video_file.filename)
+    img_public_id = storage.create_public_id(cover_image.filename)
+    video_public_id = storage.create_public_id(video_file.filename)
 
     is_valid_image = validate_file(
         file=cover_image, media_type=SupportedMediaTypePath.IMAGE.name
@@ -91,18 +174,20 @@ async def create_podcast(
 
     today = datetime.today()
 
-    img_res = await cloudinaryHandler.upload_image(
-        file=cover_image.file,
-        image_name=cover_image.filename,
+    img_res = await storage.put(
+        cover_image.file,
+        filename=cover_image.filename,
         folder_name=f"podcast/images/{today.year}",
         public_id=img_public_id,
+        media_type=SupportedMediaTypePath.IMAGE.name,
     )
 
-    video_res = await cloudinaryHandler.upload_video(
-        file=video_file.file,
-        video_name=video_file.filename,
+    video_res = await storage.put(
+        video_file.file,
+        filename=video_file.filename,
         folder_name=f"podcast/videos/{today.year}",
         public_id=video_public_id,
+        media_type=SupportedMediaTypePath.VIDEO.name,
     )
 
     try:
@@ -110,12 +195,13 @@ async def create_podcast(
             title=title,
             running_episodes=running_episodes,
             user_id=current_user.id,
-            cover_image=img_res["url"],
+            cover_image=img_res.url,
             cld_image_public_id=img_public_id,
             cld_video_public_id=video_public_id,
-            video_file=video_res["url"],
+            video_file=video_res.url,
         )
     except ValueError as e:
+        await discard_uploads([img_res, video_res])
         raise HTTPException(
             detail="Validation error occurred for request. Check if the media type provided matches the approved types.",
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -123,6 +209,63 @@ async def create_podcast(
 
     result = handler.insert_podcast(new_podcast)
     if result is False:
+        await discard_uploads([img_res, video_res])
+        raise HTTPException(
+            detail="Failed to create Podcast", status_code=status.HTTP_400_BAD_REQUEST
+        )
+    return {"status": "successful", "message": "Podcast created successfully"}
+
+
+@router.post("/stream", status_code=status.HTTP_200_OK)
+async def create_podcast_streaming(
+    request: Request,
+    handler: Annotated[PodcastService, Depends(get_podcast_service)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+):
+    """
+    Create podcast from a multipart body with the same fields as the create
+    endpoint (title, running_episodes, cover_image, video_file).
+
+    The files are forwarded to storage while they are being received instead
+    of being spooled to disk first. Send the text fields before the files.
+    """
+    today = datetime.today()
+    fields, stored = await stream_form_uploads(
+        request,
+        storage,
+        {
+            "cover_image": (
+                SupportedMediaTypePath.IMAGE.name,
+                f"podcast/images/{today.year}",
+            ),
+            "video_file": (
+                SupportedMediaTypePath.VIDEO.name,
+                f"podcast/videos/{today.year}",
+            ),
+        },
+    )
+
+    try:
+        new_podcast = CreatePodcast(
+            title=fields.get("title"),
+            running_episodes=fields.get("running_episodes"),
+            user_id=current_user.id,
+            cover_image=stored["cover_image"].url,
+            cld_image_public_id=stored["cover_image"].public_id,
+            cld_video_public_id=stored["video_file"].public_id,
+            video_file=stored["video_file"].url,
+        )
+    except ValueError as e:
+        await discard_uploads(stored.values())
+        raise HTTPException(
+            detail="Validation error occurred for request. Check if the media type provided matches the approved types.",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    result = handler.insert_podcast(new_podcast)
+    if result is False:
+        await discard_uploads(stored.values())
         raise HTTPException(
             detail="Failed to create Podcast", status_code=status.HTTP_400_BAD_REQUEST
         )
@@ -134,14 +277,15 @@ async def update_podcast(
     id: int,
     handler: Annotated[PodcastService, Depends(get_podcast_service)],
     current_user: Annotated[User, Depends(get_current_user)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
     title: str = Form(..., description="Title of the podcast"),
     running_episodes: int = Form(..., description="Episode number"),
     cover_image: UploadFile = File(..., description="Feature Image"),
     video_file: UploadFile = File(..., description="Video file"),
     # body: UpdatePodcast,
 ):
-    img_public_id = cloudinaryHandler.create_public_id(cover_image.filename)
-    video_public_id = cloudinaryHandler.create_public_id(video_file.filename)
+    img_public_id = storage.create_public_id(cover_image.filename)
+    video_public_id = storage.create_public_id(video_file.filename)
 
     is_valid_image = validate_file(
         file=cover_image, media_type=SupportedMediaTypePath.IMAGE.name
@@ -156,8 +300,7 @@ async def update_podcast(
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
-    # Delete files from cloudinary if the cld_image_public_id and
-    # cld_video_public_id aren't the same as the new cld IDs generated
+    # the old files are deleted in the background if the public ids changed
 
     res_query = handler.get_podcast(id)
 
@@ -165,35 +308,21 @@ async def update_podcast(
         if res_query.user_id == current_user.id:
 
             today = datetime.today()
-            if res_query.cld_image_public_id != img_public_id:
-                # Delete image from cloudinary
-                cloudinaryHandler.delete_media_file(
-                    public_id=res_query.cld_image_public_id,
-                    resource_type="image",
-                    # folder=f"podcast/images/{today.year}",
-                )
-
-            if res_query.cld_video_public_id != video_public_id:
-                # Delete video from cloudinary
-
-                cloudinaryHandler.delete_media_file(
-                    public_id=res_query.cld_video_public_id,
-                    resource_type="video",
-                    # folder=f"podcast/videos/{today.year}",
-                )
 
-            img_res = await cloudinaryHandler.upload_image(
-                file=cover_image.file,
-                image_name=cover_image.filename,
+            img_res = await storage.put(
+                cover_image.file,
+                filename=cover_image.filename,
                 folder_name=f"podcast/images/{today.year}",
                 public_id=img_public_id,
+                media_type=SupportedMediaTypePath.IMAGE.name,
             )
 
-            video_res = await cloudinaryHandler.upload_video(
-                file=video_file.file,
-                video_name=video_file.filename,
+            video_res = await storage.put(
+                video_file.file,
+                filename=video_file.filename,
                 folder_name=f"podcast/videos/{today.year}",
                 public_id=video_public_id,
+                media_type=SupportedMediaTypePath.VIDEO.name,
             )
 
             try:
@@ -202,10 +331,10 @@ async def update_podcast(
                     title=title,
                     running_episodes=running_episodes,
                     user_id=current_user.id,
-                    cover_image=img_res["url"],
+                    cover_image=img_res.url,
                     cld_image_public_id=img_public_id,
                     cld_video_public_id=video_public_id,
-                    video_file=video_res["url"],
+                    video_file=video_res.url,
                 )
 
             except ValueError as e:
@@ -0,0 +1,158 @@
+"""
+Anonymous read only routes for published content.
+
+Responses are publicly cacheable, so a CDN or any shared cache in front of
+the API can serve most reads. Every response names the content it holds in
+Surrogate-Key and the purge queue invalidates those keys after a write
+or a flush of play counts.
+"""
+
+from typing import Annotated
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+
+from ..core.tracing import TracedRoute
+from ..cld_media.storage import StorageBackend, get_storage
+from ..schemas.pagination import Page
+from ..schemas.podcast import PodcastListItem
+from ..schemas.sermon import ResponseSermon
+from ..services.factory import (
+    get_media_stats_service,
+    get_podcast_service,
+    get_sermon_service,
+)
+from ..services.media_stats_service import MediaStatsService
+from ..services.podcast_service import PodcastService
+from ..services.sermon_service import SermonService
+from ..utils.http_cache import cacheable_response, surrogate_key
+from ..utils.pagination import build_page
+from .podcast import podcast_response
+from .sermon import sermon_response
+
+router = APIRouter(prefix="/api/v1/public", tags=["public"], route_class=TracedRoute)
+
+
+@router.get("/sermons/", responses={200: {"model": Page[ResponseSermon]}})
+def get_sermons(
+    request: Request,
+    handler: Annotated[SermonService, Depends(get_sermon_service)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+    stats: Annotated[MediaStatsService, Depends(get_media_stats_service)],
+    limit: int = Query(default=5, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+) -> Response:
+    """
+    Get a page of sermons.
+    """
+    sermons = handler.get_sermons(limit=limit + 1, offset=offset)
+    shown = sermons[:limit]
+    counts = stats.get_counts("sermon", [sermon.id for sermon in shown])
+    page = build_page(
+        request,
+        sermons,
+        lambda sermon: sermon_response(sermon, storage, counts.get(sermon.id)),
+        limit,
+        offset,
+        handler.count_sermons(),
+    )
+    # no Last-Modified, deletes and play counts change a page without
+    # changing the updated_at of what it shows, the ETag covers them
+    return cacheable_response(
+        request,
+        page,
+        [surrogate_key("sermon")]
+        + [surrogate_key("sermon", sermon.id) for sermon in shown],
+    )
+
+
+@router.get("/sermons/{id}/", responses={200: {"model": ResponseSermon}})
+def get_sermon(
+    id: int,
+    request: Request,
+    handler: Annotated[SermonService, Depends(get_sermon_service)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+    stats: Annotated[MediaStatsService, Depends(get_media_stats_service)],
+) -> Response:
+    """
+    Get a sermon.
+    """
+    # the CDN keeps what it fetches after a purge for a day, so this doesn't
+    # read the object cache, which other workers may not have invalidated yet
+    sermon = handler.get_single_sermon(id, cached=False)
+    if sermon is None:
+        raise HTTPException(
+            detail="Resource not found", status_code=status.HTTP_404_NOT_FOUND
+        )
+    counts = stats.get_counts("sermon", [sermon.id])
+    # no Last-Modified, play counts change without changing updated_at
+    return cacheable_response(
+        request,
+        sermon_response(sermon, storage, counts.get(sermon.id)),
+        [surrogate_key("sermon", sermon.id)],
+    )
+
+
+@router.get("/podcasts/", responses={200: {"model": Page[PodcastListItem]}})
+def get_podcasts(
+    request: Request,
+    handler: Annotated[PodcastService, Depends(get_podcast_service)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+    stats: Annotated[MediaStatsService, Depends(get_media_stats_service)],
+    limit: int = Query(default=5, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+) -> Response:
+    """
+    Get a page of podcasts.
+    """
+    podcasts = handler.get_all_podcasts(limit=limit + 1, offset=offset)
+    shown = podcasts[:limit]
+    counts = stats.get_counts("podcast", [podcast.id for podcast in shown])
+    page = build_page(
+        request,
+        podcasts,
+        lambda podcast: podcast_response(podcast, storage, counts.get(podcast.id)),
+        limit,
+        offset,
+        handler.count_podcasts(),
+    )
+    # revalidated by ETag only, as the sermon pages
+    return cacheable_response(
+        request,
+        page,
+        [surrogate_key("podcast")]
+        + [surrogate_key("podcast", podcast.id) for podcast in shown],
+    )
+
+
+@router.get("/podcasts/{id}/", responses={200: {"model": PodcastListItem}})
+def get_podcast(
+    id: int,
+    request: Request,
+    handler: Annotated[PodcastService, Depends(get_podcast_service)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+    stats: Annotated[MediaStatsService, Depends(get_media_stats_service)],
+) -> Response:
+    """
+    Get a podcast.
+    """
+    # not from the object cache, as for sermons
+    podcast = handler.get_podcast(id, cached=False)
+    if podcast is None:
+        raise HTTPException(
+            detail="Podcast resource not Found", status_code=status.HTTP_404_NOT_FOUND
+        )
+    counts = stats.get_counts("podcast", [podcast.id])
+    # revalidated by ETag only, as the sermons
+    return cacheable_response(
+        request,
+        podcast_response(podcast, storage, counts.get(podcast.id)),
+        [surrogate_key("podcast", podcast.id)],
+    )
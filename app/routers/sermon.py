@@ -1,43 +1,93 @@
-from typing import Annotated, Optional
-
-from fastapi import APIRouter, Depends, status, HTTPException, UploadFile, Form, File
+from typing import Annotated
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    status,
+    HTTPException,
+    UploadFile,
+    Form,
+    File,
+    Request,
+    Query,
+)
 
 from datetime import datetime
 
 from ..dependencies import get_current_user
-from ..services.factory import get_sermon_service
+from ..services.factory import get_media_stats_service, get_sermon_service
+from ..services.media_stats_service import MediaEvent, MediaStatsService
 from ..services.sermon_service import SermonService
-from ..schemas.sermon import CreateSermon, UpdateSermon
+from ..schemas.sermon import CreateSermon, ResponseSermon, UpdateSermon
+from ..schemas.media import CoverImage
+from ..schemas.pagination import Page
+from ..models.sermon import Sermon
 from ..models.user import User
-from ..utils.media_files_handler import validate_file
+from ..utils.media_files_handler import (
+    discard_uploads,
+    stream_form_uploads,
+    validate_file,
+)
 from ..core.constants import SupportedMediaTypePath
-from ..cld_media.media_api import cloudinaryHandler
+from ..core.tracing import TracedRoute
+from ..cld_media.storage import StorageBackend, get_storage
 from ..utils.handler_exceptions import (
     DatabaseException,
     UnauthoriziedUserException,
 )
+from ..utils.pagination import build_page
 from ..utils.validators import validate_sermon_partial_data
 
-router = APIRouter(prefix="/api/v1/sermon", tags=["sermon"])
+router = APIRouter(prefix="/api/v1/sermon", tags=["sermon"], route_class=TracedRoute)
+
+
+def sermon_response(
+    sermon: Sermon, storage: StorageBackend, counts: list[int] | None = None
+) -> ResponseSermon:
+    """
+    Serialize a sermon together with the renditions of its cover image and
+    its [plays, downloads] counts.
+    """
+    data = ResponseSermon.model_validate(sermon, from_attributes=True)
+    if counts is not None:
+        data.plays, data.downloads = counts
+    data.cover = CoverImage.from_storage(
+        storage, sermon.cld_image_public_id, sermon.cover_image
+    )
+    return data
 
 
-@router.get("/")
+@router.get("/", response_model=Page[ResponseSermon])
 async def get_sermons(
+    request: Request,
     current_user: Annotated[User, Depends(get_current_user)],
     handler: Annotated[SermonService, Depends(get_sermon_service)],
-    limit: Optional[int] = 5,
-    offset: Optional[int] = 0,
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+    stats: Annotated[MediaStatsService, Depends(get_media_stats_service)],
+    limit: int = Query(default=5, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    exact: bool = Query(default=False, description="Count the total exactly"),
 ):
     """
-    Get all sermons.
+    Get a page of sermons with the total number of sermons.
     """
-    return handler.get_sermons(limit=limit, offset=offset)
+    sermons = handler.get_sermons(limit=limit + 1, offset=offset)
+    counts = stats.get_counts("sermon", [sermon.id for sermon in sermons[:limit]])
+    return build_page(
+        request,
+        sermons,
+        lambda sermon: sermon_response(sermon, storage, counts.get(sermon.id)),
+        limit,
+        offset,
+        handler.count_sermons(exact),
+    )
 
 
 @router.post("/")
 async def create_sermon(
     handler: Annotated[SermonService, Depends(get_sermon_service)],
     current_user: Annotated[User, Depends(get_current_user)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
     theme: str = Form(..., description="Theme for the service", max_length=250),
     minister: str = Form(..., description="The preacher", max_length=70),
     short_note: str = Form(
@@ -52,8 +102,8 @@ async def create_sermon(
     Create new sermon.
     """
 
-    audio_public_id = cloudinaryHandler.create_public_id(audio_file.filename)  # type: ignore
-    img_public_id = cloudinaryHandler.create_public_id(cover.filename)  # type: ignore
+    audio_public_id = storage.create_public_id(audio_file.filename)  # type: ignore
+    img_public_id = storage.create_public_id(cover.filename)  # type: ignore
 
     # # updated_sermon.user_id = current_user.id
     is_valid_image = validate_file(
@@ -71,18 +121,20 @@ async def create_sermon(
 
     today = datetime.today()
     # upload image and audio to cloudinary
-    img_res = await cloudinaryHandler.upload_image(
-        file=cover.file,
-        image_name=cover.filename,  # type: ignore
+    img_res = await storage.put(
+        cover.file,
+        filename=cover.filename,  # type: ignore
         folder_name=f"sermon/images/{today.year}",
         public_id=img_public_id,
+        media_type=SupportedMediaTypePath.IMAGE.name,
     )
 
-    audio_res = await cloudinaryHandler.upload_audio(
-        file=audio_file.file,
-        audio_name=audio_file.filename,  # type: ignore
+    audio_res = await storage.put(
+        audio_file.file,
+        filename=audio_file.filename,  # type: ignore
         folder_name=f"sermon/audios/{today.year}",
         public_id=audio_public_id,
+        media_type=SupportedMediaTypePath.AUDIO.name,
     )
 
     try:
@@ -90,14 +142,71 @@ async def create_sermon(
             theme=theme,
             minister=minister,
             short_note=short_note,
-            cover_image=img_res["url"],
-            audio_file=audio_res["url"],
+            cover_image=img_res.url,
+            audio_file=audio_res.url,
             user_id=current_user.id,
             cld_image_public_id=img_public_id,
             cld_audio_public_id=audio_public_id,
         )
     except ValueError as e:
+        await discard_uploads([img_res, audio_res])
+        raise HTTPException(
+            detail="Validation error occurred for request. Check if the media type provided matches the approved types.",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    result = handler.insert_sermon(new_sermon)
+    if not result:
+        await discard_uploads([img_res, audio_res])
+        raise HTTPException(
+            detail="Failed to create sermon", status_code=status.HTTP_400_BAD_REQUEST
+        )
+    return {"status": "successful", "message": "Sermon created successfully"}
+
+
+@router.post("/stream")
+async def create_sermon_streaming(
+    request: Request,
+    handler: Annotated[SermonService, Depends(get_sermon_service)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+):
+    """
+    Create new sermon from a multipart body with the same fields as the
+    create endpoint (theme, minister, short_note, cover, audio_file).
+
+    The files are forwarded to storage while they are being received instead
+    of being spooled to disk first. Send the text fields before the files.
+    """
+    today = datetime.today()
+    fields, stored = await stream_form_uploads(
+        request,
+        storage,
+        {
+            "cover": (
+                SupportedMediaTypePath.IMAGE.name,
+                f"sermon/images/{today.year}",
+            ),
+            "audio_file": (
+                SupportedMediaTypePath.AUDIO.name,
+                f"sermon/audios/{today.year}",
+            ),
+        },
+    )
 
+    try:
+        new_sermon = CreateSermon(
+            theme=fields.get("theme"),
+            minister=fields.get("minister"),
+            short_note=fields.get("short_note"),
+            cover_image=stored["cover"].url,
+            audio_file=stored["audio_file"].url,
+            user_id=current_user.id,
+            cld_image_public_id=stored["cover"].public_id,
+            cld_audio_public_id=stored["audio_file"].public_id,
+        )
+    except ValueError as e:
+        await discard_uploads(stored.values())
         raise HTTPException(
             detail="Validation error occurred for request. Check if the media type provided matches the approved types.",
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -105,32 +214,52 @@ async def create_sermon(
 
     result = handler.insert_sermon(new_sermon)
     if not result:
+        await discard_uploads(stored.values())
         raise HTTPException(
             detail="Failed to create sermon", status_code=status.HTTP_400_BAD_REQUEST
         )
     return {"status": "successful", "message": "Sermon created successfully"}
 
 
-@router.get("/{id}/")
+@router.post("/{id}/events/", status_code=status.HTTP_202_ACCEPTED)
+def record_sermon_event(
+    id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    handler: Annotated[SermonService, Depends(get_sermon_service)],
+    stats: Annotated[MediaStatsService, Depends(get_media_stats_service)],
+    event: MediaEvent = "play",
+) -> dict[str, str]:
+    """
+    Count a play or download of a sermon.
+
+    The count is buffered in memory and written with the next batch.
+    """
+    if handler.get_single_sermon(id) is None:
+        raise HTTPException(
+            detail="Resource not found", status_code=status.HTTP_404_NOT_FOUND
+        )
+    stats.record_event("sermon", id, event)
+    return {"status": "accepted"}
+
+
+@router.get("/{id}/", response_model=ResponseSermon)
 def get_sermon(
     id: int,
     current_user: Annotated[User, Depends(get_current_user)],
     handler: Annotated[SermonService, Depends(get_sermon_service)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+    stats: Annotated[MediaStatsService, Depends(get_media_stats_service)],
 ):
     """
-    Generate audio stream for user.
+    Get a sermon with its cover renditions and play counts.
     """
     res = handler.get_single_sermon(id)
     if res is None:
         raise HTTPException(
             detail="Resource not found", status_code=status.HTTP_404_NOT_FOUND
         )
-    if res:
-        return res
-
-    raise DatabaseException(
-        detail="An error occurred", status_code=status.HTTP_404_NOT_FOUND
-    )
+    counts = stats.get_counts("sermon", [res.id])
+    return sermon_response(res, storage, counts.get(res.id))
 
 
 @router.delete("/{id}/", status_code=status.HTTP_204_NO_CONTENT)
@@ -141,20 +270,10 @@ async def delete_sermon(
 ):
     """
     Delete a sermon from the database.
-    """
-    # res = handler.delete_sermon(id)
-    res = handler.get_single_sermon(id)
-    if res:
-        print(res.cld_image_public_id, res.cld_audio_public_id)
-        # Delete media files from cloudinary
-        img_res = cloudinaryHandler.delete_media_file(res.cld_image_public_id)
-        audio_res = cloudinaryHandler.delete_media_file(
-            res.cld_audio_public_id, resource_type="video"
-        )
 
-        if img_res and audio_res:
-            # if img_res and audio_res:
-            return handler.delete_sermon(id)
+    The cover and audio files are removed from storage in the background.
+    """
+    res = handler.delete_sermon(id)
 
     if res is None:
         raise HTTPException(
@@ -174,6 +293,7 @@ async def update(
     id: int,
     handler: Annotated[SermonService, Depends(get_sermon_service)],
     current_user: Annotated[User, Depends(get_current_user)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
     theme: str = Form(..., description="Theme for the service", max_length=250),
     minister: str = Form(..., description="The preacher", max_length=70),
     short_note: str = Form(
@@ -194,8 +314,8 @@ async def update(
 
         if res.user_id == current_user.id:
 
-            audio_public_id = cloudinaryHandler.create_public_id(audio_file.filename)
-            img_public_id = cloudinaryHandler.create_public_id(cover.filename)
+            audio_public_id = storage.create_public_id(audio_file.filename)
+            img_public_id = storage.create_public_id(cover.filename)
 
             # # updated_sermon.user_id = current_user.id
             today = datetime.today()
@@ -212,30 +332,24 @@ async def update(
                     status_code=status.HTTP_400_BAD_REQUEST,
                 )
 
-            if res.cld_image_public_id != img_public_id:
-                cloudinaryHandler.delete_media_file(
-                    public_id=res.cld_image_public_id, resource_type="image"
-                )
-
-            if res.cld_audio_public_id != audio_public_id:
-                cloudinaryHandler.delete_media_file(
-                    public_id=res.cld_audio_public_id,
-                    resource_type="video",
-                )
+            # replaced files are deleted in the background once the update
+            # is committed
 
             # upload image and audio to cloudinary
-            img_res = await cloudinaryHandler.upload_image(
-                file=cover.file,
-                image_name=cover.filename,  # type: ignore
+            img_res = await storage.put(
+                cover.file,
+                filename=cover.filename,  # type: ignore
                 folder_name=f"sermon/images/{today.year}",
                 public_id=img_public_id,
+                media_type=SupportedMediaTypePath.IMAGE.name,
             )
 
-            audio_res = await cloudinaryHandler.upload_audio(
-                file=audio_file.file,
-                audio_name=audio_file.filename,  # type: ignore
+            audio_res = await storage.put(
+                audio_file.file,
+                filename=audio_file.filename,  # type: ignore
                 folder_name=f"sermon/audios/{today.year}",
                 public_id=audio_public_id,
+                media_type=SupportedMediaTypePath.AUDIO.name,
             )
 
             try:
@@ -243,8 +357,8 @@ async def update(
                     theme=theme,
                     minister=minister,
                     short_note=short_note,
-                    cover_image=img_res["url"],
-                    audio_file=audio_res["url"],
+                    cover_image=img_res.url,
+                    audio_file=audio_res.url,
                     user_id=current_user.id,
                     cld_image_public_id=img_public_id,
                     cld_audio_public_id=audio_public_id,
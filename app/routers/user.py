@@ -1,6 +1,6 @@
-from typing import Annotated, List
+from functools import lru_cache
+from typing import TYPE_CHECKING, Annotated, List
 
-from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, Depends, HTTPException, Request, status, Header
@@ -8,6 +8,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 
 from app.core.security import get_password_hash
 
+from ..core.tracing import TracedRoute
 from ..dependencies import get_current_user
 from ..schemas.users import UserResponseSchema, UserCreateSchema
 from ..models.user import User
@@ -16,11 +17,24 @@ from ..dependencies import get_session_db
 
 from ..services.factory import get_user_service
 from ..services.user_service import UserService
+from ..utils.static_assets import install_asset_url_for
 
-router = APIRouter(prefix="/api/v1/users", tags=["users"])
+if TYPE_CHECKING:
+    from fastapi.templating import Jinja2Templates
 
+router = APIRouter(prefix="/api/v1/users", tags=["users"], route_class=TracedRoute)
 
-templates = Jinja2Templates(directory="templates")
+
+@lru_cache
+def get_templates() -> "Jinja2Templates":
+    """
+    Returns the template renderer, created on first use.
+    """
+    from fastapi.templating import Jinja2Templates
+
+    templates = Jinja2Templates(directory="templates")
+    install_asset_url_for(templates)
+    return templates
 
 
 SessionDep = Annotated[Session, Depends(get_session_db)]
@@ -118,6 +132,6 @@ async def get_all_users(
 async def render_home(
     request: Request, current_user: Annotated[User, Depends(get_current_user)]
 ):
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         request, name="index.html", context={"user": current_user.username}
     )
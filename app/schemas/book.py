@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from .media import CoverImage
+
+
+class CreateBook(BaseModel):
+    """
+    Pydantic Model to create Book.
+    """
+
+    title: str = Field(..., max_length=250)
+    book_cover: str
+    cld_image_public_id: Optional[str] = Field(default=None)
+    book_file: str
+    cld_book_public_id: Optional[str] = Field(default=None)
+    file_size: int = Field(..., ge=0)
+    is_published: bool = False
+    user_id: Optional[int] = Field(default=None)
+
+
+class ResponseBook(BaseModel):
+    """
+    Pydantic Model Response for Book.
+    """
+
+    id: int
+    title: str
+    book_cover: Optional[str] = None
+    cover: Optional[CoverImage] = None
+    file_url: Optional[str] = None
+    file_size: Optional[int] = None
+    is_published: bool
+    uploaded_on: Optional[datetime] = None
+    user_id: Optional[int] = None
@@ -1,5 +1,9 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
+from ..core.constants import MEDIA_DIR
+
 
 class Settings(BaseSettings):
     DATABASE_URL: str
@@ -8,8 +12,189 @@ class Settings(BaseSettings):
     API_SECRET: str
     # SQL_ALCHEMY_URL: str
 
+    # media storage
+    STORAGE_BACKEND: Literal["cloudinary", "local"] = "cloudinary"
+    MEDIA_ROOT: str = MEDIA_DIR
+    MEDIA_URL: str = "/media"
+
+    # database connection pool, per worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    # executions after which a statement is prepared on the server, with the
+    # psycopg (3) driver only. 0 disables it, e.g. behind pgbouncer
+    DB_PREPARE_THRESHOLD: int = 5
+
+    # embedded SQLite profile, used when DATABASE_URL is a database file.
+    # Query only connections kept open per worker, more are opened when all
+    # are in use. Writes share a single connection
+    SQLITE_READ_POOL_SIZE: int = 8
+    # seconds a write waits for the writer connection or the database lock
+    SQLITE_BUSY_TIMEOUT: float = 30.0
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    # page cache per connection, in KiB
+    SQLITE_CACHE_SIZE: int = 64 * 1024
+
+    # production server (python -m app serve)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    # 0 means one worker per cpu
+    SERVER_WORKERS: int = 0
+    # total connections all workers may open to the database
+    DB_CONNECTION_BUDGET: int = 40
+    SERVER_KEEP_ALIVE: int = 5
+    SERVER_BACKLOG: int = 2048
+    # recycle a worker after it served this many requests, 0 disables it.
+    # Only with several workers, a single worker isn't restarted
+    SERVER_MAX_REQUESTS: int = 10_000
+    # up to this many requests are added to the limit of every worker, so
+    # the workers don't all recycle at once
+    SERVER_MAX_REQUESTS_JITTER: int = 1_000
+
+    # bulkheads: concurrent requests and queued requests per route class
+    BULKHEAD_UPLOADS_CONCURRENCY: int = 4
+    BULKHEAD_UPLOADS_QUEUE: int = 16
+    BULKHEAD_AUTH_CONCURRENCY: int = 8
+    BULKHEAD_AUTH_QUEUE: int = 64
+    BULKHEAD_READS_CONCURRENCY: int = 64
+    BULKHEAD_READS_QUEUE: int = 256
+    # seconds a request may wait for a slot before it is shed with a 503
+    BULKHEAD_MAX_QUEUE_TIME: float = 5.0
+
+    # background deletes of media files that are no longer referenced
+    MEDIA_OUTBOX_ENABLED: bool = True
+    # seconds between polls once the outbox is empty
+    MEDIA_OUTBOX_INTERVAL: float = 5.0
+    MEDIA_OUTBOX_BATCH_SIZE: int = 100
+    MEDIA_OUTBOX_MAX_ATTEMPTS: int = 8
+    # first retry delay in seconds, doubled after every failed attempt
+    MEDIA_OUTBOX_RETRY_DELAY: int = 30
+
+    # play and download counts are written in batches
+    PLAY_COUNTER_FLUSH_INTERVAL: float = 5.0
+    PLAY_COUNTER_MAX_PENDING: int = 1000
+
+    # listening analytics
+    ANALYTICS_FLUSH_INTERVAL: float = 1.0
+    ANALYTICS_MAX_PENDING: int = 5000
+    # events buffered at most while inserts are failing
+    ANALYTICS_MAX_BUFFERED: int = 200_000
+    ANALYTICS_ROLLUP_INTERVAL: float = 60.0
+    ANALYTICS_ROLLUP_BATCH_SIZE: int = 20_000
+    # seconds an event is left alone before it is rolled up
+    ANALYTICS_ROLLUP_SETTLE: int = 30
+
+    # the home feed is cached until content changes, other workers' changes
+    # are picked up after this many seconds at the latest
+    FEED_CACHE_TTL: float = 30.0
+
+    # book files are served from cached byte windows of this size
+    BOOK_WINDOW_SIZE: int = 256 * 1024
+    # memory for cached book windows, per worker
+    BOOK_CACHE_BYTES: int = 64 * 1024 * 1024
+
+    # list totals of tables without a row count come from the planner's
+    # estimate at this many rows and above, smaller tables are counted
+    PAGINATION_ESTIMATE_THRESHOLD: int = 100_000
+
+    # live change stream (server-sent events), per worker
+    SSE_MAX_SUBSCRIBERS: int = 10_000
+    # events queued for a client before it is dropped as too slow
+    SSE_QUEUE_SIZE: int = 64
+    # recent events kept for clients resuming with Last-Event-ID
+    SSE_REPLAY_SIZE: int = 1024
+    SSE_KEEPALIVE: float = 15.0
+    # the changes of all workers are polled from the database, a change is
+    # streamed once it was stored SSE_CHANGE_SETTLE seconds ago
+    SSE_POLL_INTERVAL: float = 1.0
+    SSE_CHANGE_SETTLE: float = 1.0
+    # seconds stored changes are kept
+    SSE_CHANGE_RETENTION: float = 3600.0
+
+    # rows fetched per round trip by streaming exports
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Idempotency-Key of create requests
+    # seconds a request owns its key, long enough for the largest upload
+    IDEMPOTENCY_LEASE: int = 900
+    # seconds a retry waits for the request that owns the key
+    IDEMPOTENCY_WAIT: float = 30.0
+    # hours a key and its response are kept
+    IDEMPOTENCY_TTL_HOURS: int = 24
+
+    # cache lifetimes of the public read routes, in seconds. Shared caches
+    # keep responses longer since writes purge them
+    PUBLIC_CACHE_MAX_AGE: int = 60
+    PUBLIC_CACHE_S_MAXAGE: int = 86_400
+    PUBLIC_CACHE_STALE_WHILE_REVALIDATE: int = 60
+    PUBLIC_CACHE_STALE_IF_ERROR: int = 86_400
+    # purge endpoint of the CDN, purging is disabled when empty
+    CDN_PURGE_URL: str = ""
+    CDN_PURGE_TOKEN: str = ""
+    CDN_PURGE_INTERVAL: float = 1.0
+    CDN_PURGE_MAX_PENDING: int = 500
+
+    # cache of single sermons and podcasts, per worker. Changes made by
+    # other workers are picked up after the ttl at the latest
+    OBJECT_CACHE_SIZE: int = 1000
+    OBJECT_CACHE_TTL: float = 30.0
+
+    # sampled capture of request metadata, replayed with
+    # python -m app.benchmarks.replay
+    TRAFFIC_CAPTURE_ENABLED: bool = False
+    TRAFFIC_CAPTURE_PATH: str = "traffic.jsonl"
+    # share of the requests recorded
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = 0.01
+    TRAFFIC_CAPTURE_FLUSH_INTERVAL: float = 5.0
+    TRAFFIC_CAPTURE_MAX_PENDING: int = 1000
+
+    # structured logging, e.g. LOG_LEVELS="app.repository=DEBUG,httpx=WARNING"
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""
+    # share of the debug records written
+    LOG_DEBUG_SAMPLE_RATE: float = 1.0
+    # records waiting to be written, further records are dropped
+    LOG_QUEUE_SIZE: int = 10_000
+
+    # request tracing. Slow and failed traces are always kept
+    TRACING_ENABLED: bool = True
+    TRACING_SLOW_MS: float = 1000.0
+    # share of the other traces kept
+    TRACING_SAMPLE_RATE: float = 0.01
+    # kept traces in memory, per worker
+    TRACING_RING_SIZE: int = 200
+    TRACING_MAX_SPANS: int = 500
+    # also append kept traces to this JSONL file
+    TRACING_EXPORT_PATH: str = ""
+
     class Config:
         env_file = ".env"
 
 
-settings = Settings()
+_settings: Settings | None = None
+
+
+def get_settings() -> Settings:
+    """
+    Returns the application settings, read from the environment on first use.
+    """
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def set_settings(new_settings: Settings) -> None:
+    """
+    Replace the application settings, e.g. with the ones given to create_app.
+    """
+    global _settings
+    _settings = new_settings
+
+
+def __getattr__(name: str):
+    # keep ``from app.schemas.config import settings`` working without
+    # reading the environment when the module is imported
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
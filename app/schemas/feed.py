@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from .media import CoverImage
+
+
+class FeedItem(BaseModel):
+    """
+    Pydantic Model Response for a sermon, podcast or book on the home feed.
+    """
+
+    id: int
+    title: str
+    subtitle: Optional[str] = None
+    cover_image: Optional[str] = None
+    cover: Optional[CoverImage] = None
+    media_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class Feed(BaseModel):
+    """
+    Pydantic Model Response for the home feed.
+    """
+
+    sermons: List[FeedItem] = []
+    podcasts: List[FeedItem] = []
+    books: List[FeedItem] = []
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class ListeningEventIn(BaseModel):
+    """
+    Pydantic Model for a listening event sent by a player.
+    """
+
+    sermon_id: int = Field(..., gt=0)
+    position: int = Field(..., ge=0, description="Second playback started at")
+    duration: int = Field(..., gt=0, le=6 * 3600, description="Seconds listened")
+    client: Optional[str] = Field(default=None, max_length=50)
+
+
+class RetentionBucket(BaseModel):
+    """
+    Pydantic Model Response for one minute of a retention histogram.
+    """
+
+    minute: int
+    listens: int
+
+
+class HourlyListening(BaseModel):
+    """
+    Pydantic Model Response for the listening totals of an hour.
+    """
+
+    hour: datetime
+    events: int
+    seconds_listened: int
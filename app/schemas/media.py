@@ -0,0 +1,48 @@
+from typing import TYPE_CHECKING, Optional
+from pydantic import BaseModel
+
+from ..core.constants import COVER_RENDITIONS
+
+if TYPE_CHECKING:
+    from ..cld_media.storage import StorageBackend
+
+# a srcset lists the same image at several widths, so only the renditions
+# with the aspect ratio of the largest one go into it
+_LARGEST = max(COVER_RENDITIONS.values(), key=lambda size: size["width"])
+SRCSET_RENDITIONS = [
+    name
+    for name, size in COVER_RENDITIONS.items()
+    if size["width"] * _LARGEST["height"] == size["height"] * _LARGEST["width"]
+]
+
+
+class CoverImage(BaseModel):
+    """
+    Responsive renditions of a cover image.
+    """
+
+    original: str
+    thumbnail: str
+    card: str
+    hero: str
+    srcset: str
+
+    @classmethod
+    def from_storage(
+        cls, storage: "StorageBackend", public_id: Optional[str], original: str
+    ) -> Optional["CoverImage"]:
+        """
+        Build the renditions of a stored cover image.
+        """
+        if not public_id:
+            return None
+        try:
+            urls = storage.renditions(public_id)
+        except FileNotFoundError:
+            urls = {name: original for name in COVER_RENDITIONS}
+
+        srcset = ", ".join(
+            f"{urls[name]} {COVER_RENDITIONS[name]['width']}w"
+            for name in SRCSET_RENDITIONS
+        )
+        return cls(original=original, srcset=srcset, **urls)
@@ -0,0 +1,18 @@
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """
+    Pydantic Model Response for one page of a list endpoint.
+    """
+
+    items: List[T]
+    total: int
+    # true when total is a planner estimate, exact=true asks for a count
+    total_estimated: bool = False
+    # url of the next page, None on the last page
+    next: Optional[str] = None
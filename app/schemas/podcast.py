@@ -1,7 +1,9 @@
+from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, Field
 
 from ..schemas.users import UserResponseSchema
+from .media import CoverImage
 
 from ..models.user import User
 
@@ -22,6 +24,26 @@ class PodcastResponse(CreatePodcast):
     pass
 
 
+class PodcastListItem(BaseModel):
+    """
+    Podcast entry returned by list endpoints.
+    """
+
+    id: int
+    podcast_title: str
+    running_episodes: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    cover_image: Optional[str] = None
+    cld_image_public_id: Optional[str] = None
+    cover: Optional[CoverImage] = None
+    video_file: Optional[str] = None
+    cld_video_public_id: Optional[str] = None
+    user_id: Optional[int] = None
+    plays: int = 0
+    downloads: int = 0
+
+
 class UpdatePodcast(CreatePodcast):
     pass
 
@@ -1,8 +1,10 @@
+from datetime import datetime
 from typing import Optional
 from typing_extensions import Self
 from pydantic import BaseModel, Field, model_validator
 
 from ..core.constants import AUDIO_FILE_TYPES, IMAGE_FILE_TYPES
+from .media import CoverImage
 
 
 class CreateSermon(BaseModel):
@@ -37,12 +39,19 @@ class ResponseSermon(BaseModel):
     Pydantic Model Response for Sermon
     """
 
+    id: int
     theme: str
     minister: str
     short_note: str
     cover_image: str
+    cld_image_public_id: Optional[str] = None
+    cover: Optional[CoverImage] = None
     audio_file: str
-    user_id: int
+    cld_audio_public_id: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    user_id: Optional[int] = None
+    plays: int = 0
+    downloads: int = 0
 
 
 class UpdateSermon(CreateSermon):
@@ -22,6 +22,7 @@ class UserInDBSchema(UserResponseSchema):
     """
 
     hashed_password: str
+    is_admin: bool = False
 
     class Config:
         from_attributes: bool = True
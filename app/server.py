@@ -0,0 +1,146 @@
+"""
+Production server for the API.
+
+Runs the app under uvicorn's process supervisor and sizes every worker's
+database pool from one connection budget shared by all workers.
+"""
+
+import os
+import random
+from dataclasses import dataclass
+
+import uvicorn
+
+from .schemas.config import get_settings
+
+
+@dataclass(frozen=True)
+class PoolSizing:
+    """
+    Connection pool settings of a single worker.
+    """
+
+    pool_size: int
+    max_overflow: int
+
+
+def compute_pool_sizing(connection_budget: int, workers: int) -> PoolSizing:
+    """
+    Split the connection budget between the workers.
+
+    Each worker keeps two thirds of its share as persistent connections and
+    may open the remaining third as overflow under bursts, so all workers
+    together never exceed the budget.
+    """
+    if workers < 1:
+        raise ValueError("At least one worker is required")
+    per_worker = connection_budget // workers
+    if per_worker < 1:
+        raise ValueError(
+            f"A budget of {connection_budget} connections can't serve {workers} workers"
+        )
+
+    max_overflow = per_worker // 3
+    return PoolSizing(pool_size=per_worker - max_overflow, max_overflow=max_overflow)
+
+
+def resolve_workers(workers: int) -> int:
+    """
+    Return the number of workers to run, one per cpu when 0 is given.
+    """
+    return workers or os.cpu_count() or 1
+
+
+def recycle_limit(max_requests: int, workers: int) -> int | None:
+    """
+    Return the request limit after which a worker exits, None to never
+    exit. uvicorn only restarts the workers it supervises, which it does
+    with more than one worker: a single worker would stop the server.
+    """
+    if workers < 2 or max_requests < 1:
+        return None
+    return max_requests
+
+
+class RecyclingConfig(uvicorn.Config):
+    """uvicorn configuration adding a random jitter to the request limit of
+    every worker process, so the workers recycle at different times.
+
+    Args:
+        max_requests_jitter (int): Requests added to the limit at most.
+    """
+
+    def __init__(self, *args, max_requests_jitter: int = 0, **kwargs) -> None:
+        self.max_requests_jitter = max_requests_jitter
+        self._limit_pid: int | None = None
+        self._worker_limit: int | None = None
+        super().__init__(*args, **kwargs)
+
+    @property
+    def limit_max_requests(self) -> int | None:
+        # drawn in the worker, the configuration is copied to every worker
+        # process when it starts
+        if self._limit is not None and self._limit_pid != os.getpid():
+            self._limit_pid = os.getpid()
+            self._worker_limit = self._limit + random.randint(
+                0, self.max_requests_jitter
+            )
+        return self._worker_limit if self._limit is not None else None
+
+    @limit_max_requests.setter
+    def limit_max_requests(self, limit: int | None) -> None:
+        self._limit = limit
+        self._limit_pid = None
+
+
+def serve(
+    host: str | None = None,
+    port: int | None = None,
+    workers: int | None = None,
+    connection_budget: int | None = None,
+    keep_alive: int | None = None,
+    backlog: int | None = None,
+    max_requests: int | None = None,
+) -> None:
+    """
+    Run the API with the given server options, falling back to the settings.
+    """
+    from uvicorn.supervisors import Multiprocess
+
+    settings = get_settings()
+    workers = resolve_workers(
+        settings.SERVER_WORKERS if workers is None else workers
+    )
+    sizing = compute_pool_sizing(
+        settings.DB_CONNECTION_BUDGET if connection_budget is None else connection_budget,
+        workers,
+    )
+    max_requests = settings.SERVER_MAX_REQUESTS if max_requests is None else max_requests
+
+    # the workers are separate interpreters that read their pool size from
+    # the environment
+    os.environ["DB_POOL_SIZE"] = str(sizing.pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(sizing.max_overflow)
+
+    # preload: import the app in the supervisor first so that configuration
+    # and import errors fail fast instead of crash-looping every worker
+    from .main import app  # noqa: F401
+
+    config = RecyclingConfig(
+        "app.main:app",
+        host=settings.SERVER_HOST if host is None else host,
+        port=settings.SERVER_PORT if port is None else port,
+        workers=workers,
+        backlog=settings.SERVER_BACKLOG if backlog is None else backlog,
+        timeout_keep_alive=settings.SERVER_KEEP_ALIVE if keep_alive is None else keep_alive,
+        limit_max_requests=recycle_limit(max_requests, workers),
+        max_requests_jitter=settings.SERVER_MAX_REQUESTS_JITTER,
+        proxy_headers=True,
+    )
+    # what uvicorn.run does, which can't be given a configuration
+    server = uvicorn.Server(config)
+    if config.workers > 1:
+        sock = config.bind_socket()
+        Multiprocess(config, target=server.run, sockets=[sock]).run()
+    else:
+        server.run()
@@ -0,0 +1,103 @@
+from functools import lru_cache
+from typing import Annotated, Iterator, List
+
+from fastapi import Depends
+
+from ..cld_media.storage import StorageBackend
+from ..cld_media.window_cache import WindowCache
+from ..core import events, metrics
+from ..core.tracing import traced_class
+from ..models.book import Book
+from ..repository.book_repository import BookRepository
+from ..repository.factory import get_book_repo
+from ..schemas.book import CreateBook
+from ..schemas.config import get_settings
+
+
+@lru_cache
+def get_window_cache() -> WindowCache:
+    """
+    Returns the book window cache of this process, created on first use.
+    """
+    settings = get_settings()
+    cache = WindowCache(
+        window_size=settings.BOOK_WINDOW_SIZE, max_bytes=settings.BOOK_CACHE_BYTES
+    )
+    metrics.register(
+        "tbc_book_cache_bytes",
+        "gauge",
+        "Bytes of book windows held in memory.",
+        lambda: [({}, cache.size)],
+    )
+    metrics.register(
+        "tbc_book_cache_requests_total",
+        "counter",
+        "Book window lookups by result.",
+        lambda: [({"result": "hit"}, cache.hits), ({"result": "miss"}, cache.misses)],
+    )
+    return cache
+
+
+@traced_class
+class BookService:
+    """
+    Business logic for Book repository.
+    """
+
+    def __init__(
+        self,
+        repo: Annotated[BookRepository, Depends(get_book_repo)],
+        cache: Annotated[WindowCache, Depends(get_window_cache)],
+    ) -> None:
+        self.repo = repo
+        self.cache = cache
+
+    def insert_book(self, book: CreateBook) -> bool:
+        """
+        Insert book object to db.
+        """
+        new_book = Book(**book.model_dump())
+        result = self.repo.insert_book(new_book)
+        if result:
+            events.publish("book", action="created", id=new_book.id)
+        return result
+
+    def get_published_books(self, limit: int, offset: int) -> List[Book]:
+        """
+        Returns a list of published books.
+        """
+        return self.repo.query_published(limit=limit, offset=offset)
+
+    def get_book(self, id: int) -> Book | None:
+        """
+        Return a single book.
+        """
+        return self.repo.query_by_id(id)
+
+    def set_published(self, id: int, is_published: bool) -> bool:
+        """
+        Publish or unpublish a book.
+        """
+        result = self.repo.update_published(id, is_published)
+        if result:
+            events.publish("book", action="updated", id=id)
+        return result
+
+    def delete_book(self, id: int) -> bool:
+        """
+        Delete book with the given Id.
+        """
+        result = self.repo.delete_book(id)
+        if result:
+            events.publish("book", action="deleted", id=id)
+        return result
+
+    def read_file(
+        self, book: Book, storage: StorageBackend, start: int, end: int
+    ) -> Iterator[bytes]:
+        """
+        Yield a byte range of the book file through the window cache.
+        """
+        return self.cache.read(
+            storage, book.cld_book_public_id, "raw", book.file_size, start, end
+        )
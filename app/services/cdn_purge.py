@@ -0,0 +1,157 @@
+"""
+Purging of CDN cached public responses after content changes.
+
+The purge queue subscribes to content change events and collects the
+surrogate keys of the responses a change makes stale. Keys are coalesced
+and handed to the configured purger in batches, so a burst of writes
+costs one purge request and never delays the request that made them.
+"""
+
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Iterable
+
+import httpx
+
+from ..core import events, metrics
+from ..core.write_behind import BatchBuffer
+from ..schemas.config import get_settings
+from ..utils.http_cache import surrogate_key
+
+
+class CdnPurger(ABC):
+    """
+    Invalidates cached responses by surrogate key.
+    """
+
+    @abstractmethod
+    def purge(self, keys: Iterable[str]) -> None:
+        """
+        Purge every cached response tagged with one of keys.
+        """
+
+
+class NullPurger(CdnPurger):
+    """
+    Purger for deployments without a CDN.
+    """
+
+    def purge(self, keys: Iterable[str]) -> None:
+        pass
+
+
+class RecordingPurger(CdnPurger):
+    """
+    Local stand-in for a CDN that records the purges it receives.
+    """
+
+    def __init__(self) -> None:
+        self.purged: list[set[str]] = []
+
+    def purge(self, keys: Iterable[str]) -> None:
+        self.purged.append(set(keys))
+
+
+class HttpPurger(CdnPurger):
+    """
+    Purger posting the keys to a purge endpoint as
+    ``{"surrogate_keys": [...]}``.
+
+    Args:
+        url (str): The purge endpoint of the CDN.
+        token (str): Sent as bearer token.
+        timeout (float): Seconds to wait for the CDN.
+    """
+
+    def __init__(self, url: str, token: str = "", timeout: float = 10.0) -> None:
+        self.url = url
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self._client = httpx.Client(headers=headers, timeout=timeout)
+
+    def purge(self, keys: Iterable[str]) -> None:
+        response = self._client.post(self.url, json={"surrogate_keys": sorted(keys)})
+        response.raise_for_status()
+
+
+def keys_for_event(topic: str, payload: dict[str, Any]) -> list[str]:
+    """
+    Return the surrogate keys of the cached responses a change makes stale.
+
+    Lists are tagged with every item they contain, so an update only has to
+    purge its item; creates and deletes also change which items the lists
+    hold.
+    """
+    keys = [surrogate_key(topic, payload.get("id"))]
+    if payload.get("action") != "updated":
+        keys.append(surrogate_key(topic))
+    return keys
+
+
+class PurgeQueue(BatchBuffer[set[str]]):
+    """
+    Coalesces surrogate keys and purges them in batches.
+    """
+
+    def __init__(self, purger: CdnPurger, interval: float, max_pending: int) -> None:
+        super().__init__(interval, max_pending)
+        self.purger = purger
+
+    def new_batch(self) -> set[str]:
+        return set()
+
+    def merge(self, batch: set[str], failed: set[str]) -> None:
+        batch.update(failed)
+
+    def write(self, batch: set[str]) -> None:
+        self.purger.purge(batch)
+
+    def add(self, keys: list[str]) -> None:
+        """
+        Queue keys for the next purge, may be called from any thread.
+        """
+        self._record(lambda batch: batch.update(keys), len(keys))
+
+    def on_event(self, topic: str, payload: dict[str, Any]) -> None:
+        """
+        Events hub callback, may run in any thread.
+        """
+        self.add(keys_for_event(topic, payload))
+
+
+def create_purger() -> CdnPurger:
+    """
+    Returns the purger configured in the settings.
+    """
+    settings = get_settings()
+    if settings.CDN_PURGE_URL:
+        return HttpPurger(settings.CDN_PURGE_URL, settings.CDN_PURGE_TOKEN)
+    return NullPurger()
+
+
+@lru_cache
+def get_purge_queue() -> PurgeQueue:
+    """
+    Returns the purge queue of this process, subscribed to content changes.
+    """
+    settings = get_settings()
+    queue = PurgeQueue(
+        create_purger(),
+        interval=settings.CDN_PURGE_INTERVAL,
+        max_pending=settings.CDN_PURGE_MAX_PENDING,
+    )
+    for topic in events.CONTENT_TOPICS:
+        events.subscribe(topic, queue.on_event)
+
+    metrics.register(
+        "tbc_cdn_purge_keys_pending",
+        "gauge",
+        "Surrogate keys waiting to be purged.",
+        lambda: [({}, queue.pending)],
+    )
+    metrics.register(
+        "tbc_cdn_purge_failures_total",
+        "counter",
+        "Purge requests that failed and were retried.",
+        lambda: [({}, queue.failures)],
+    )
+    return queue
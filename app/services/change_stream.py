@@ -0,0 +1,319 @@
+"""
+Live stream of content changes for Server-Sent Events clients.
+
+The events hub only reaches the publishing process, so every process
+appends the changes it publishes to the content_changes table and polls
+the changes of all of them from it. One broadcaster per process is fed by
+that poll and fans every change out to the connected clients. Each event is encoded once and put on
+the bounded queue of every subscriber; a subscriber whose queue is full is
+evicted rather than slowing down the others, and picks up where it left
+off after reconnecting with Last-Event-ID as long as the missed events are
+still in the replay buffer. Idle subscribers only hold a queue and a
+suspended coroutine, keepalives for all of them come from a single task.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import secrets
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from functools import lru_cache
+from typing import Any, AsyncIterator
+
+from ..core import events, metrics
+from ..db.database import new_session
+from ..repository.content_change_repository import ContentChangeRepository
+from ..schemas.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+KEEPALIVE = b": keepalive\n\n"
+# tells a client its Last-Event-ID can't be resumed, it should reload
+RESET = b"event: reset\ndata: {}\n\n"
+
+
+class TooManySubscribers(Exception):
+    """
+    Raised when the process already serves the maximum number of streams.
+    """
+
+
+class Subscription:
+    """
+    The queue of encoded events waiting to be sent to one client.
+    """
+
+    __slots__ = ("queue", "last_seq")
+
+    def __init__(self, queue_size: int, last_seq: int) -> None:
+        self.queue: asyncio.Queue[bytes | None] = asyncio.Queue(queue_size)
+        # sequence number of the last event queued, events are never
+        # queued twice when a replay and a live delivery overlap
+        self.last_seq = last_seq
+
+    def close(self) -> None:
+        """
+        End the stream, dropping what is still queued.
+        """
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class ChangeBroadcaster:
+    """
+    Fans content change events out to Server-Sent Events subscribers.
+
+    Args:
+        queue_size (int): Events buffered per subscriber before it is evicted.
+        replay_size (int): Most recent events kept for resuming streams.
+        max_subscribers (int): Streams served at most by this process.
+    """
+
+    def __init__(self, queue_size: int, replay_size: int, max_subscribers: int) -> None:
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        # event ids are only meaningful to the process that issued them
+        self.epoch = secrets.token_hex(4)
+        self.published = 0
+        self.evicted = 0
+        self._seq = 0
+        self._replay: deque[tuple[int, bytes]] = deque(maxlen=replay_size)
+        self._lock = threading.Lock()
+        self._subscribers: set[Subscription] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def on_event(self, topic: str, payload: dict[str, Any]) -> None:
+        """
+        Events hub callback, may run in any thread.
+        """
+        data = json.dumps(payload, default=str)
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            frame = f"id: {self.epoch}-{seq}\nevent: {topic}\ndata: {data}\n\n".encode()
+            self._replay.append((seq, frame))
+            self.published += 1
+            loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._deliver, seq, frame)
+
+    def _deliver(self, seq: int, frame: bytes) -> None:
+        for subscription in list(self._subscribers):
+            if seq <= subscription.last_seq:
+                continue
+            try:
+                subscription.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # a slow consumer, it resumes from the replay buffer
+                self.evicted += 1
+                self.unsubscribe(subscription)
+                subscription.close()
+                continue
+            subscription.last_seq = seq
+
+    def _resume_point(self, last_event_id: str | None) -> int | None:
+        """
+        Return the sequence number to replay after, or None if the events
+        after last_event_id are no longer known.
+        """
+        epoch, _, seq = (last_event_id or "").partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        oldest = self._replay[0][0] if self._replay else self._seq + 1
+        if seq < oldest - 1 or seq > self._seq:
+            return None
+        return seq
+
+    def subscribe(self, last_event_id: str | None = None) -> Subscription:
+        """
+        Register a subscriber, queueing the events it missed since
+        last_event_id.
+        """
+        if len(self._subscribers) >= self.max_subscribers:
+            raise TooManySubscribers()
+        self._loop = asyncio.get_running_loop()
+
+        with self._lock:
+            resume = self._resume_point(last_event_id) if last_event_id else None
+            missed = [
+                frame for seq, frame in self._replay if resume is not None and seq > resume
+            ]
+            current = self._seq
+
+        # the replay may be larger than the queue
+        subscription = Subscription(max(self.queue_size, len(missed) + 2), current)
+        # spread the reconnects of all clients after a restart
+        retry = random.randint(2000, 7000)
+        subscription.queue.put_nowait(f"retry: {retry}\n\n".encode())
+        if last_event_id and resume is None:
+            subscription.queue.put_nowait(RESET)
+        for frame in missed:
+            subscription.queue.put_nowait(frame)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    async def stream(self, subscription: Subscription) -> AsyncIterator[bytes]:
+        """
+        Yield the encoded events of a subscription until it is closed.
+        """
+        try:
+            while (frame := await subscription.queue.get()) is not None:
+                yield frame
+        finally:
+            self.unsubscribe(subscription)
+
+    async def run(self, keepalive: float) -> None:
+        """
+        Send a comment to every idle subscriber each keepalive seconds, so
+        proxies don't drop the connections.
+        """
+        while True:
+            await asyncio.sleep(keepalive)
+            for subscription in list(self._subscribers):
+                if subscription.queue.empty():
+                    subscription.queue.put_nowait(KEEPALIVE)
+
+    def close(self) -> None:
+        """
+        End every stream, e.g. on shutdown.
+        """
+        for subscription in list(self._subscribers):
+            self.unsubscribe(subscription)
+            subscription.close()
+
+
+class ChangeFeed:
+    """Shares content changes between processes through the content_changes
+    table.
+
+    Args:
+        broadcaster (ChangeBroadcaster): Receives the changes of every process.
+        settle (timedelta): Changes are passed on once they were inserted
+            this long ago, so one whose insert commits late isn't skipped.
+        retention (timedelta): Changes older than this are deleted.
+        batch_size (int): Changes read per poll at most.
+    """
+
+    # seconds between deletes of old changes
+    PRUNE_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        broadcaster: ChangeBroadcaster,
+        settle: timedelta,
+        retention: timedelta,
+        batch_size: int = 500,
+    ) -> None:
+        self.broadcaster = broadcaster
+        self.settle = settle
+        self.retention = retention
+        self.batch_size = batch_size
+        # the last change passed on, None until the first poll
+        self.last_id: int | None = None
+        self._pruned = 0.0
+
+    def record(self, topic: str, payload: dict[str, Any]) -> None:
+        """
+        Events hub callback, appends a change published by this process.
+        """
+        with new_session() as sess:
+            ContentChangeRepository(sess).append(topic, payload)
+
+    def poll_once(self) -> int:
+        """
+        Pass the changes appended since the last poll to the broadcaster.
+        Returns the number of changes passed on.
+        """
+        with new_session() as sess:
+            repo = ContentChangeRepository(sess)
+            if self.last_id is None:
+                # streams start with the changes made after the process
+                self.last_id = repo.last_settled_id(self.settle)
+                return 0
+            if time.monotonic() - self._pruned >= self.PRUNE_INTERVAL:
+                repo.prune(self.retention)
+                self._pruned = time.monotonic()
+            changes = repo.query_after(self.last_id, self.settle, self.batch_size)
+            changes = [(c.id, c.topic, json.loads(c.payload)) for c in changes]
+
+        for id, topic, payload in changes:
+            self.broadcaster.on_event(topic, payload)
+            self.last_id = id
+        return len(changes)
+
+    async def run(self, interval: float) -> None:
+        """
+        Record the changes of this process and poll for the changes of all
+        of them each interval seconds, until cancelled.
+        """
+        for topic in events.CONTENT_TOPICS:
+            events.subscribe(topic, self.record)
+        try:
+            while True:
+                try:
+                    # a full batch means more are waiting
+                    while (
+                        await asyncio.to_thread(self.poll_once)
+                    ) >= self.batch_size:
+                        pass
+                except Exception:
+                    logger.exception("polling content changes failed")
+                await asyncio.sleep(interval)
+        finally:
+            for topic in events.CONTENT_TOPICS:
+                events.unsubscribe(topic, self.record)
+
+
+@lru_cache
+def get_broadcaster() -> ChangeBroadcaster:
+    """
+    Returns the change broadcaster of this process, fed by get_change_feed.
+    """
+    settings = get_settings()
+    broadcaster = ChangeBroadcaster(
+        queue_size=settings.SSE_QUEUE_SIZE,
+        replay_size=settings.SSE_REPLAY_SIZE,
+        max_subscribers=settings.SSE_MAX_SUBSCRIBERS,
+    )
+
+    metrics.register(
+        "tbc_sse_subscribers",
+        "gauge",
+        "Clients connected to the change stream.",
+        lambda: [({}, broadcaster.subscribers)],
+    )
+    metrics.register(
+        "tbc_sse_evicted_total",
+        "counter",
+        "Change stream clients dropped for not keeping up.",
+        lambda: [({}, broadcaster.evicted)],
+    )
+    return broadcaster
+
+
+@lru_cache
+def get_change_feed() -> ChangeFeed:
+    """
+    Returns the change feed of this process, it records and polls changes
+    while it runs.
+    """
+    settings = get_settings()
+    return ChangeFeed(
+        get_broadcaster(),
+        settle=timedelta(seconds=settings.SSE_CHANGE_SETTLE),
+        retention=timedelta(seconds=settings.SSE_CHANGE_RETENTION),
+    )
@@ -0,0 +1,114 @@
+"""
+Streaming exports of users, sermons and podcasts.
+
+Rows are encoded as they are fetched from a server side cursor and handed
+out in chunks of about CHUNK_SIZE bytes, so memory use depends on the batch
+size and not on the size of the table.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Iterable, Iterator, Literal
+
+from sqlalchemy import Row
+
+from ..core.tracing import traced_class
+from ..models import Podcast, Sermon, User
+from ..repository.export_repository import stream_rows
+from ..schemas.config import get_settings
+
+ExportKind = Literal["users", "sermons", "podcasts"]
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+CHUNK_SIZE = 64 * 1024
+
+# password hashes and media public ids are never exported
+EXPORT_COLUMNS = {
+    "users": (
+        User.id,
+        User.username,
+        User.email,
+        User.is_active,
+        User.is_admin,
+        User.created_at,
+    ),
+    "sermons": (
+        Sermon.id,
+        Sermon.theme,
+        Sermon.minister,
+        Sermon.short_note,
+        Sermon.cover_image,
+        Sermon.audio_file,
+        Sermon.user_id,
+    ),
+    "podcasts": (
+        Podcast.id,
+        Podcast.podcast_title,
+        Podcast.running_episodes,
+        Podcast.cover_image,
+        Podcast.user_id,
+        Podcast.created_at,
+    ),
+}
+
+
+def _value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def ndjson_chunks(rows: Iterable[Row], fields: list[str]) -> Iterator[bytes]:
+    """
+    Encode rows as one JSON object per line.
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        json.dump({field: _value(value) for field, value in zip(fields, row)}, buffer)
+        buffer.write("\n")
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def csv_chunks(rows: Iterable[Row], fields: list[str]) -> Iterator[bytes]:
+    """
+    Encode rows as CSV with a header line.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([_value(value) for value in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+ENCODERS = {"ndjson": ndjson_chunks, "csv": csv_chunks}
+
+
+@traced_class
+class ExportService:
+    """
+    Business logic for exports.
+    """
+
+    def export(self, kind: ExportKind, format: ExportFormat) -> Iterator[bytes]:
+        """
+        Returns the encoded rows of kind, nothing is read before the first
+        chunk is requested.
+        """
+        columns = EXPORT_COLUMNS[kind]
+        rows = stream_rows(columns, get_settings().EXPORT_BATCH_SIZE)
+        return ENCODERS[format](rows, [column.key for column in columns])
@@ -10,6 +10,11 @@ from ..services.sermon_service import SermonService
 from ..services.podcast_service import PodcastService
 from ..services.sermon_service import SermonService
 from .user_service import UserService
+from .media_stats_service import MediaStatsService
+from .listening_service import ListeningService
+from .feed_service import FeedService
+from .book_service import BookService
+from .export_service import ExportService
 
 
 def get_user_service(
@@ -29,3 +34,29 @@ def get_podcast_service(
 
 def get_sermon_service(repo: Annotated[SermonService, Depends(SermonService)]):
     return repo
+
+
+def get_media_stats_service(
+    repo: Annotated[MediaStatsService, Depends(MediaStatsService)],
+) -> MediaStatsService:
+    return repo
+
+
+def get_listening_service(
+    repo: Annotated[ListeningService, Depends(ListeningService)],
+) -> ListeningService:
+    return repo
+
+
+def get_feed_service(
+    repo: Annotated[FeedService, Depends(FeedService)],
+) -> FeedService:
+    return repo
+
+
+def get_book_service(repo: Annotated[BookService, Depends(BookService)]):
+    return repo
+
+
+def get_export_service(repo: Annotated[ExportService, Depends(ExportService)]):
+    return repo
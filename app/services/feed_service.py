@@ -0,0 +1,102 @@
+import threading
+import time
+from functools import lru_cache
+from typing import Annotated, Any
+
+from fastapi import Depends
+
+from ..cld_media.storage import StorageBackend, get_storage
+from ..core import events
+from ..core.tracing import traced_class
+from ..repository.feed_repository import FeedRepository
+from ..schemas.config import get_settings
+from ..schemas.feed import Feed, FeedItem
+from ..schemas.media import CoverImage
+
+
+class FeedCache:
+    """Serialized home feeds keyed by item limit.
+
+    Entries are dropped as soon as content changes in this process and
+    expire after ttl seconds to pick up changes made by other workers.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[int, tuple[float, bytes]] = {}
+        # bumped by every invalidation, so a feed built from data read
+        # before a change is never stored
+        self.generation = 0
+
+    def get(self, limit: int) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(limit)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, limit: int, body: bytes, generation: int) -> None:
+        with self._lock:
+            if generation == self.generation:
+                self._entries[limit] = (time.monotonic() + self.ttl, body)
+
+    def invalidate(self, topic: str = "", payload: dict[str, Any] | None = None) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def on_event(self, topic: str, payload: dict[str, Any]) -> None:
+        """
+        Events hub callback.
+        """
+        self.invalidate()
+
+
+@lru_cache
+def get_feed_cache() -> FeedCache:
+    """
+    Returns the feed cache of this process, subscribed to content changes.
+    """
+    cache = FeedCache(get_settings().FEED_CACHE_TTL)
+    for topic in events.CONTENT_TOPICS:
+        events.subscribe(topic, cache.on_event)
+    return cache
+
+
+@traced_class
+class FeedService:
+    """
+    Business logic for the home feed.
+    """
+
+    def __init__(
+        self,
+        repo: Annotated[FeedRepository, Depends(FeedRepository)],
+        cache: Annotated[FeedCache, Depends(get_feed_cache)],
+        storage: Annotated[StorageBackend, Depends(get_storage)],
+    ) -> None:
+        self.repo = repo
+        self.cache = cache
+        self.storage = storage
+
+    def get_feed(self, limit: int) -> bytes:
+        """
+        Return the serialized feed with up to limit items of every type.
+        """
+        body = self.cache.get(limit)
+        if body is not None:
+            return body
+
+        generation = self.cache.generation
+        feed = Feed()
+        for row in self.repo.query_latest(limit):
+            item = FeedItem.model_validate(row, from_attributes=True)
+            item.cover = CoverImage.from_storage(
+                self.storage, row.cld_image_public_id, row.cover_image
+            )
+            getattr(feed, f"{row.kind}s").append(item)
+
+        body = feed.model_dump_json().encode()
+        self.cache.put(limit, body, generation)
+        return body
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Annotated, Any, List
+
+from fastapi import Depends
+
+from ..core import metrics
+from ..core.tracing import traced_class
+from ..core.write_behind import BatchBuffer
+from ..db.database import new_session
+from ..models.listening import ListeningHourly, ListeningRetention
+from ..repository.listening_repository import ListeningRepository
+from ..schemas.config import get_settings
+from ..schemas.listening import ListeningEventIn
+
+logger = logging.getLogger(__name__)
+
+
+class ListeningEventBuffer(BatchBuffer[List[dict[str, Any]]]):
+    """Collects listening events and appends them with one bulk insert.
+
+    Args:
+        max_buffered (int): Events held at most, newer ones are dropped
+            while the database can't keep up.
+    """
+
+    def __init__(self, interval: float, max_pending: int, max_buffered: int) -> None:
+        super().__init__(interval, max_pending)
+        self.max_buffered = max_buffered
+        self.dropped = 0
+
+    def new_batch(self) -> List[dict[str, Any]]:
+        return []
+
+    def merge(self, batch, failed) -> None:
+        batch[:0] = failed
+
+    def write(self, batch) -> None:
+        with new_session() as sess:
+            ListeningRepository(sess).insert_events(batch)
+
+    def record(self, events: List[ListeningEventIn]) -> int:
+        """
+        Buffer events, returns how many were accepted.
+        """
+        room = self.max_buffered - self.pending
+        accepted = events[: max(room, 0)]
+        self.dropped += len(events) - len(accepted)
+        if not accepted:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        rows = [{**event.model_dump(), "occurred_at": now} for event in accepted]
+        self._record(lambda batch: batch.extend(rows), len(rows))
+        return len(rows)
+
+
+@lru_cache
+def get_listening_buffer() -> ListeningEventBuffer:
+    """
+    Returns the listening event buffer of this process, created on first use.
+    """
+    settings = get_settings()
+    buffer = ListeningEventBuffer(
+        interval=settings.ANALYTICS_FLUSH_INTERVAL,
+        max_pending=settings.ANALYTICS_MAX_PENDING,
+        max_buffered=settings.ANALYTICS_MAX_BUFFERED,
+    )
+    metrics.register(
+        "tbc_listening_events_pending",
+        "gauge",
+        "Listening events waiting to be inserted.",
+        lambda: [({}, buffer.pending)],
+    )
+    metrics.register(
+        "tbc_listening_events_flushed_total",
+        "counter",
+        "Listening events inserted.",
+        lambda: [({}, buffer.flushed)],
+    )
+    metrics.register(
+        "tbc_listening_events_dropped_total",
+        "counter",
+        "Listening events dropped because the buffer was full.",
+        lambda: [({}, buffer.dropped)],
+    )
+    return buffer
+
+
+class ListeningRollup:
+    """Periodically aggregates new listening events into the rollup tables.
+
+    Args:
+        batch_size (int): Events aggregated per transaction.
+        settle (timedelta): Events younger than this are left for the next run.
+    """
+
+    def __init__(self, batch_size: int, settle: timedelta) -> None:
+        self.batch_size = batch_size
+        self.settle = settle
+
+    def run_once(self) -> int:
+        """
+        Aggregate every event that is due. Returns the number of events.
+        """
+        total = 0
+        while True:
+            with new_session() as sess:
+                count = ListeningRepository(sess).rollup(self.batch_size, self.settle)
+            total += count
+            if count < self.batch_size:
+                return total
+
+    async def run(self, interval: float) -> None:
+        """
+        Run the rollup every interval seconds until cancelled.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception:
+                logger.exception("listening rollup failed")
+
+
+def create_rollup() -> ListeningRollup:
+    """
+    Returns a rollup job configured from the settings.
+    """
+    settings = get_settings()
+    return ListeningRollup(
+        batch_size=settings.ANALYTICS_ROLLUP_BATCH_SIZE,
+        settle=timedelta(seconds=settings.ANALYTICS_ROLLUP_SETTLE),
+    )
+
+
+@traced_class
+class ListeningService:
+    """
+    Business logic for listening analytics. Reads only use the rollups.
+    """
+
+    def __init__(
+        self,
+        repo: Annotated[ListeningRepository, Depends(ListeningRepository)],
+        buffer: Annotated[ListeningEventBuffer, Depends(get_listening_buffer)],
+    ) -> None:
+        self.repo = repo
+        self.buffer = buffer
+
+    def record_events(self, events: List[ListeningEventIn]) -> int:
+        """
+        Buffer listening events for the next bulk insert.
+        """
+        return self.buffer.record(events)
+
+    def get_retention(self, sermon_id: int) -> List[ListeningRetention]:
+        """
+        Return the retention histogram of a sermon.
+        """
+        return self.repo.query_retention(sermon_id)
+
+    def get_hourly(
+        self, sermon_id: int, since: datetime, until: datetime
+    ) -> List[ListeningHourly]:
+        """
+        Return the hourly listening totals of a sermon.
+        """
+        return self.repo.query_hourly(sermon_id, since, until)
@@ -0,0 +1,161 @@
+"""
+Background drainer for the media deletion outbox.
+
+Deleting a sermon or replacing its files only writes outbox rows in the same
+transaction as the row change. The drainer picks the rows up in batches and
+removes the files with one bulk delete call per batch, retrying failures
+with an exponential backoff. Files referenced by a row again by then are
+kept.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from itertools import chain
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from ..cld_media.storage import StorageBackend, get_storage
+from ..core import metrics
+from ..core.constants import MAX_BULK_DELETE
+from ..db.database import new_session
+from ..repository.media_outbox_repository import MediaOutboxRepository
+from ..schemas.config import get_settings
+from .media_reconciler import REFERENCE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+# a claimed batch is retried by another worker if it isn't settled in time
+CLAIM_LEASE = timedelta(minutes=5)
+MAX_RETRY_DELAY = 3600
+
+
+class MediaDeletionDrainer:
+    """Deletes the media files recorded in the outbox.
+
+    Args:
+        storage (Callable): Returns the storage backend to delete from.
+        session (Callable): Returns a new database session.
+        batch_size (int): Rows handled per round, at most 100.
+        max_attempts (int): Attempts before a deletion is given up.
+        retry_delay (int): Delay in seconds before the first retry.
+    """
+
+    def __init__(
+        self,
+        storage: Callable[[], StorageBackend] = get_storage,
+        session: Callable[[], Session] = new_session,
+        batch_size: int = MAX_BULK_DELETE,
+        max_attempts: int = 8,
+        retry_delay: int = 30,
+    ) -> None:
+        self.storage = storage
+        self.session = session
+        self.batch_size = min(batch_size, MAX_BULK_DELETE)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.deleted = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def _backoff(self, attempts: int) -> timedelta:
+        return timedelta(
+            seconds=min(self.retry_delay * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY)
+        )
+
+    def drain_once(self) -> int:
+        """
+        Handle one batch of due deletions. Returns the number of rows claimed.
+        """
+        with self.session() as sess:
+            repo = MediaOutboxRepository(sess)
+            rows = repo.claim_due(self.batch_size, self.max_attempts, CLAIM_LEASE)
+            if not rows:
+                return 0
+
+            # public ids derive from the file name, a file uploaded again
+            # under the same name since the delete is in use again
+            in_use = repo.referenced(
+                list({row.public_id for row in rows}),
+                chain.from_iterable(REFERENCE_COLUMNS.values()),
+            )
+            if in_use:
+                repo.complete([row.id for row in rows if row.public_id in in_use])
+                self.skipped += sum(row.public_id in in_use for row in rows)
+
+            by_type = defaultdict(list)
+            for row in rows:
+                if row.public_id in in_use:
+                    continue
+                by_type[row.resource_type].append(row)
+
+            storage = self.storage()
+            for resource_type, group in by_type.items():
+                # attempts is already counted up by the claim
+                delay = self._backoff(group[0].attempts + 1)
+                ids = [row.id for row in group]
+                try:
+                    gone = storage.delete_many(
+                        [row.public_id for row in group], resource_type=resource_type
+                    )
+                except Exception as e:
+                    repo.reschedule(ids, repr(e), delay)
+                    self.failed += len(ids)
+                    continue
+
+                done = [row.id for row in group if row.public_id in gone]
+                left = [row.id for row in group if row.public_id not in gone]
+                repo.complete(done)
+                repo.reschedule(left, "file was not deleted", delay)
+                self.deleted += len(done)
+                self.failed += len(left)
+
+            return len(rows)
+
+    async def run(self, interval: float) -> None:
+        """
+        Drain the outbox until cancelled, polling every interval seconds once
+        it is empty.
+        """
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self.drain_once)
+            except Exception:
+                logger.exception("draining the media outbox failed")
+                claimed = 0
+            if claimed < self.batch_size:
+                await asyncio.sleep(interval)
+
+
+def create_drainer() -> MediaDeletionDrainer:
+    """
+    Returns a drainer configured from the settings, with its metrics registered.
+    """
+    settings = get_settings()
+    drainer = MediaDeletionDrainer(
+        batch_size=settings.MEDIA_OUTBOX_BATCH_SIZE,
+        max_attempts=settings.MEDIA_OUTBOX_MAX_ATTEMPTS,
+        retry_delay=settings.MEDIA_OUTBOX_RETRY_DELAY,
+    )
+    metrics.register(
+        "tbc_media_deletions_total",
+        "counter",
+        "Media files deleted from the outbox.",
+        lambda: [({}, drainer.deleted)],
+    )
+    metrics.register(
+        "tbc_media_deletions_skipped_total",
+        "counter",
+        "Media deletions dropped because the file was in use again.",
+        lambda: [({}, drainer.skipped)],
+    )
+    metrics.register(
+        "tbc_media_deletion_failures_total",
+        "counter",
+        "Media deletions from the outbox that failed and will be retried.",
+        lambda: [({}, drainer.failed)],
+    )
+    return drainer
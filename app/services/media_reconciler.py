@@ -0,0 +1,160 @@
+"""
+Finds media files in storage that no database row references.
+
+Uploads that succeeded for a create or update that then failed leave files
+behind that nothing points to. The reconciler pages through the media
+folders, a few folders at a time, and compares every file against the set of
+public ids referenced by the database, so only one page per folder being
+scanned is held in memory besides that set.
+"""
+
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import chain
+from typing import Callable, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..cld_media.storage import RemoteAsset, StorageBackend
+from ..core.constants import MAX_BULK_DELETE
+from ..models import Book, PodcastEpisode, Podcast, Sermon
+
+
+# the columns referencing the media of every folder the routers upload into
+REFERENCE_COLUMNS = {
+    "sermon": (Sermon.cld_image_public_id, Sermon.cld_audio_public_id),
+    "podcast": (
+        Podcast.cld_image_public_id,
+        Podcast.cld_video_public_id,
+        PodcastEpisode.cld_video_public_id,
+    ),
+    "book": (Book.cld_image_public_id, Book.cld_book_public_id),
+}
+
+MEDIA_ROOT_FOLDERS = tuple(REFERENCE_COLUMNS)
+
+
+@dataclass
+class ReconcileReport:
+    """
+    Totals of a reconciler run.
+    """
+
+    folders: int = 0
+    scanned: int = 0
+    orphaned: int = 0
+    deleted: int = 0
+
+
+def referenced_public_ids(sess: Session) -> set[str]:
+    """
+    Return the public id of every media file referenced by a row.
+    """
+    referenced: set[str] = set()
+    for column in chain.from_iterable(REFERENCE_COLUMNS.values()):
+        rows = sess.scalars(
+            select(column)
+            .where(column.is_not(None))
+            .execution_options(yield_per=1000)
+        )
+        referenced.update(rows)
+    return referenced
+
+
+async def reconcile_media(
+    storage: StorageBackend,
+    referenced: set[str],
+    *,
+    roots: Iterable[str] = MEDIA_ROOT_FOLDERS,
+    grace: timedelta = timedelta(hours=24),
+    delete: bool = False,
+    concurrency: int = 4,
+    on_orphan: Callable[[RemoteAsset], None] | None = None,
+) -> ReconcileReport:
+    """Report, and optionally delete, the files nothing references.
+
+    Args:
+        storage (StorageBackend): The storage to scan.
+        referenced (set[str]): Public ids that are in use.
+        roots (Iterable[str]): Folders to scan, with their subfolders.
+        grace (timedelta): Files younger than this are skipped, they may
+            belong to a create that is still running.
+        delete (bool): Delete the orphans instead of only reporting them.
+        concurrency (int): Folders listed at the same time.
+        on_orphan (Callable): Called with every orphan found.
+
+    Returns:
+        ReconcileReport: What was scanned, found and deleted.
+
+    Raises:
+        ValueError: When a folder isn't below a root folder whose
+            referencing columns are known, its files would all look orphaned.
+    """
+    roots = list(roots)
+    for root in roots:
+        if root.split("/")[0] not in REFERENCE_COLUMNS:
+            raise ValueError(f"No known column references the media in {root!r}")
+
+    report = ReconcileReport()
+    cutoff = datetime.now(timezone.utc) - grace
+
+    folders: set[str] = set()
+    for root in roots:
+        folders.update(await asyncio.to_thread(storage.list_folders, root))
+    report.folders = len(folders)
+
+    # pages travel through a bounded queue so slow deletes hold back listing
+    pages: asyncio.Queue[list[RemoteAsset] | None] = asyncio.Queue(concurrency * 2)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def scan(folder: str) -> None:
+        async with slots:
+            cursor = None
+            while True:
+                assets, cursor = await asyncio.to_thread(
+                    storage.list_assets, folder, cursor
+                )
+                await pages.put(assets)
+                if cursor is None:
+                    return
+
+    async def produce() -> None:
+        try:
+            await asyncio.gather(*(scan(folder) for folder in sorted(folders)))
+        finally:
+            await pages.put(None)
+
+    pending: dict[str, list[str]] = defaultdict(list)
+
+    async def flush(resource_type: str) -> None:
+        public_ids = pending.pop(resource_type, [])
+        if public_ids:
+            gone = await asyncio.to_thread(
+                storage.delete_many, public_ids, resource_type
+            )
+            report.deleted += len(gone)
+
+    producer = asyncio.create_task(produce())
+    while (assets := await pages.get()) is not None:
+        for asset in assets:
+            report.scanned += 1
+            if asset.public_id in referenced or asset.created_at > cutoff:
+                continue
+
+            report.orphaned += 1
+            if on_orphan is not None:
+                on_orphan(asset)
+            if delete:
+                pending[asset.resource_type].append(asset.public_id)
+                if len(pending[asset.resource_type]) >= MAX_BULK_DELETE:
+                    await flush(asset.resource_type)
+
+    # surface listing errors
+    await producer
+    for resource_type in list(pending):
+        await flush(resource_type)
+
+    return report
@@ -0,0 +1,137 @@
+from functools import lru_cache
+from typing import Annotated, Iterable, Literal
+
+from fastapi import Depends
+
+from ..core import metrics
+from ..core.tracing import traced_class
+from ..core.write_behind import BatchBuffer
+from ..db.database import new_session
+from ..repository.media_stats_repository import MediaStatsRepository
+from ..schemas.config import get_settings
+from ..utils.http_cache import surrogate_key
+from .cdn_purge import PurgeQueue, get_purge_queue
+
+MediaKind = Literal["sermon", "podcast"]
+MediaEvent = Literal["play", "download"]
+
+_EVENT_INDEX = {"play": 0, "download": 1}
+
+
+class PlayCounter(BatchBuffer[dict[tuple[str, int], list[int]]]):
+    """Coalesces play and download events per sermon or podcast and writes
+    them with one upsert per flush.
+
+    Args:
+        interval (float): Seconds between flushes.
+        max_pending (int): Events that trigger an early flush.
+        purge_queue (PurgeQueue | None): Purges the cached public responses
+            of the counted items after a flush, as they embed the counts.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        max_pending: int,
+        purge_queue: PurgeQueue | None = None,
+    ) -> None:
+        super().__init__(interval, max_pending)
+        self.purge_queue = purge_queue
+
+    def new_batch(self) -> dict[tuple[str, int], list[int]]:
+        return {}
+
+    def merge(self, batch, failed) -> None:
+        for key, (plays, downloads) in failed.items():
+            counts = batch.setdefault(key, [0, 0])
+            counts[0] += plays
+            counts[1] += downloads
+
+    def write(self, batch) -> None:
+        with new_session() as sess:
+            MediaStatsRepository(sess).add_counts(batch)
+        if self.purge_queue is not None:
+            # lists are tagged with their items, this purges them too
+            self.purge_queue.add([surrogate_key(kind, id) for kind, id in batch])
+
+    def record(self, kind: MediaKind, id: int, event: MediaEvent) -> None:
+        """
+        Count an event, it is written with the next flush.
+        """
+        index = _EVENT_INDEX[event]
+
+        def update(batch) -> None:
+            batch.setdefault((kind, id), [0, 0])[index] += 1
+
+        self._record(update)
+
+    def unflushed(self, kind: MediaKind, ids: Iterable[int]) -> dict[int, list[int]]:
+        """
+        Return the counts of this process that weren't written yet.
+        """
+        ids = list(ids)
+        return self.peek(  # type: ignore
+            lambda batch: {
+                id: list(batch[kind, id]) for id in ids if (kind, id) in batch
+            }
+        )
+
+
+@lru_cache
+def get_play_counter() -> PlayCounter:
+    """
+    Returns the play counter of this process, created on first use.
+    """
+    settings = get_settings()
+    counter = PlayCounter(
+        interval=settings.PLAY_COUNTER_FLUSH_INTERVAL,
+        max_pending=settings.PLAY_COUNTER_MAX_PENDING,
+        purge_queue=get_purge_queue(),
+    )
+    metrics.register(
+        "tbc_play_events_pending",
+        "gauge",
+        "Play and download events waiting to be written.",
+        lambda: [({}, counter.pending)],
+    )
+    metrics.register(
+        "tbc_play_events_flushed_total",
+        "counter",
+        "Play and download events written to the database.",
+        lambda: [({}, counter.flushed)],
+    )
+    return counter
+
+
+@traced_class
+class MediaStatsService:
+    """
+    Business logic for the play and download counts.
+    """
+
+    def __init__(
+        self,
+        repo: Annotated[MediaStatsRepository, Depends(MediaStatsRepository)],
+        counter: Annotated[PlayCounter, Depends(get_play_counter)],
+    ) -> None:
+        self.repo = repo
+        self.counter = counter
+
+    def record_event(self, kind: MediaKind, id: int, event: MediaEvent) -> None:
+        """
+        Count a play or download.
+        """
+        self.counter.record(kind, id, event)
+
+    def get_counts(self, kind: MediaKind, ids: Iterable[int]) -> dict[int, list[int]]:
+        """
+        Return [plays, downloads] keyed by id, including the events this
+        process hasn't written yet.
+        """
+        ids = list(ids)
+        counts = self.repo.query_counts(kind, ids) if ids else {}
+        for id, (plays, downloads) in self.counter.unflushed(kind, ids).items():
+            total = counts.setdefault(id, [0, 0])
+            total[0] += plays
+            total[1] += downloads
+        return counts
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Annotated, List
 
 from fastapi import Depends, status
@@ -8,25 +9,62 @@ from ..schemas.podcast import CreatePodcast, PartialUpdatePodcast, UpdatePodcast
 from ..models import Podcast
 from ..models.user import User
 from ..repository.factory import get_podcast_repo
+from ..core import events
+from ..core.object_cache import ObjectCache, register_cache
+from ..core.tracing import traced_class
+from ..schemas.config import get_settings
 from ..utils.handler_exceptions import (
     PodcastNotFoundException,
     UnauthoriziedUserException,
 )
 
 
+@lru_cache
+def get_podcast_cache() -> ObjectCache[int, Podcast]:
+    """
+    Returns the cache of single podcasts of this process, a podcast is
+    dropped from it when it changes.
+    """
+    settings = get_settings()
+    cache: ObjectCache[int, Podcast] = ObjectCache(
+        settings.OBJECT_CACHE_SIZE, settings.OBJECT_CACHE_TTL
+    )
+
+    events.subscribe("podcast", cache.on_event)
+    register_cache("podcast", cache)
+    return cache
+
+
+def _to_podcast(podcast: CreatePodcast) -> Podcast:
+    """
+    Map the podcast schema onto the model, whose title is podcast_title.
+    """
+    data = podcast.model_dump()
+    return Podcast(podcast_title=data.pop("title"), **data)
+
+
+@traced_class
 class PodcastService:
     """Provide business process and algorithms to PodcastRepository."""
 
-    def __init__(self, repo: Annotated[PodcastRepository, Depends(get_podcast_repo)]):
+    def __init__(
+        self,
+        repo: Annotated[PodcastRepository, Depends(get_podcast_repo)],
+        cache: Annotated[ObjectCache[int, Podcast], Depends(get_podcast_cache)],
+    ):
         self.repo = repo
+        self.cache = cache
 
     def insert_podcast(self, podcast: CreatePodcast) -> bool:
         """
         Add new podcast item to the database.
         """
-        new_podcast = Podcast(**podcast.model_dump())
+        new_podcast = _to_podcast(podcast)
 
-        return self.repo.insert_podcast(new_podcast)
+        result = self.repo.insert_podcast(new_podcast)
+        if result:
+            events.publish("podcast", action="created", id=new_podcast.id)
+        return result
 
     def get_all_podcasts(self, limit: int, offset: int) -> List[Podcast]:
         """
@@ -34,18 +72,43 @@ class PodcastService:
         """
         return self.repo.query_podcast(limit=limit, offset=offset)
 
-    def get_podcast(self, id: int) -> Podcast | None:
+    def count_podcasts(self, exact: bool = False) -> tuple[int, bool]:
         """
-        Get a podcast by the given ID.
+        Count the podcast items, returns the count and whether it is an
+        estimate.
         """
-        return self.repo.query_by_id(id)
+        return self.repo.count_podcasts(
+            exact, get_settings().PAGINATION_ESTIMATE_THRESHOLD
+        )
+
+    def get_podcast(self, id: int, cached: bool = True) -> Podcast | None:
+        """
+        Get a podcast by the given ID, from the cache when possible. Cached
+        podcasts are detached from the session.
+
+        Only the writing process drops a podcast from its cache, pass
+        cached=False where a stale podcast must not be served, e.g. to a CDN.
+        """
+        if not cached:
+            return self.repo.query_by_id(id)
+
+        def load() -> Podcast | None:
+            podcast = self.repo.query_by_id(id)
+            if podcast is not None:
+                self.repo.detach(podcast)
+            return podcast
+
+        return self.cache.get(id, load)
 
     def update_podcast(self, id: int, podcast: UpdatePodcast, user: User) -> bool:
         """
         Update a particular podcast with the given id.
         """
-        podcast_obj = Podcast(**podcast.model_dump())
-        return self.repo.update_podcast(id, podcast_obj)
+        podcast_obj = _to_podcast(podcast)
+        result = self.repo.update_podcast(id, podcast_obj)
+        if result:
+            events.publish("podcast", action="updated", id=id)
+        return result
 
     # def partial_update_podcast(
     #     self, id: int, body: PartialUpdatePodcast, user: User
@@ -76,4 +139,7 @@ class PodcastService:
         Delete a podcast by ID
         """
 
-        return self.repo.delete_podcast(id)
+        result = self.repo.delete_podcast(id)
+        if result:
+            events.publish("podcast", action="deleted", id=id)
+        return result
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Annotated, List
 
 from fastapi import Depends
@@ -7,17 +8,41 @@ from ..repository.sermon_repository import SermonRepository
 from ..repository.factory import get_sermon_repo
 from ..schemas.sermon import CreateSermon, UpdateSermon
 from ..models.sermon import Sermon
+from ..core import events
+from ..core.object_cache import ObjectCache, register_cache
+from ..core.tracing import traced_class
+from ..schemas.config import get_settings
 
 
+@lru_cache
+def get_sermon_cache() -> ObjectCache[int, Sermon]:
+    """
+    Returns the cache of single sermons of this process, a sermon is dropped
+    from it when it changes.
+    """
+    settings = get_settings()
+    cache: ObjectCache[int, Sermon] = ObjectCache(
+        settings.OBJECT_CACHE_SIZE, settings.OBJECT_CACHE_TTL
+    )
+
+    events.subscribe("sermon", cache.on_event)
+    register_cache("sermon", cache)
+    return cache
+
+
+@traced_class
 class SermonService:
     """
     Business logic for Sermon repository.
     """
 
     def __init__(
-        self, repo: Annotated[SermonRepository, Depends(get_sermon_repo)]
+        self,
+        repo: Annotated[SermonRepository, Depends(get_sermon_repo)],
+        cache: Annotated[ObjectCache[int, Sermon], Depends(get_sermon_cache)],
     ) -> None:
         self.repo = repo
+        self.cache = cache
 
     def insert_sermon(self, sermon: CreateSermon):
         """
@@ -25,7 +50,10 @@ class SermonService:
         """
         new_sermon = Sermon(**sermon.model_dump())
 
-        return self.repo.insert_sermon(new_sermon)
+        result = self.repo.insert_sermon(new_sermon)
+        if result:
+            events.publish("sermon", action="created", id=new_sermon.id)
+        return result
 
     def get_sermons(self, limit=None, offset=None) -> List[Sermon]:
         """
@@ -33,17 +61,41 @@ class SermonService:
         """
         return self.repo.query_sermons(limit=limit, offset=offset)
 
-    def get_single_sermon(self, id: int) -> Sermon | None:
+    def count_sermons(self, exact: bool = False) -> tuple[int, bool]:
         """
-        Return a single sermon.
+        Returns the number of sermons and whether it is an estimate.
         """
-        return self.repo.query_sermon(id)
+        return self.repo.count_sermons(
+            exact, get_settings().PAGINATION_ESTIMATE_THRESHOLD
+        )
+
+    def get_single_sermon(self, id: int, cached: bool = True) -> Sermon | None:
+        """
+        Return a single sermon, from the cache when possible. Cached sermons
+        are detached from the session.
+
+        Only the writing process drops a sermon from its cache, pass
+        cached=False where a stale sermon must not be served, e.g. to a CDN.
+        """
+        if not cached:
+            return self.repo.query_sermon(id)
+
+        def load() -> Sermon | None:
+            sermon = self.repo.query_sermon(id)
+            if sermon is not None:
+                self.repo.detach(sermon)
+            return sermon
+
+        return self.cache.get(id, load)
 
     def delete_sermon(self, id: int) -> bool | None:
         """
         Delete sermon with the given Id
         """
-        return self.repo.delete_sermon(id)
+        result = self.repo.delete_sermon(id)
+        if result:
+            events.publish("sermon", action="deleted", id=id)
+        return result
 
     def update_sermon(self, id: int, sermon: UpdateSermon) -> bool:
         """
@@ -51,4 +103,7 @@ class SermonService:
         """
         updated_data = Sermon(**sermon.model_dump())
 
-        return self.repo.update_sermon(id, updated_data)
+        result = self.repo.update_sermon(id, updated_data)
+        if result:
+            events.publish("sermon", action="updated", id=id)
+        return result
@@ -11,9 +11,11 @@ from ..schemas.users import UserCreateSchema, UserResponseSchema
 from ..core.security import get_password_hash, verify_password
 from ..core.jwt_token import create_access_token, decode_access_token
 from ..core.constants import ACCESS_TOKEN_EXPIRE_MINUTES
+from ..core.tracing import traced_class
 from ..schemas.token import Token
 
 
+@traced_class
 class UserService:
     """
     Provides business process and algorithnms to UserRepository
@@ -2,6 +2,8 @@
 Configuration for testing the project.
 """
 
+import os
+
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -18,6 +20,12 @@ from ..repository.user_repository import get_session_db
 
 SQLITE_DATABASE_URL = "sqlite:///./test_db.db"
 
+# settings the app reads on first use
+os.environ.setdefault("DATABASE_URL", SQLITE_DATABASE_URL)
+os.environ.setdefault("CLOUD_NAME", "test")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("API_SECRET", "test")
+
 # Create a SQLAlchemy engine
 engine = create_engine(
     SQLITE_DATABASE_URL,
@@ -32,16 +40,22 @@ TestingUserSessionLocal = sessionmaker(
     bind=engine,
 )
 
-# Create tables in the database
-Base.metadata.create_all(bind=engine)
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """
+    Create the tables once for the tests that need a database.
+    """
+    Base.metadata.create_all(bind=engine)
+    yield engine
 
 
 @pytest.fixture(scope="function")
-def db_session():
+def db_session(db_engine):
     """
     Create a new database session with a rollback at the end of the test.
     """
-    connection = engine.connect()
+    connection = db_engine.connect()
     transaction = connection.begin()
     session = TestingUserSessionLocal(bind=connection)
     yield session
@@ -0,0 +1,63 @@
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from ..cld_media.storage import LocalStorage
+from ..cld_media.window_cache import WindowCache
+from ..core.constants import SupportedMediaTypePath
+from ..utils.http_range import parse_range
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    # several ranges are answered with the whole file
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    with pytest.raises(HTTPException) as exc:
+        parse_range("bytes=100-", 100)
+    assert exc.value.status_code == 416
+
+
+def test_window_cache_reads_only_the_windows_it_needs(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/media")
+    data = os.urandom(10_000)
+    asyncio.run(
+        storage.put(
+            io.BytesIO(data),
+            filename="book.pdf",
+            public_id="book",
+            folder_name="book/files",
+            media_type=SupportedMediaTypePath.DOCUMENT.name,
+        )
+    )
+
+    reads = []
+    stream = storage.stream
+
+    def counting_stream(public_id, resource_type=None, start=0, end=None):
+        reads.append((start, end))
+        return stream(public_id, resource_type, start, end)
+
+    storage.stream = counting_stream  # type: ignore
+    cache = WindowCache(window_size=1024, max_bytes=3 * 1024)
+
+    def read(start, end):
+        return b"".join(cache.read(storage, "book", "raw", len(data), start, end))
+
+    assert read(1000, 2100) == data[1000:2101]
+    assert reads == [(0, 1023), (1024, 2047), (2048, 3071)]
+
+    # cached windows are not read again
+    assert read(1500, 1600) == data[1500:1601]
+    assert len(reads) == 3 and cache.hits == 1
+
+    # the last window is short and the cache stays within its budget
+    assert read(9990, 9999) == data[9990:]
+    assert reads[-1] == (9216, 9999)
+    assert cache.size <= 3 * 1024
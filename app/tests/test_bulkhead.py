@@ -0,0 +1,35 @@
+import asyncio
+
+from ..middleware.bulkhead import Bulkhead, classify
+
+
+def test_bulkhead_sheds_when_queue_is_full_or_too_slow():
+    async def scenario():
+        bulkhead = Bulkhead("uploads", max_concurrent=1, max_queue=1, max_queue_time=0.05)
+
+        assert await bulkhead.acquire() is True
+        waiting = asyncio.create_task(bulkhead.acquire())
+        await asyncio.sleep(0)
+        assert bulkhead.queue_depth == 1
+
+        # queue is full, rejected without waiting
+        assert await bulkhead.acquire() is False
+        # the queued request waited longer than the queue time
+        assert await waiting is False
+        assert bulkhead.shed == 2
+
+        queued = asyncio.create_task(bulkhead.acquire())
+        await asyncio.sleep(0)
+        bulkhead.release()
+        assert await queued is True
+        bulkhead.release()
+        assert bulkhead.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_classify_routes():
+    multipart = [(b"content-type", b"multipart/form-data; boundary=x")]
+    assert classify({"path": "/api/v1/sermon/", "method": "POST", "headers": multipart}) == "uploads"
+    assert classify({"path": "/api/v1/users/login", "method": "POST", "headers": []}) == "auth"
+    assert classify({"path": "/api/v1/sermon/", "method": "GET", "headers": []}) == "reads"
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from ..db.database import Base
+from ..models.content_change import ContentChange
+from ..repository.content_change_repository import ContentChangeRepository
+from ..services import change_stream
+from ..services.change_stream import (
+    RESET,
+    ChangeBroadcaster,
+    ChangeFeed,
+    TooManySubscribers,
+)
+
+
+async def _frames(broadcaster, subscription, count):
+    stream = broadcaster.stream(subscription)
+    frames = [await stream.__anext__() for _ in range(count)]
+    await stream.aclose()
+    return frames
+
+
+def test_change_stream_fans_out_resumes_and_evicts_slow_consumers():
+    async def run():
+        broadcaster = ChangeBroadcaster(queue_size=4, replay_size=3, max_subscribers=2)
+        first = broadcaster.subscribe()
+        # services publish from worker threads
+        await asyncio.to_thread(
+            broadcaster.on_event, "sermon", {"action": "created", "id": 1}
+        )
+        await asyncio.sleep(0)
+        retry, created = await _frames(broadcaster, first, 2)
+        assert retry.startswith(b"retry: ")
+        assert created == (
+            f"id: {broadcaster.epoch}-1\nevent: sermon\n"
+            'data: {"action": "created", "id": 1}\n\n'
+        ).encode()
+        assert broadcaster.subscribers == 0
+
+        # a reconnecting client gets what it missed, once
+        broadcaster.on_event("podcast", {"action": "deleted", "id": 2})
+        resumed = broadcaster.subscribe(f"{broadcaster.epoch}-1")
+        await asyncio.sleep(0)
+        _, missed = await _frames(broadcaster, resumed, 2)
+        assert missed.startswith(f"id: {broadcaster.epoch}-2\nevent: podcast".encode())
+        assert resumed.queue.empty()
+
+        # ids of another process or out of the replay buffer can't resume
+        for stale in ("other-1", f"{broadcaster.epoch}-0"):
+            for i in range(3, 6):
+                broadcaster.on_event("book", {"action": "created", "id": i})
+            _, reset = await _frames(broadcaster, broadcaster.subscribe(stale), 2)
+            assert reset == RESET
+
+        slow = broadcaster.subscribe()
+        broadcaster.subscribe()
+        with pytest.raises(TooManySubscribers):
+            broadcaster.subscribe()
+
+        for i in range(10):
+            broadcaster.on_event("sermon", {"action": "updated", "id": i})
+        await asyncio.sleep(0)
+        assert broadcaster.evicted == 2
+        assert broadcaster.subscribers == 0
+        assert [frame async for frame in broadcaster.stream(slow)] == []
+
+    asyncio.run(run())
+
+
+def test_change_feed_streams_the_changes_of_other_workers(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(change_stream, "new_session", lambda: Session(engine))
+
+    def worker():
+        broadcaster = ChangeBroadcaster(queue_size=8, replay_size=8, max_subscribers=1)
+        feed = ChangeFeed(broadcaster, settle=timedelta(0), retention=timedelta(1))
+        assert feed.poll_once() == 0
+        return broadcaster, feed
+
+    (_, writer), (reader, feed) = worker(), worker()
+
+    async def run():
+        subscription = reader.subscribe()
+        writer.record("sermon", {"action": "updated", "id": 1})
+        assert feed.poll_once() == 1
+        await asyncio.sleep(0)
+        _, updated = await _frames(reader, subscription, 2)
+        assert updated.endswith(b'event: sermon\ndata: {"action": "updated", "id": 1}\n\n')
+        assert feed.poll_once() == 0
+
+    asyncio.run(run())
+
+
+def test_change_feed_waits_for_changes_inserted_within_settle(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    hour_ago = now - timedelta(hours=1)
+    with Session(engine) as sess:
+        sess.add_all(
+            [
+                ContentChange(id=1, topic="book", payload="{}", inserted_at=hour_ago),
+                # still being inserted, e.g. by another worker
+                ContentChange(id=2, topic="book", payload="{}", inserted_at=now),
+                ContentChange(id=3, topic="book", payload="{}", inserted_at=hour_ago),
+            ]
+        )
+        sess.commit()
+
+        repo = ContentChangeRepository(sess)
+        settle = timedelta(seconds=30)
+        assert [c.id for c in repo.query_after(0, settle, 10)] == [1]
+        assert repo.last_settled_id(settle) == 3
+
+        repo.prune(timedelta(minutes=30))
+        assert [c.id for c in repo.query_after(0, timedelta(0), 10)] == [2]
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from ..db.database import Base
+from ..dependencies import get_current_user
+from ..main import app
+from ..models import User
+from ..repository import export_repository
+from ..services import export_service
+from ..services.export_service import ExportService
+
+
+def test_export_streams_rows_in_chunks(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with Session(engine) as sess:
+        sess.execute(
+            insert(User),
+            [
+                {
+                    "id": i,
+                    "username": f"user{i}",
+                    "email": f"user{i}@example.com",
+                    "hashed_password": "secret",
+                }
+                for i in range(1, 2001)
+            ],
+        )
+        sess.commit()
+    monkeypatch.setattr(export_repository, "new_session", lambda: Session(engine))
+    monkeypatch.setattr(export_service, "CHUNK_SIZE", 4096)
+
+    chunks = list(ExportService().export("users", "ndjson"))
+    assert len(chunks) > 10
+    assert all(len(chunk) < 4096 + 512 for chunk in chunks)
+    users = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [user["id"] for user in users] == list(range(1, 2001))
+    assert "hashed_password" not in users[0]
+    assert users[0]["email"] == "user1@example.com"
+
+    text = b"".join(ExportService().export("users", "csv")).decode()
+    rows = list(csv.reader(io.StringIO(text)))
+    assert rows[0] == ["id", "username", "email", "is_active", "is_admin", "created_at"]
+    assert len(rows) == 2001
+
+
+def test_exports_are_for_admins_only(monkeypatch):
+    monkeypatch.setattr(
+        ExportService, "export", lambda self, kind, format: iter([b"{}\n"])
+    )
+    client = TestClient(app)
+
+    app.dependency_overrides[get_current_user] = lambda: User(is_admin=False)
+    try:
+        for kind in ("users", "sermons", "podcasts"):
+            assert client.get(f"/api/v1/export/{kind}").status_code == 403
+
+        app.dependency_overrides[get_current_user] = lambda: User(is_admin=True)
+        exported = client.get("/api/v1/export/users")
+        assert exported.status_code == 200
+        assert exported.content == b"{}\n"
+    finally:
+        del app.dependency_overrides[get_current_user]
@@ -0,0 +1,65 @@
+import json
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from ..cld_media.storage import LocalStorage
+from ..core import events
+from ..db.database import Base
+from ..models import Book, Podcast, Sermon
+from ..repository.feed_repository import FeedRepository
+from ..services.feed_service import FeedCache, FeedService
+
+
+def test_feed_is_read_in_one_query_and_cached_until_content_changes(tmp_path):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    queries = []
+
+    with Session(engine) as sess:
+        for i in range(1, 4):
+            sess.add(
+                Sermon(
+                    id=i,
+                    theme=f"sermon {i}",
+                    minister="m",
+                    short_note="n",
+                    cover_image="c.jpg",
+                    cld_image_public_id=f"c{i}",
+                    audio_file="a.mp3",
+                    cld_audio_public_id=f"a{i}",
+                )
+            )
+        sess.add(Podcast(id=1, podcast_title="podcast", running_episodes=1))
+        sess.add(Book(id=1, title="published", is_published=True))
+        sess.add(Book(id=2, title="draft", is_published=False))
+        sess.commit()
+
+        event.listen(
+            engine, "before_cursor_execute", lambda *args: queries.append(args[2])
+        )
+
+        cache = FeedCache(ttl=60)
+        events.subscribe("sermon", cache.invalidate)
+        try:
+            service = FeedService(
+                FeedRepository(sess), cache, LocalStorage(str(tmp_path), "/media")
+            )
+            feed = json.loads(service.get_feed(2))
+            assert len(queries) == 1
+            assert [item["title"] for item in feed["sermons"]] == [
+                "sermon 3",
+                "sermon 2",
+            ]
+            assert [item["title"] for item in feed["podcasts"]] == ["podcast"]
+            assert [item["title"] for item in feed["books"]] == ["published"]
+
+            service.get_feed(2)
+            assert len(queries) == 1
+
+            events.publish("sermon", action="deleted", id=3)
+            service.get_feed(2)
+            assert len(queries) == 2
+        finally:
+            events.unsubscribe("sermon", cache.invalidate)
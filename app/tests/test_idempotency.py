@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from ..core.jwt_token import create_access_token
+from ..db.database import Base
+from ..middleware import idempotency
+from ..middleware.idempotency import IdempotencyMiddleware
+
+
+def test_retries_wait_for_and_replay_the_first_response(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(idempotency, "new_session", lambda: Session(engine))
+    monkeypatch.setattr(idempotency, "POLL_INTERVAL", 0.01)
+
+    calls = []
+
+    async def create(request):
+        calls.append(request.url.path)
+        await asyncio.sleep(0.2)
+        if request.query_params.get("fail"):
+            return JSONResponse({"message": "error"}, status_code=500)
+        return JSONResponse({"created": len(calls)})
+
+    app = IdempotencyMiddleware(
+        Starlette(
+            routes=[
+                Route("/api/v1/sermon/", create, methods=["POST"]),
+                Route("/api/v1/podcasts/", create, methods=["POST"]),
+            ]
+        )
+    )
+    token = create_access_token({"sub": "user@example.com"})
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+            def post(path, key):
+                return client.post(
+                    path,
+                    headers={
+                        "Authorization": f"Bearer {token}",
+                        "Idempotency-Key": key,
+                    },
+                )
+
+            first, retry = await asyncio.gather(
+                post("/api/v1/sermon/", "a"), post("/api/v1/sermon/", "a")
+            )
+            assert first.json() == retry.json() == {"created": 1}
+            assert len(calls) == 1
+            replayed = [
+                response
+                for response in (first, retry)
+                if "idempotent-replayed" in response.headers
+            ]
+            assert len(replayed) == 1
+
+            later = await post("/api/v1/sermon/", "a")
+            assert later.json() == {"created": 1}
+            assert later.headers["idempotent-replayed"] == "true"
+
+            assert (await post("/api/v1/podcasts/", "a")).status_code == 422
+
+            # server errors don't keep the key
+            assert (await post("/api/v1/sermon/?fail=1", "b")).status_code == 500
+            assert (await post("/api/v1/sermon/?fail=1", "b")).status_code == 500
+            assert len(calls) == 3
+
+    asyncio.run(run())
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from ..db.database import Base
+from ..models.listening import ListeningEvent
+from ..repository.listening_repository import ListeningRepository
+from ..schemas.listening import ListeningEventIn
+from ..services import listening_service
+from ..services.listening_service import ListeningEventBuffer, ListeningRollup
+
+
+def test_events_are_bulk_inserted_and_rolled_up(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(listening_service, "new_session", lambda: Session(engine))
+
+    buffer = ListeningEventBuffer(interval=60, max_pending=1000, max_buffered=3)
+    accepted = buffer.record(
+        [
+            # minutes 0 and 1
+            ListeningEventIn(sermon_id=1, position=0, duration=90),
+            # minute 1 only
+            ListeningEventIn(sermon_id=1, position=60, duration=30, client="ios"),
+            ListeningEventIn(sermon_id=2, position=0, duration=10),
+            ListeningEventIn(sermon_id=2, position=0, duration=10),
+        ]
+    )
+    assert accepted == 3 and buffer.dropped == 1
+    assert asyncio.run(buffer.flush()) == 3
+
+    rollup = ListeningRollup(batch_size=2, settle=timedelta(0))
+    assert rollup.run_once() == 3
+    # nothing is aggregated twice
+    assert rollup.run_once() == 0
+
+    with Session(engine) as sess:
+        repo = ListeningRepository(sess)
+        retention = [(r.minute, r.listens) for r in repo.query_retention(1)]
+        assert retention == [(0, 1), (1, 2)]
+
+        hourly = repo.query_hourly(
+            1,
+            datetime.now(timezone.utc) - timedelta(days=1),
+            datetime.now(timezone.utc) + timedelta(days=1),
+        )
+        assert [(h.events, h.seconds_listened) for h in hourly] == [(2, 120)]
+
+
+def test_rollup_waits_for_events_inserted_within_settle():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    hour_ago = now - timedelta(hours=1)
+
+    def event(id, occurred_at, inserted_at):
+        return ListeningEvent(
+            id=id,
+            sermon_id=1,
+            position=0,
+            duration=10,
+            occurred_at=occurred_at,
+            inserted_at=inserted_at,
+        )
+
+    with Session(engine) as sess:
+        sess.add_all(
+            [
+                event(1, hour_ago, hour_ago),
+                # still being inserted, e.g. by another worker
+                event(2, now, now),
+                # a retried batch of old events that got a later id
+                event(3, hour_ago, hour_ago),
+            ]
+        )
+        sess.commit()
+
+        repo = ListeningRepository(sess)
+        # event 3 waits for event 2 instead of moving the watermark past it
+        assert repo.rollup(batch_size=10, settle=timedelta(seconds=30)) == 1
+
+        sess.execute(
+            update(ListeningEvent)
+            .where(ListeningEvent.id == 2)
+            .values(inserted_at=hour_ago)
+        )
+        sess.commit()
+        assert repo.rollup(batch_size=10, settle=timedelta(seconds=30)) == 2
+        assert [(r.minute, r.listens) for r in repo.query_retention(1)] == [(0, 3)]
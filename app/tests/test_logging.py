@@ -0,0 +1,112 @@
+import io
+import json
+import logging
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ..core import log
+from ..core.log import configure_logging, parse_levels, stop_logging
+from ..middleware.request_id import RequestIdMiddleware
+
+logger = logging.getLogger("app.tests.logging")
+
+
+@pytest.fixture
+def output():
+    stream = io.StringIO()
+    root_level = logging.getLogger().level
+    yield stream
+    stop_logging()
+    logging.getLogger().setLevel(root_level)
+    for name in ("app.tests", "app.tests.logging"):
+        logging.getLogger(name).setLevel(logging.NOTSET)
+
+
+def records(stream: io.StringIO) -> list[dict]:
+    stop_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_are_written_as_json(output):
+    configure_logging("INFO", stream=output)
+    token = log.request_id.set("req-1")
+    try:
+        logger.info("stored %s", "sermon", extra={"sermon_id": 7})
+    finally:
+        log.request_id.reset(token)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+
+    stored, failed = records(output)
+    assert stored["message"] == "stored sermon"
+    assert stored["level"] == "INFO"
+    assert stored["logger"] == "app.tests.logging"
+    assert stored["request_id"] == "req-1"
+    assert stored["sermon_id"] == 7
+    assert failed["request_id"] is None
+    assert "ValueError: boom" in failed["exception"]
+
+
+def test_levels_per_logger_and_debug_sampling(output):
+    assert parse_levels("app.tests=debug, httpx=WARNING,") == {
+        "app.tests": "DEBUG",
+        "httpx": "WARNING",
+    }
+    configure_logging("WARNING", "app.tests=DEBUG", debug_sample_rate=0.0, stream=output)
+
+    logger.debug("sampled out")
+    logger.info("kept")
+    logging.getLogger("app.other").info("below the root level")
+
+    assert [record["message"] for record in records(output)] == ["kept"]
+
+
+def test_a_blocked_output_drops_records_instead_of_blocking(output):
+    release = threading.Event()
+
+    class BlockedStream(io.StringIO):
+        def write(self, text):
+            release.wait()
+            return super().write(text)
+
+    configure_logging("INFO", queue_size=10, stream=BlockedStream())
+    start = time.perf_counter()
+    for i in range(1000):
+        logger.info("record %d", i)
+    elapsed = time.perf_counter() - start
+    dropped = log._handler.dropped
+    release.set()
+
+    assert elapsed < 1.0
+    assert dropped >= 1000 - 10 - 1
+
+
+def test_requests_carry_their_id(output):
+    configure_logging("INFO", stream=output)
+    app = FastAPI()
+
+    @app.get("/")
+    def handler():
+        # sync handlers run in a worker thread
+        logger.info("handled")
+        return {}
+
+    app.add_middleware(RequestIdMiddleware)
+    client = TestClient(app)
+
+    given = client.get("/", headers={"X-Request-ID": "lb-123"})
+    generated = client.get("/", headers={"X-Request-ID": "not valid!"})
+
+    assert given.headers["x-request-id"] == "lb-123"
+    assert generated.headers["x-request-id"] not in ("", "not valid!")
+    handled = [r for r in records(output) if r["logger"] == "app.tests.logging"]
+    assert [record["request_id"] for record in handled] == [
+        "lb-123",
+        generated.headers["x-request-id"],
+    ]
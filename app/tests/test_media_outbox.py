@@ -0,0 +1,132 @@
+import asyncio
+import io
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from ..cld_media.storage import LocalStorage
+from ..core.constants import SupportedMediaTypePath
+from ..db.database import Base
+from ..models import MediaDeletion, Podcast, Sermon
+from ..repository.podcast_repository import PodcastRepository
+from ..repository.sermon_repository import SermonRepository
+from ..services.media_outbox_service import MediaDeletionDrainer
+
+
+class FlakyStorage(LocalStorage):
+    def __init__(self, root: str) -> None:
+        super().__init__(root, "/media")
+        self.calls = 0
+
+    def delete_many(self, public_ids, resource_type=None):
+        self.calls += 1
+        if self.calls == 1:
+            raise ConnectionError("remote unavailable")
+        return super().delete_many(public_ids, resource_type)
+
+
+def test_sermon_delete_is_drained_in_the_background(tmp_path):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    storage = FlakyStorage(str(tmp_path))
+
+    for public_id, media_type in (
+        ("cover", SupportedMediaTypePath.IMAGE),
+        ("audio", SupportedMediaTypePath.AUDIO),
+    ):
+        asyncio.run(
+            storage.put(
+                io.BytesIO(b"data"),
+                filename=f"{public_id}.bin",
+                public_id=public_id,
+                folder_name="sermon",
+                media_type=media_type.name,
+            )
+        )
+
+    with Session(engine) as sess:
+        sess.add(
+            Sermon(
+                id=1,
+                theme="t",
+                minister="m",
+                short_note="n",
+                cover_image="/media/cover.bin",
+                cld_image_public_id="cover",
+                audio_file="/media/audio.bin",
+                cld_audio_public_id="audio",
+            )
+        )
+        sess.commit()
+        assert SermonRepository(sess).delete_sermon(1) is True
+        assert len(sess.scalars(select(MediaDeletion)).all()) == 2
+
+    # the files are still there until the outbox is drained
+    assert storage._find("cover") is not None
+    assert storage._find("audio", "video") is not None
+
+    drainer = MediaDeletionDrainer(
+        storage=lambda: storage, session=lambda: Session(engine), retry_delay=0
+    )
+    # image and audio are deleted in separate batches, the first one fails
+    assert drainer.drain_once() == 2
+    assert drainer.failed == 1 and drainer.deleted == 1
+    assert drainer.drain_once() == 1
+    assert drainer.drain_once() == 0
+
+    assert storage._find("cover") is None
+    assert storage._find("audio", "video") is None
+    with Session(engine) as sess:
+        assert sess.scalars(select(MediaDeletion)).all() == []
+
+
+def test_files_in_use_again_are_kept(tmp_path):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    storage = LocalStorage(str(tmp_path), "/media")
+    for public_id, media_type in (
+        ("episode_cover", SupportedMediaTypePath.IMAGE),
+        ("episode", SupportedMediaTypePath.VIDEO),
+    ):
+        asyncio.run(
+            storage.put(
+                io.BytesIO(b"data"),
+                filename=f"{public_id}.bin",
+                public_id=public_id,
+                folder_name="podcast",
+                media_type=media_type.name,
+            )
+        )
+
+    def podcast(id):
+        return Podcast(
+            id=id,
+            podcast_title="p",
+            cld_image_public_id="episode_cover",
+            cld_video_public_id="episode",
+        )
+
+    with Session(engine) as sess:
+        sess.add(podcast(1))
+        sess.commit()
+        assert PodcastRepository(sess).delete_podcast(1) is True
+        assert {
+            (row.public_id, row.resource_type)
+            for row in sess.scalars(select(MediaDeletion))
+        } == {("episode_cover", "image"), ("episode", "video")}
+
+        # the same files are uploaded again before the outbox is drained
+        sess.add(podcast(2))
+        sess.commit()
+
+    drainer = MediaDeletionDrainer(
+        storage=lambda: storage, session=lambda: Session(engine)
+    )
+    assert drainer.drain_once() == 2
+    assert (drainer.skipped, drainer.deleted) == (2, 0)
+
+    assert storage._find("episode_cover") is not None
+    assert storage._find("episode", "video") is not None
+    with Session(engine) as sess:
+        assert sess.scalars(select(MediaDeletion)).all() == []
@@ -0,0 +1,144 @@
+import asyncio
+import io
+import os
+import time
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from ..cld_media.storage import LocalStorage
+from ..core.constants import SupportedMediaTypePath
+from ..db.database import Base
+from ..models import Book, Podcast
+from ..services.media_reconciler import reconcile_media, referenced_public_ids
+
+
+def test_reconcile_deletes_old_orphans_only(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/media")
+    for public_id in ("in_use", "old_orphan", "new_orphan"):
+        asyncio.run(
+            storage.put(
+                io.BytesIO(b"data"),
+                filename=f"{public_id}.jpg",
+                public_id=public_id,
+                folder_name="sermon/images",
+                media_type=SupportedMediaTypePath.IMAGE.name,
+            )
+        )
+    two_days_ago = time.time() - 2 * 86400
+    for public_id in ("in_use", "old_orphan"):
+        os.utime(storage._find(public_id), (two_days_ago, two_days_ago))
+
+    found = []
+    report = asyncio.run(
+        reconcile_media(
+            storage,
+            {"in_use"},
+            grace=timedelta(hours=24),
+            delete=True,
+            concurrency=2,
+            on_orphan=lambda asset: found.append(asset.public_id),
+        )
+    )
+
+    assert found == ["old_orphan"]
+    assert (report.scanned, report.orphaned, report.deleted) == (3, 1, 1)
+    assert storage._find("old_orphan") is None
+    assert storage._find("in_use") is not None
+    assert storage._find("new_orphan") is not None
+
+
+def test_referenced_ids_cover_every_media_column(tmp_path):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with Session(engine) as sess:
+        sess.add(
+            Podcast(
+                podcast_title="p",
+                cld_image_public_id="podcast_cover",
+                cld_video_public_id="podcast_video",
+            )
+        )
+        sess.commit()
+        referenced = referenced_public_ids(sess)
+
+    storage = LocalStorage(str(tmp_path), "/media")
+    for public_id, media_type in (
+        ("podcast_cover", SupportedMediaTypePath.IMAGE),
+        ("podcast_video", SupportedMediaTypePath.VIDEO),
+    ):
+        asyncio.run(
+            storage.put(
+                io.BytesIO(b"data"),
+                filename=f"{public_id}.bin",
+                public_id=public_id,
+                folder_name="podcast",
+                media_type=media_type.name,
+            )
+        )
+
+    report = asyncio.run(
+        reconcile_media(storage, referenced, grace=timedelta(0), delete=True)
+    )
+
+    assert (report.scanned, report.orphaned) == (2, 0)
+    assert storage._find("podcast_video", "video") is not None
+
+
+def test_folders_without_known_references_are_refused(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/media")
+
+    with pytest.raises(ValueError):
+        asyncio.run(reconcile_media(storage, set(), roots=["events"], delete=True))
+
+
+def test_books_in_use_are_kept_and_folders_scanned_apart(tmp_path):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with Session(engine) as sess:
+        sess.add(
+            Book(title="b", cld_image_public_id="book_cover", cld_book_public_id="book")
+        )
+        sess.commit()
+        referenced = referenced_public_ids(sess)
+
+    storage = LocalStorage(str(tmp_path), "/media")
+    for public_id, folder, media_type in (
+        ("book_cover", "book/images/2025", SupportedMediaTypePath.IMAGE),
+        ("book", "book/files/2025", SupportedMediaTypePath.DOCUMENT),
+        ("book_orphan", "book/files/2025", SupportedMediaTypePath.DOCUMENT),
+        ("sermon_orphan", "sermon/audios/2025", SupportedMediaTypePath.AUDIO),
+    ):
+        asyncio.run(
+            storage.put(
+                io.BytesIO(b"data"),
+                filename=f"{public_id}.bin",
+                public_id=public_id,
+                folder_name=folder,
+                media_type=media_type.name,
+            )
+        )
+
+    assert all(f.startswith("book/") for f in storage.list_folders("book"))
+
+    found = []
+    report = asyncio.run(
+        reconcile_media(
+            storage,
+            referenced,
+            roots=["book"],
+            grace=timedelta(0),
+            delete=True,
+            on_orphan=lambda asset: found.append(asset.public_id),
+        )
+    )
+
+    assert found == ["book_orphan"]
+    assert (report.scanned, report.deleted) == (3, 1)
+    assert storage._find("book", "raw") is not None
+    assert storage._find("book_cover") is not None
+    # the sermon folder wasn't scanned
+    assert storage._find("sermon_orphan", "video") is not None
@@ -0,0 +1,138 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from ..cld_media.storage import LocalStorage, get_storage
+from ..db.database import Base
+from ..dependencies import get_current_user
+from ..main import create_app
+from ..models import Podcast, Sermon, User
+from ..repository import podcast_repository, sermon_repository
+from ..repository.media_stats_repository import MediaStatsRepository
+from ..services import media_stats_service
+from ..services.cdn_purge import PurgeQueue, RecordingPurger
+from ..services.factory import get_media_stats_service
+from ..services.podcast_service import get_podcast_cache
+from ..services.sermon_service import get_sermon_cache
+from ..services.media_stats_service import PlayCounter
+
+
+def test_play_counter_coalesces_and_upserts(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(media_stats_service, "new_session", lambda: Session(engine))
+
+    with Session(engine) as sess:
+        sess.add(
+            Sermon(
+                id=1,
+                theme="t",
+                minister="m",
+                short_note="n",
+                cover_image="c.jpg",
+                cld_image_public_id="c",
+                audio_file="a.mp3",
+                cld_audio_public_id="a",
+            )
+        )
+        sess.commit()
+
+    purge_queue = PurgeQueue(RecordingPurger(), interval=60, max_pending=1000)
+    counter = PlayCounter(interval=60, max_pending=1000, purge_queue=purge_queue)
+    for _ in range(3):
+        counter.record("sermon", 1, "play")
+    counter.record("sermon", 1, "download")
+    # deleted or unknown ids are dropped on flush
+    counter.record("sermon", 99, "play")
+
+    assert counter.unflushed("sermon", [1]) == {1: [3, 1]}
+    assert asyncio.run(counter.flush()) == 5
+    # public responses embed the counts
+    purge_queue.flush_sync()
+    assert purge_queue.purger.purged == [{"sermon-1", "sermon-99"}]
+
+    counter.record("sermon", 1, "play")
+    asyncio.run(counter.close())
+
+    with Session(engine) as sess:
+        assert MediaStatsRepository(sess).query_counts("sermon", [1, 99]) == {
+            1: [4, 1]
+        }
+    assert counter.pending == 0
+
+
+def test_events_need_a_session_and_an_existing_id(tmp_path):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    with Session(engine) as sess:
+        sess.add(
+            Sermon(
+                id=1,
+                theme="t",
+                minister="m",
+                short_note="n",
+                cover_image="c.jpg",
+                cld_image_public_id="c",
+                audio_file="a.mp3",
+                cld_audio_public_id="a",
+            )
+        )
+        sess.add(Podcast(id=1, podcast_title="p"))
+        sess.commit()
+
+    def session():
+        with Session(engine) as sess:
+            yield sess
+
+    recorded = []
+
+    class Stats:
+        def record_event(self, kind, id, event):
+            recorded.append((kind, id, event))
+
+        def get_counts(self, kind, ids):
+            return {
+                id: [recorded.count((kind, id, "play")), 0]
+                for id in ids
+                if (kind, id, "play") in recorded
+            }
+
+    app = create_app()
+    app.dependency_overrides[sermon_repository.get_session_db] = session
+    app.dependency_overrides[podcast_repository.get_session_db] = session
+    app.dependency_overrides[get_media_stats_service] = Stats
+    app.dependency_overrides[get_storage] = lambda: LocalStorage(
+        str(tmp_path), "/media"
+    )
+    client = TestClient(app)
+
+    assert client.post("/api/v1/sermon/1/events/").status_code == 401
+    assert client.post("/api/v1/podcasts/1/events").status_code == 401
+
+    app.dependency_overrides[get_current_user] = lambda: User(id=1)
+    assert client.post("/api/v1/sermon/999/events/").status_code == 404
+    assert client.post("/api/v1/podcasts/999/events").status_code == 404
+    assert client.post("/api/v1/sermon/1/events/").status_code == 202
+    assert client.post("/api/v1/podcasts/1/events?event=download").status_code == 202
+
+    assert recorded == [("sermon", 1, "play"), ("podcast", 1, "download")]
+
+    sermon = client.get("/api/v1/sermon/1/").json()
+    assert (sermon["plays"], sermon["downloads"]) == (1, 0)
+    assert sermon["cover"]["original"] == "c.jpg"
+    podcast = client.get("/api/v1/podcasts/1").json()
+    assert (podcast["podcast_title"], podcast["plays"]) == ("p", 0)
+    # the lookups cached rows of this test's database
+    get_sermon_cache().clear()
+    get_podcast_cache().clear()
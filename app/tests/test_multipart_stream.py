@@ -0,0 +1,168 @@
+import asyncio
+import os
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from ..cld_media.storage import LocalStorage, get_storage
+from ..core.constants import SupportedMediaTypePath
+from ..db.database import Base
+from ..dependencies import get_current_user
+from ..main import create_app
+from ..models import MediaDeletion, Podcast, User
+from ..repository import media_stats_repository, podcast_repository
+from ..utils import media_files_handler
+from ..utils.multipart_stream import MAX_FIELDS, MultipartReader, fixed_size_chunks
+
+
+BOUNDARY = "----testboundary"
+
+
+def _body(audio: bytes) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="theme"\r\n\r\n'
+        "Grace\r\n"
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="audio_file"; filename="grace.mp3"\r\n'
+        "Content-Type: audio/mpeg\r\n\r\n"
+    ).encode() + audio + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def _in_pieces(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+def test_multipart_reader_streams_file_to_storage(tmp_path):
+    audio = os.urandom(300_000)
+    storage = LocalStorage(str(tmp_path), "/media")
+
+    async def run():
+        reader = MultipartReader(
+            f"multipart/form-data; boundary={BOUNDARY}",
+            _in_pieces(_body(audio), 4096),
+        )
+        fields, stored = {}, None
+        async for part in reader:
+            if part.filename is None:
+                fields[part.name] = (await part.read()).decode()
+            else:
+                stored = await storage.put_stream(
+                    part.chunks(),
+                    filename=part.filename,
+                    public_id="grace",
+                    folder_name="sermon/audios",
+                    media_type=SupportedMediaTypePath.AUDIO.name,
+                )
+        return fields, stored
+
+    fields, stored = asyncio.run(run())
+
+    assert fields == {"theme": "Grace"}
+    assert stored.url.endswith("/grace.mp3")
+    assert b"".join(storage.stream("grace", "video")) == audio
+
+
+def test_fixed_size_chunks():
+    async def run():
+        return [
+            chunk
+            async for chunk in fixed_size_chunks(_in_pieces(b"x" * 25, 7), 10)
+        ]
+
+    assert [len(c) for c in asyncio.run(run())] == [10, 10, 5]
+
+
+def test_podcast_upload_is_stored_with_its_title(tmp_path):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+
+    def session():
+        with Session(engine) as sess:
+            yield sess
+
+    storage = LocalStorage(str(tmp_path), "/media")
+    app = create_app()
+    app.dependency_overrides[podcast_repository.get_session_db] = session
+    app.dependency_overrides[media_stats_repository.get_session_db] = session
+    app.dependency_overrides[get_storage] = lambda: storage
+    app.dependency_overrides[get_current_user] = lambda: User(id=1)
+    client = TestClient(app)
+
+    response = client.post(
+        "/api/v1/podcasts/stream",
+        data={"title": "Grace", "running_episodes": "3"},
+        files={
+            "cover_image": ("cover.jpg", b"image", "image/jpeg"),
+            "video_file": ("grace.mp4", b"video", "video/mp4"),
+        },
+    )
+
+    assert response.status_code == 200
+    with Session(engine) as sess:
+        podcast = sess.scalars(select(Podcast)).one()
+    assert (podcast.podcast_title, podcast.running_episodes) == ("Grace", 3)
+    assert storage._find(podcast.cld_video_public_id, "video") is not None
+
+    [item] = client.get("/api/v1/podcasts/").json()["items"]
+    assert item["video_file"] == podcast.video_file
+    assert item["cld_video_public_id"] == podcast.cld_video_public_id
+
+
+def test_failed_uploads_queue_their_stored_files_for_deletion(tmp_path, monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(media_files_handler, "new_session", lambda: Session(engine))
+
+    app = create_app()
+    app.dependency_overrides[get_storage] = lambda: LocalStorage(
+        str(tmp_path), "/media"
+    )
+    app.dependency_overrides[get_current_user] = lambda: User(id=1)
+    client = TestClient(app)
+
+    def queued():
+        with Session(engine) as sess:
+            rows = sess.scalars(select(MediaDeletion).order_by(MediaDeletion.id))
+            return [(row.public_id, row.resource_type) for row in rows]
+
+    # a later file has the wrong type
+    response = client.post(
+        "/api/v1/podcasts/stream",
+        files=[
+            ("cover_image", ("first.jpg", b"image", "image/jpeg")),
+            ("video_file", ("second.txt", b"text", "text/plain")),
+        ],
+    )
+    assert response.status_code == 400
+    assert queued() == [("first", "image")]
+
+    # the fields don't validate once both files are stored
+    response = client.post(
+        "/api/v1/podcasts/stream",
+        data={"title": "Grace", "running_episodes": "0"},
+        files={
+            "cover_image": ("cover.jpg", b"image", "image/jpeg"),
+            "video_file": ("grace.mp4", b"video", "video/mp4"),
+        },
+    )
+    assert response.status_code == 400
+    assert queued()[1:] == [("cover", "image"), ("grace", "video")]
+
+    response = client.post(
+        "/api/v1/podcasts/stream",
+        data={f"field{i}": "x" for i in range(MAX_FIELDS + 1)},
+        files={"cover_image": ("cover.jpg", b"image", "image/jpeg")},
+    )
+    assert response.status_code == 413
@@ -0,0 +1,53 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..core.object_cache import ObjectCache
+
+
+def test_concurrent_misses_are_loaded_once():
+    cache: ObjectCache[int, str] = ObjectCache(max_size=10, ttl=60)
+    loads = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.2)
+        return "sermon"
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        results = list(pool.map(lambda _: cache.get(1, load), range(50)))
+
+    assert results == ["sermon"] * 50
+    assert len(loads) == 1
+    assert cache.misses == 1
+    assert cache.hits + cache.coalesced == 49
+
+    cache.invalidate(1)
+    assert cache.get(1, lambda: "updated") == "updated"
+
+
+def test_values_loaded_during_an_invalidation_are_not_cached():
+    cache: ObjectCache[int, str] = ObjectCache(max_size=10, ttl=60)
+
+    def load():
+        cache.invalidate(1)
+        return "stale"
+
+    assert cache.get(1, load) == "stale"
+    assert cache.get(1, lambda: "fresh") == "fresh"
+    assert cache.get(1, lambda: "unused") == "fresh"
+
+
+def test_least_recently_used_and_expired_entries_are_dropped():
+    cache: ObjectCache[int, int] = ObjectCache(max_size=2, ttl=60)
+    cache.get(1, lambda: 1)
+    cache.get(2, lambda: 2)
+    cache.get(1, lambda: 0)
+    cache.get(3, lambda: 3)
+    assert cache.get(2, lambda: 20) == 20
+    assert cache.get(1, lambda: 10) == 10
+    assert cache.get(None, lambda: None) is None
+    assert cache.size == 2
+
+    cache.ttl = 0
+    cache.get(4, lambda: 4)
+    assert cache.get(4, lambda: 40) == 40
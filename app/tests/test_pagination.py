@@ -0,0 +1,64 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
+
+from ..db.database import Base
+from ..models import Sermon
+from ..repository.sermon_repository import SermonRepository
+from ..utils.pagination import build_page
+
+
+def _sermon(i: int) -> Sermon:
+    return Sermon(
+        theme=f"sermon {i}",
+        minister="m",
+        short_note="n",
+        cover_image="c.jpg",
+        cld_image_public_id=f"c{i}",
+        audio_file="a.mp3",
+        cld_audio_public_id=f"a{i}",
+    )
+
+
+def test_total_comes_from_the_maintained_row_count():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as sess:
+        repo = SermonRepository(sess)
+        for i in range(7):
+            assert repo.insert_sermon(_sermon(i))
+        assert repo.delete_sermon(1)
+
+        queries = []
+        event.listen(
+            engine, "before_cursor_execute", lambda *args: queries.append(args[2])
+        )
+        assert repo.count_sermons() == (6, False)
+        assert not any("count(" in query.lower() for query in queries)
+
+        assert repo.count_sermons(exact=True) == (6, False)
+        assert "count(" in queries[-1].lower()
+
+        request = Request(
+            {
+                "type": "http",
+                "method": "GET",
+                "scheme": "http",
+                "server": ("testserver", 80),
+                "path": "/api/v1/sermon/",
+                "query_string": b"limit=4",
+                "headers": [],
+            }
+        )
+        rows = repo.query_sermons(limit=5, offset=0)
+        page = build_page(request, rows, lambda s: s.theme, 4, 0, repo.count_sermons())
+        assert page.items == ["sermon 6", "sermon 5", "sermon 4", "sermon 3"]
+        assert page.total == 6
+        assert page.next == "http://testserver/api/v1/sermon/?limit=4&offset=4"
+
+        rows = repo.query_sermons(limit=5, offset=4)
+        page = build_page(request, rows, lambda s: s.theme, 4, 4, repo.count_sermons())
+        assert page.items == ["sermon 2", "sermon 1"]
+        assert page.next is None
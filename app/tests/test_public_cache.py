@@ -0,0 +1,144 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from ..cld_media.storage import LocalStorage, get_storage
+from ..core import events
+from ..db.database import Base
+from ..main import create_app
+from ..models import Sermon, User
+from ..repository import media_stats_repository, sermon_repository
+from ..services.cdn_purge import PurgeQueue, RecordingPurger
+from ..services.sermon_service import get_sermon_cache
+
+
+def test_public_reads_are_cacheable_and_writes_purge_them(tmp_path):
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(engine)
+    with Session(engine) as sess:
+        sess.add(User(id=1, username="u", email="u@example.com", hashed_password="x"))
+        for i in (1, 2):
+            sess.add(
+                Sermon(
+                    id=i,
+                    theme=f"sermon {i}",
+                    minister="m",
+                    short_note="n",
+                    cover_image="c.jpg",
+                    cld_image_public_id=f"c{i}",
+                    audio_file="a.mp3",
+                    cld_audio_public_id=f"a{i}",
+                    user_id=1,
+                )
+            )
+        sess.commit()
+
+    def session():
+        with Session(engine) as sess:
+            yield sess
+
+    app = create_app()
+    app.dependency_overrides[sermon_repository.get_session_db] = session
+    app.dependency_overrides[media_stats_repository.get_session_db] = session
+    app.dependency_overrides[get_storage] = lambda: LocalStorage(
+        str(tmp_path), "/media"
+    )
+    client = TestClient(app)
+
+    listing = client.get("/api/v1/public/sermons/")
+    assert listing.status_code == 200
+    assert [item["id"] for item in listing.json()["items"]] == [2, 1]
+    assert "stale-while-revalidate=" in listing.headers["cache-control"]
+    assert listing.headers["cache-control"].startswith("public")
+    assert listing.headers["surrogate-key"] == "sermons sermon-2 sermon-1"
+    # a page changes without any of its items being updated, e.g. on delete
+    assert "last-modified" not in listing.headers
+    assert (
+        client.get(
+            "/api/v1/public/sermons/",
+            headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"},
+        ).status_code
+        == 200
+    )
+
+    revalidated = client.get(
+        "/api/v1/public/sermons/",
+        headers={"If-None-Match": listing.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+    sermon = client.get("/api/v1/public/sermons/1/")
+    assert sermon.headers["surrogate-key"] == "sermon-1"
+    # the play counts change without updated_at
+    assert "last-modified" not in sermon.headers
+    assert (
+        client.get(
+            "/api/v1/public/sermons/1/",
+            headers={"If-None-Match": sermon.headers["etag"]},
+        ).status_code
+        == 304
+    )
+    assert client.get("/api/v1/public/sermons/3/").status_code == 404
+
+    purger = RecordingPurger()
+    queue = PurgeQueue(purger, interval=1, max_pending=100)
+    events.subscribe("sermon", queue.on_event)
+    try:
+        events.publish("sermon", action="updated", id=1)
+        events.publish("sermon", action="created", id=3)
+        events.publish("sermon", action="updated", id=1)
+        queue.flush_sync()
+    finally:
+        events.unsubscribe("sermon", queue.on_event)
+    assert purger.purged == [{"sermon-1", "sermon-3", "sermons"}]
+
+
+def test_public_items_skip_the_object_cache(tmp_path):
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(engine)
+    with Session(engine) as sess:
+        sess.add(
+            Sermon(
+                id=1,
+                theme="edited",
+                minister="m",
+                short_note="n",
+                cover_image="c.jpg",
+                cld_image_public_id="c",
+                audio_file="a.mp3",
+                cld_audio_public_id="a",
+                user_id=1,
+            )
+        )
+        sess.commit()
+
+    def session():
+        with Session(engine) as sess:
+            yield sess
+
+    app = create_app()
+    app.dependency_overrides[sermon_repository.get_session_db] = session
+    app.dependency_overrides[media_stats_repository.get_session_db] = session
+    app.dependency_overrides[get_storage] = lambda: LocalStorage(
+        str(tmp_path), "/media"
+    )
+    client = TestClient(app)
+
+    # as cached by a worker that didn't make the edit
+    cache = get_sermon_cache()
+    cache.get(1, lambda: Sermon(id=1, theme="original"))
+    try:
+        sermon = client.get("/api/v1/public/sermons/1/")
+    finally:
+        cache.clear()
+    assert sermon.json()["theme"] == "edited"
@@ -0,0 +1,26 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from ..benchmarks.queries import ROWS, legacy_query_by_id, legacy_query_sermons, seed
+from ..db.database import Base
+from ..repository.podcast_repository import PodcastRepository
+from ..repository.sermon_repository import SermonRepository
+
+
+# the timings are compared by ``python -m app.benchmarks.queries``, this only
+# checks that the prebuilt statements return what the query chains did
+def test_prebuilt_statements_match_query_chains():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with Session(engine) as sess:
+        seed(sess)
+        podcasts = PodcastRepository(sess)
+        sermons = SermonRepository(sess)
+
+        assert podcasts.query_by_id(7) is legacy_query_by_id(sess, 7)
+        assert sermons.query_sermons(5, 10) == legacy_query_sermons(sess, 5, 10)
+
+        rest = sermons.query_sermons(offset=ROWS - 3)
+        assert [sermon.id for sermon in rest] == [3, 2, 1]
+        assert len(sermons.query_sermons()) == ROWS
@@ -0,0 +1,241 @@
+"""
+Query plan regression tests.
+
+Every repository query is run against a SQLite database seeded with
+realistic volumes, and the plan SQLite chose for it is checked with
+EXPLAIN QUERY PLAN. A plan that reads a whole table fails the test.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from ..db.database import Base
+from ..models import (
+    Book,
+    ListeningHourly,
+    MediaDeletion,
+    MediaStats,
+    Podcast,
+    PodcastEpisode,
+    Sermon,
+    User,
+)
+from ..repository.book_repository import BookRepository
+from ..repository.feed_repository import FeedRepository
+from ..repository.listening_repository import ListeningRepository
+from ..repository.media_outbox_repository import MediaOutboxRepository
+from ..repository.media_stats_repository import MediaStatsRepository
+from ..repository.podcast_repository import PodcastRepository
+from ..repository.sermon_repository import SermonRepository
+
+USERS = 50
+SERMONS = 5_000
+PODCASTS = 2_000
+EPISODES = 10_000
+BOOKS = 3_000
+
+# "SCAN table" without an index is a full table scan
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    with Session(engine) as sess:
+        sess.execute(
+            insert(User),
+            [
+                {
+                    "id": i,
+                    "username": f"user{i}",
+                    "email": f"user{i}@example.com",
+                    "hashed_password": "x",
+                }
+                for i in range(1, USERS + 1)
+            ],
+        )
+        sess.execute(
+            insert(Sermon),
+            [
+                {
+                    "id": i,
+                    "theme": f"theme {i}",
+                    "minister": "minister",
+                    "short_note": "note",
+                    "cover_image": "cover.jpg",
+                    "cld_image_public_id": f"cover{i}",
+                    "audio_file": "audio.mp3",
+                    "cld_audio_public_id": f"audio{i}",
+                    "user_id": i % USERS + 1,
+                }
+                for i in range(1, SERMONS + 1)
+            ],
+        )
+        sess.execute(
+            insert(Podcast),
+            [
+                {
+                    "id": i,
+                    "podcast_title": f"podcast {i}",
+                    "running_episodes": 5,
+                    "created_at": start + timedelta(hours=i),
+                    "user_id": i % USERS + 1,
+                }
+                for i in range(1, PODCASTS + 1)
+            ],
+        )
+        sess.execute(
+            insert(PodcastEpisode),
+            [
+                {
+                    "id": i,
+                    "episode_title": f"episode {i}",
+                    "episode_number": i % 5 + 1,
+                    "podcast_id": i % PODCASTS + 1,
+                }
+                for i in range(1, EPISODES + 1)
+            ],
+        )
+        sess.execute(
+            insert(Book),
+            [
+                {
+                    "id": i,
+                    "title": f"book {i}",
+                    # most books are drafts
+                    "is_published": i % 10 == 0,
+                    "uploaded_on": start + timedelta(hours=i),
+                    "user_id": i % USERS + 1,
+                }
+                for i in range(1, BOOKS + 1)
+            ],
+        )
+        sess.execute(
+            insert(MediaStats),
+            [
+                {"media_kind": "sermon", "media_id": i, "plays": i, "downloads": 0}
+                for i in range(1, SERMONS + 1)
+            ],
+        )
+        sess.execute(
+            insert(ListeningHourly),
+            [
+                {
+                    "sermon_id": i % 500 + 1,
+                    "hour": start + timedelta(hours=i),
+                    "events": 1,
+                    "seconds_listened": 60,
+                }
+                for i in range(10_000)
+            ],
+        )
+        sess.execute(
+            insert(MediaDeletion),
+            [
+                {
+                    "public_id": f"old{i}",
+                    "resource_type": "image",
+                    "attempts": i % 3,
+                    "next_attempt_at": start + timedelta(minutes=i),
+                }
+                for i in range(2_000)
+            ],
+        )
+        sess.commit()
+        sess.execute(text("ANALYZE"))
+    return engine
+
+
+def query_plans(engine, run) -> list[tuple[str, str]]:
+    """
+    Run the queries issued by run and return each of them with its plan.
+    """
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with Session(engine) as sess:
+            run(sess)
+            sess.rollback()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert statements, "no query was captured"
+    plans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            ).all()
+            plans.append((statement, "\n".join(row[-1] for row in plan)))
+    return plans
+
+
+def full_scans(engine, run) -> list[str]:
+    """
+    Return every full table scan in the plans of the queries issued by run.
+    """
+    return [
+        f"{line} in: {statement}"
+        for statement, plan in query_plans(engine, run)
+        for line in plan.splitlines()
+        if FULL_SCAN.match(line.strip())
+    ]
+
+
+def latest_sermons(sess):
+    SermonRepository(sess).query_sermons(limit=5, offset=0)
+
+
+QUERIES = {
+    "sermon by id": lambda sess: SermonRepository(sess).query_sermon(42),
+    "podcast listing": lambda sess: PodcastRepository(sess).query_podcast(5, 0),
+    "podcast by id": lambda sess: PodcastRepository(sess).query_by_id(42),
+    "published books": lambda sess: BookRepository(sess).query_published(5, 0),
+    "book by id": lambda sess: BookRepository(sess).query_by_id(42),
+    "sermons of a user": lambda sess: sess.get(User, 7).sermon,
+    "podcasts of a user": lambda sess: sess.get(User, 7).podcasts,
+    "books of a user": lambda sess: sess.get(User, 7).books,
+    "episodes of a podcast": lambda sess: sess.get(Podcast, 7).podcast_episodes,
+    "media counts": lambda sess: MediaStatsRepository(sess).query_counts(
+        "sermon", [1, 2, 3]
+    ),
+    "retention": lambda sess: ListeningRepository(sess).query_retention(7),
+    "hourly listening": lambda sess: ListeningRepository(sess).query_hourly(
+        7,
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+        datetime(2024, 2, 1, tzinfo=timezone.utc),
+    ),
+    "due media deletions": lambda sess: MediaOutboxRepository(sess).claim_due(
+        100, 8, timedelta(minutes=5)
+    ),
+}
+
+
+@pytest.mark.parametrize("name", QUERIES)
+def test_query_uses_an_index(engine, name):
+    assert full_scans(engine, QUERIES[name]) == []
+
+
+def test_listings_by_id_only_read_the_rows_they_return(engine):
+    # ordering by the primary key walks the table backwards and stops after
+    # limit rows, which SQLite reports as a plain SCAN, so these are only
+    # checked for not sorting the whole table
+    def run(sess):
+        latest_sermons(sess)
+        FeedRepository(sess).query_latest(5)
+
+    for statement, plan in query_plans(engine, run):
+        assert "TEMP B-TREE" not in plan, f"{plan}\nin: {statement}"
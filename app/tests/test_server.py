@@ -0,0 +1,44 @@
+import os
+import pickle
+import random
+
+import pytest
+
+from ..server import RecyclingConfig, compute_pool_sizing, recycle_limit
+
+
+def test_pool_sizing_stays_within_budget():
+    sizing = compute_pool_sizing(connection_budget=40, workers=4)
+
+    assert sizing.pool_size == 7
+    assert sizing.max_overflow == 3
+    assert (sizing.pool_size + sizing.max_overflow) * 4 <= 40
+
+
+def test_pool_sizing_rejects_budget_smaller_than_workers():
+    with pytest.raises(ValueError):
+        compute_pool_sizing(connection_budget=3, workers=4)
+
+
+def test_only_supervised_workers_are_recycled():
+    assert recycle_limit(10_000, workers=4) == 10_000
+    # nothing would restart a single worker
+    assert recycle_limit(10_000, workers=1) is None
+    assert recycle_limit(0, workers=4) is None
+
+
+def test_every_worker_draws_its_own_limit(monkeypatch):
+    config = RecyclingConfig(
+        "app.main:app", workers=4, limit_max_requests=100, max_requests_jitter=50
+    )
+    limit = config.limit_max_requests
+    assert 100 <= limit <= 150
+    assert config.limit_max_requests == limit
+
+    # a worker process gets a copy of the configuration
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    monkeypatch.setattr(random, "randint", lambda low, high: high)
+    assert pickle.loads(pickle.dumps(config)).limit_max_requests == 150
+
+    config.limit_max_requests = None
+    assert config.limit_max_requests is None
@@ -0,0 +1,156 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from ..benchmarks.sqlite_concurrency import run
+from ..cld_media.storage import LocalStorage, get_storage
+from ..db.database import (
+    Base,
+    RoutingSession,
+    create_sqlite_engine,
+    dispose_engine,
+    get_engine,
+    is_sqlite_file,
+    new_session,
+)
+from ..main import create_app
+from ..models import Podcast, Sermon, User
+from ..schemas.config import get_settings
+
+
+@pytest.fixture
+def engines(tmp_path):
+    url = f"sqlite:///{tmp_path / 'tbc.db'}"
+    writer = create_sqlite_engine(url, read_only=False)
+    reader = create_sqlite_engine(url, read_only=True)
+    Base.metadata.create_all(writer)
+    yield reader, writer
+    reader.dispose()
+    writer.dispose()
+
+
+def pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def test_only_database_files_use_the_profile():
+    assert is_sqlite_file("sqlite:///./tbc.db")
+    assert not is_sqlite_file("sqlite://")
+    assert not is_sqlite_file("sqlite:///:memory:")
+    assert not is_sqlite_file("postgresql://localhost/tbc")
+
+
+def test_connections_are_tuned(engines):
+    reader, writer = engines
+    for engine in engines:
+        assert pragma(engine, "journal_mode") == "wal"
+        # NORMAL
+        assert pragma(engine, "synchronous") == 1
+        assert pragma(engine, "busy_timeout") == 30_000
+        assert pragma(engine, "cache_size") == -64 * 1024
+    assert pragma(reader, "query_only") == 1
+    assert pragma(writer, "query_only") == 0
+    assert writer.pool.size() == 1
+
+    with reader.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("DELETE FROM podcasts")
+
+
+def test_writes_go_to_the_writer_and_see_their_changes(engines):
+    reader, writer = engines
+    count = select(func.count()).select_from(Podcast)
+
+    with RoutingSession(reader, writer) as sess:
+        assert sess.get_bind(clause=count) is reader
+        sess.add(Podcast(podcast_title="first"))
+        sess.flush()
+        # the transaction wrote, its reads see the uncommitted row
+        assert sess.get_bind(clause=count) is writer
+        assert sess.scalar(count) == 1
+        sess.commit()
+
+        assert sess.get_bind(clause=count) is reader
+        assert sess.scalar(count) == 1
+
+
+def test_concurrent_writes_are_serialized(engines):
+    reader, writer = engines
+    errors = []
+
+    def write(n):
+        try:
+            for i in range(20):
+                with RoutingSession(reader, writer) as sess:
+                    sess.add(Podcast(podcast_title=f"podcast {n}-{i}"))
+                    sess.commit()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with RoutingSession(reader, writer) as sess:
+        assert sess.scalar(select(func.count()).select_from(Podcast)) == 160
+
+
+def test_benchmark_reads_and_writes_with_the_profile():
+    results = {result.profile: result for result in run(0.3, 4, 2, 0)}
+
+    assert results.keys() == {"default", "embedded"}
+    embedded = results["embedded"]
+    assert embedded.reads_per_second > 0
+    assert embedded.writes_per_second > 0
+    assert embedded.errors == 0
+
+
+def test_concurrent_requests_dont_exhaust_the_read_pool(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{tmp_path / 'tbc.db'}")
+    # every request opens a session for the sermons and one for the counts
+    monkeypatch.setattr(settings, "SQLITE_READ_POOL_SIZE", 2)
+    # requests queueing for the threadpool are slow, keep them out of the ring
+    monkeypatch.setattr(settings, "TRACING_ENABLED", False)
+    dispose_engine()
+    Base.metadata.create_all(get_engine())
+    with new_session() as sess:
+        sess.add(User(id=1, username="u", email="u@example.com", hashed_password="x"))
+        sess.add(
+            Sermon(
+                theme="sermon",
+                minister="m",
+                short_note="n",
+                cover_image="c.jpg",
+                cld_image_public_id="c",
+                audio_file="a.mp3",
+                cld_audio_public_id="a",
+                user_id=1,
+            )
+        )
+        sess.commit()
+
+    app = create_app()
+    app.dependency_overrides[get_storage] = lambda: LocalStorage(
+        str(tmp_path), "/media"
+    )
+    try:
+        with TestClient(app) as client, ThreadPoolExecutor(20) as pool:
+            statuses = list(
+                pool.map(
+                    lambda _: client.get("/api/v1/public/sermons/").status_code,
+                    range(40),
+                )
+            )
+    finally:
+        dispose_engine()
+
+    assert statuses == [200] * 40
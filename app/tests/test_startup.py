@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+
+from ..benchmarks.startup import import_time_ms, time_to_first_response_ms
+from ..core import events
+from ..db.database import Base, dispose_engine, get_engine
+from ..main import create_app, reset_singletons
+from ..schemas.config import get_settings, set_settings
+from ..services.sermon_service import get_sermon_cache
+
+# Cold start budgets in milliseconds. They leave headroom for slow CI
+# machines; a regression past them usually means something heavy is being
+# done at import time again.
+IMPORT_BUDGET_MS = 1500
+FIRST_RESPONSE_BUDGET_MS = 3000
+
+
+def test_import_time_budget():
+    assert import_time_ms("app.main") < IMPORT_BUDGET_MS
+
+
+def test_time_to_first_response_budget():
+    assert time_to_first_response_ms() < FIRST_RESPONSE_BUDGET_MS
+
+
+def test_create_app_rebuilds_singletons_and_mounts_media_once(tmp_path):
+    previous = get_settings()
+    old_cache = get_sermon_cache()
+    old_cache.get(1, lambda: "cached")
+    media = tmp_path / "media"
+    media.mkdir()
+    (media / "note.txt").write_text("hello")
+    settings = previous.model_copy(
+        update={
+            "DATABASE_URL": f"sqlite:///{tmp_path / 'tbc.db'}",
+            "STORAGE_BACKEND": "local",
+            "MEDIA_ROOT": str(media),
+            "TRACING_ENABLED": False,
+        }
+    )
+    try:
+        app = create_app(settings)
+        Base.metadata.create_all(get_engine())
+        assert get_sermon_cache() is not old_cache
+        # the replaced cache no longer follows content changes
+        events.publish("sermon", action="updated", id=1)
+        assert old_cache.size == 1
+
+        routes = len(app.routes)
+        for _ in range(2):
+            with TestClient(app) as client:
+                assert client.get("/media/note.txt").text == "hello"
+        assert len(app.routes) == routes
+    finally:
+        set_settings(previous)
+        dispose_engine()
+        reset_singletons()
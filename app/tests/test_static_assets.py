@@ -0,0 +1,39 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ..utils.static_assets import PrecompressedStaticFiles, build_static
+
+
+def test_build_and_serve_precompressed_assets(tmp_path):
+    (tmp_path / "main.js").write_text("console.log('hello world');\n" * 50)
+    manifest = build_static(str(tmp_path))
+
+    fingerprinted = manifest["main.js"]
+    assert fingerprinted.startswith("dist/main.") and fingerprinted.endswith(".js")
+    assert (tmp_path / (fingerprinted + ".gz")).exists()
+
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=str(tmp_path)))
+    client = TestClient(app)
+
+    response = client.get(f"/static/{fingerprinted}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["content-type"].startswith("text/javascript")
+    assert response.text == (tmp_path / "main.js").read_text()
+
+    response = client.get("/static/main.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["cache-control"] == "no-cache"
+
+    # q=0 refuses a coding, directly or through *
+    for refused in ("gzip;q=0", "*;q=0", "br, gzip; q=0.0", "*, gzip;q=0"):
+        response = client.get(
+            f"/static/{fingerprinted}", headers={"Accept-Encoding": refused}
+        )
+        assert "content-encoding" not in response.headers, refused
+    response = client.get(
+        f"/static/{fingerprinted}", headers={"Accept-Encoding": "*;q=0.5"}
+    )
+    assert response.headers["content-encoding"] == "gzip"
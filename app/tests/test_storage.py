@@ -0,0 +1,114 @@
+import asyncio
+import io
+import os
+import tempfile
+
+from ..cld_media.storage import LocalStorage, copy_file
+from ..core.constants import COVER_RENDITIONS, SupportedMediaTypePath
+from ..schemas.media import CoverImage
+
+
+def test_local_storage_roundtrip(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/media")
+    data = os.urandom(600_000)
+
+    stored = asyncio.run(
+        storage.put(
+            io.BytesIO(data),
+            filename="Sunday service.mp3",
+            public_id="Sunday_service",
+            folder_name="sermon/audios/2025",
+            media_type=SupportedMediaTypePath.AUDIO.name,
+        )
+    )
+
+    assert stored.resource_type == "video"
+    assert stored.url.startswith("/media/")
+    assert stored.url.endswith("/Sunday_service.mp3")
+    assert storage.url("Sunday_service", "video") == stored.url
+    assert b"".join(storage.stream("Sunday_service", "video")) == data
+    assert (
+        b"".join(storage.stream("Sunday_service", "video", start=10, end=19))
+        == data[10:20]
+    )
+
+    assert storage.delete("Sunday_service", "video") is True
+    assert storage._find("Sunday_service", "video") is None
+
+
+def test_public_ids_are_namespaced_per_resource_type(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/media")
+
+    def put(data, filename, media_type):
+        return asyncio.run(
+            storage.put(
+                io.BytesIO(data),
+                filename=filename,
+                public_id="grace",
+                folder_name="sermon",
+                media_type=media_type.name,
+            )
+        )
+
+    cover = put(b"image", "grace.jpg", SupportedMediaTypePath.IMAGE)
+    audio = put(b"audio", "grace.mp3", SupportedMediaTypePath.AUDIO)
+
+    assert storage.url("grace", "image") == cover.url
+    assert storage.url("grace", "video") == audio.url
+    assert storage.url("grace") == cover.url
+
+    # uploading the same public id again replaces the file, as on cloudinary
+    replaced = put(b"audio", "grace.wav", SupportedMediaTypePath.AUDIO)
+    assert storage.url("grace", "video") == replaced.url
+
+    storage.delete("grace", "image")
+    assert storage._find("grace", "image") is None
+    assert b"".join(storage.stream("grace", "video")) == b"audio"
+
+
+def test_copy_file_from_disk_backed_file(tmp_path):
+    data = os.urandom(2_000_000)
+    with tempfile.SpooledTemporaryFile(max_size=1024) as src:
+        src.write(data)
+        src.seek(100)
+        with open(tmp_path / "out", "wb") as dst:
+            copy_file(src, dst)
+
+    assert (tmp_path / "out").read_bytes() == data[100:]
+
+
+def test_cover_srcset_only_lists_renditions_of_one_aspect_ratio(tmp_path):
+    class Renditions(LocalStorage):
+        def renditions(self, public_id):
+            return {name: f"/{name}.jpg" for name in COVER_RENDITIONS}
+
+    cover = CoverImage.from_storage(
+        Renditions(str(tmp_path), "/media"), "cover", "/cover.jpg"
+    )
+
+    assert cover.thumbnail == "/thumbnail.jpg"
+    # the square thumbnail would be picked for narrow layouts and get cropped
+    assert cover.srcset == "/card.jpg 480w, /hero.jpg 1280w"
+
+
+def test_public_ids_from_any_filename_can_be_stored(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/media")
+
+    assert storage.create_public_id("Sunday service.mp3") == "Sunday_service"
+    assert storage.create_public_id("a/b.jpg") == "b"
+    assert storage.create_public_id("C:\\\\covers\\\\old cover.png") == "old_cover"
+    assert storage.create_public_id("x?y#z.jpg") == "x_y_z"
+    for filename in ("..jpg", ".jpg", "/", "", "a.b/c"):
+        public_id = storage.create_public_id(filename)
+        assert public_id and not public_id.startswith("."), filename
+        stored = asyncio.run(
+            storage.put(
+                io.BytesIO(b"data"),
+                filename=filename,
+                public_id=public_id,
+                folder_name="sermon/images",
+                media_type=SupportedMediaTypePath.IMAGE.name,
+            )
+        )
+        assert storage._find(public_id, "image") is not None
+        assert stored.url.endswith((".jpg", ".bin")), filename
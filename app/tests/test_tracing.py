@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from ..core.tracing import (
+    TracedRoute,
+    Tracer,
+    current_span,
+    get_tracer,
+    parse_traceparent,
+    traced_class,
+    traceparent,
+)
+from ..dependencies import get_current_admin_user, get_current_user
+from ..main import app as main_app
+from ..middleware.tracing import TracingMiddleware
+from ..models.user import User
+
+PARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+@traced_class
+class Repository:
+    def load(self, slow: float = 0) -> str:
+        time.sleep(slow)
+        return "row"
+
+    def fail(self) -> None:
+        raise RuntimeError("db down")
+
+
+@traced_class
+class Service:
+    def __init__(self) -> None:
+        self.repo = Repository()
+
+    async def get(self, slow: float = 0) -> str:
+        return await asyncio.to_thread(self.repo.load, slow)
+
+    def broken(self) -> None:
+        self.repo.fail()
+
+
+def create_app(tracer: Tracer) -> FastAPI:
+    router = APIRouter(route_class=TracedRoute)
+
+    @router.get("/items/{id}")
+    async def get_item(id: int, slow: float = 0):
+        return {"value": await Service().get(slow)}
+
+    @router.get("/broken")
+    def broken():
+        Service().broken()
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+    return app
+
+
+def test_traceparent():
+    assert parse_traceparent(PARENT) == (
+        "4bf92f3577b34da6a3ce929d0e0e4736",
+        "00f067aa0ba902b7",
+        True,
+    )
+    assert parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(None) is None
+
+
+def test_spans_are_only_recorded_in_a_trace():
+    assert Repository().load() == "row"
+    assert current_span() is None
+    assert traceparent() is None
+
+
+def test_only_slow_failed_or_sampled_traces_are_kept():
+    tracer = Tracer(sample_rate=0, slow_ms=200, ring_size=10, max_spans=100)
+    client = TestClient(create_app(tracer), raise_server_exceptions=False)
+
+    assert client.get("/items/1").json() == {"value": "row"}
+    assert tracer.finished == 1 and tracer.ring.recent() == []
+
+    client.get("/items/1", params={"slow": 0.25})
+    (slow,) = tracer.ring.recent()
+    assert slow["name"] == "GET /items/{id}"
+    assert slow["duration_ms"] >= 200
+    assert not slow["error"]
+    names = [span["name"] for span in slow["spans"]]
+    assert names == [
+        "GET /items/{id}",
+        "route /items/{id}",
+        "Service.get",
+        "Repository.load",
+    ]
+    # the span of the worker thread is a child of the async service call
+    by_name = {span["name"]: span for span in slow["spans"]}
+    load, get = by_name["Repository.load"], by_name["Service.get"]
+    assert load["parent_id"] == get["span_id"]
+    assert load["duration_ms"] >= 200
+
+    assert client.get("/broken").status_code == 500
+    broken = tracer.ring.recent()[0]
+    assert broken["error"]
+    assert broken["spans"][-1]["name"] == "Repository.fail"
+    assert broken["spans"][-1]["error"] == "RuntimeError: db down"
+
+    # the caller sampled the trace, it is continued and kept
+    client.get("/items/2", headers={"traceparent": PARENT})
+    continued = tracer.ring.recent()[0]
+    assert continued["trace_id"] == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert continued["spans"][0]["parent_id"] == "00f067aa0ba902b7"
+    assert tracer.ring.get(continued["trace_id"]) == continued
+    assert tracer.finished == 4
+
+
+def test_admin_endpoints_list_kept_traces():
+    tracer = get_tracer()
+    tracer.ring.add(
+        {"trace_id": "a" * 32, "name": "GET /x", "duration_ms": 5.0, "spans": []}
+    )
+    client = TestClient(main_app)
+
+    main_app.dependency_overrides[get_current_user] = lambda: User(is_admin=False)
+    try:
+        assert client.get("/api/v1/admin/traces/").status_code == 403
+    finally:
+        del main_app.dependency_overrides[get_current_user]
+
+    main_app.dependency_overrides[get_current_admin_user] = lambda: User(is_admin=True)
+    try:
+        listed = client.get("/api/v1/admin/traces/").json()
+        assert listed[0] == {
+            "trace_id": "a" * 32,
+            "name": "GET /x",
+            "duration_ms": 5.0,
+        }
+        slow = client.get("/api/v1/admin/traces/", params={"min_duration_ms": 10})
+        assert slow.json() == []
+        assert client.get(f"/api/v1/admin/traces/{'a' * 32}").json()["spans"] == []
+        assert client.get(f"/api/v1/admin/traces/{'b' * 32}").status_code == 404
+    finally:
+        del main_app.dependency_overrides[get_current_admin_user]
@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from ..benchmarks.replay import ALL, compare, format_comparison, replay, summarize
+from ..core.jwt_token import create_access_token
+from ..middleware.traffic_capture import TrafficCaptureMiddleware, TrafficRecorder
+
+
+def create_app(recorder: TrafficRecorder, sample_rate: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{id}")
+    async def get_item(id: int):
+        return {"id": id}
+
+    @app.post("/items/")
+    async def create_item(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.get("/api/v1/changes/")
+    async def changes():
+        return {}
+
+    app.add_middleware(
+        TrafficCaptureMiddleware, recorder=recorder, sample_rate=sample_rate
+    )
+    return app
+
+
+def captured(recorder: TrafficRecorder) -> list[dict]:
+    recorder.flush_sync()
+    with open(recorder.path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_requests_are_recorded_without_secrets(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path / "traffic.jsonl"), 1.0, 100)
+    client = TestClient(create_app(recorder, 1.0))
+    token = create_access_token({"sub": "user@example.com"})
+
+    client.get(
+        "/items/7?access_token=abc&page=2",
+        headers={"Authorization": f"Bearer {token}", "Cookie": "session=abc"},
+    )
+    client.post(
+        "/items/", content=b"x" * 100, headers={"Content-Type": "text/plain"}
+    )
+    client.get("/items/8", headers={"Authorization": "Bearer forged"})
+    client.get("/api/v1/changes/")
+
+    first, second, third = captured(recorder)
+    assert first["method"] == "GET"
+    assert first["path"] == "/items/7"
+    assert first["route"] == "/items/{id}"
+    assert first["query"] == "access_token=REDACTED&page=2"
+    assert first["status"] == 200
+    assert first["response_bytes"] == len(b'{"id":7}')
+    assert first["user_class"] == "authenticated"
+    assert first["duration_ms"] >= 0
+    serialized = json.dumps(first)
+    assert token not in serialized and "abc" not in serialized
+
+    assert second["request_bytes"] == 100
+    assert second["content_type"] == "text/plain"
+    assert second["user_class"] == "anonymous"
+    assert third["user_class"] == "invalid"
+
+
+def test_unsampled_requests_are_not_recorded(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path / "traffic.jsonl"), 1.0, 100)
+    client = TestClient(create_app(recorder, 0.0))
+
+    client.get("/items/1")
+
+    assert recorder.pending == 0
+
+
+def test_replay_and_compare(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path / "traffic.jsonl"), 1.0, 100)
+    app = create_app(recorder, 1.0)
+    client = TestClient(app)
+    token = create_access_token({"sub": "user@example.com"})
+    for id in range(5):
+        client.get(f"/items/{id}")
+    client.get("/items/9", headers={"Authorization": f"Bearer {token}"})
+    client.post("/items/", content=b"x")
+    records = captured(recorder)
+
+    async def run(**kwargs):
+        # a target that doesn't capture
+        target = create_app(TrafficRecorder(str(tmp_path / "ignored"), 1, 100), 0.0)
+        return await replay(
+            records,
+            "http://test",
+            speed=0,
+            transport=httpx.ASGITransport(app=target),
+            **kwargs,
+        )
+
+    base = asyncio.run(run())
+    # writes and, without a token, authenticated requests are skipped
+    assert len(base) == 5
+    assert {result["route"] for result in base} == {"/items/{id}"}
+    assert all(result["status"] == 200 for result in base)
+
+    candidate = asyncio.run(run(token=token))
+    assert len(candidate) == 6
+
+    summary = summarize(candidate)
+    assert summary[ALL].count == 6
+    assert summary["GET /items/{id}"].errors == 0
+
+    rows = compare(base, candidate)
+    assert [key for key, _, _ in rows] == [ALL, "GET /items/{id}"]
+    assert "GET /items/{id}" in format_comparison(rows)
@@ -0,0 +1,81 @@
+"""
+Helpers for responses that shared caches and CDNs may store.
+
+Responses carry a validator (ETag and, when known, Last-Modified) so caches
+can revalidate cheaply, and Surrogate-Key headers naming the content they
+contain, so a write can purge exactly the cached responses it affects.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from ..schemas.config import get_settings
+
+
+def surrogate_key(kind: str, id: int | None = None) -> str:
+    """
+    Return the surrogate key of a sermon or podcast, or of the lists of
+    kind when no id is given.
+    """
+    return f"{kind}s" if id is None else f"{kind}-{id}"
+
+
+def cache_control() -> str:
+    settings = get_settings()
+    return (
+        f"public, max-age={settings.PUBLIC_CACHE_MAX_AGE}, "
+        f"s-maxage={settings.PUBLIC_CACHE_S_MAXAGE}, "
+        f"stale-while-revalidate={settings.PUBLIC_CACHE_STALE_WHILE_REVALIDATE}, "
+        f"stale-if-error={settings.PUBLIC_CACHE_STALE_IF_ERROR}"
+    )
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # weak comparison, If-Modified-Since is ignored when both are sent
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+def cacheable_response(
+    request: Request,
+    content: BaseModel,
+    surrogate_keys: Iterable[str],
+    last_modified: datetime | None = None,
+) -> Response:
+    """
+    Serialize content into a publicly cacheable response, or a 304 when the
+    client's copy is still current.
+    """
+    body = content.model_dump_json().encode()
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {
+        "Cache-Control": cache_control(),
+        "ETag": etag,
+        "Surrogate-Key": " ".join(dict.fromkeys(surrogate_keys)),
+    }
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            # SQLite hands back naive timestamps, they are stored in UTC
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        last_modified = last_modified.astimezone(timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,39 @@
+"""
+Parsing of the HTTP Range request header.
+"""
+
+from fastapi import HTTPException, status
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Return the (start, end) byte positions, inclusive, of a Range header.
+
+    Only single ranges are supported, None is returned when the whole file
+    should be served instead: no header, another unit or several ranges.
+
+    Raises:
+        HTTPException: 416 when the range lies outside the file.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+
+    first, _, last = header[len("bytes=") :].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # suffix range, the last n bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
@@ -1,16 +1,27 @@
+import asyncio
 import os
-import shutil
+from typing import Iterable
 from uuid import uuid4
 
-from fastapi import UploadFile
+from fastapi import HTTPException, Request, UploadFile, status
 
 from ..core.constants import (
     MEDIA_DIR,
     IMAGE_FILE_TYPES,
     AUDIO_FILE_TYPES,
     VIDEO_FILE_TYPES,
+    DOCUMENT_FILE_TYPES,
     SupportedMediaTypePath,
 )
+from ..cld_media.storage import StorageBackend, StoredMedia, write_atomic
+from ..db.database import new_session
+from ..repository.media_outbox_repository import enqueue_media_deletion
+from .multipart_stream import (
+    MAX_FIELD_SIZE,
+    MAX_FIELDS,
+    MAX_FIELDS_SIZE,
+    MultipartReader,
+)
 
 
 def save_file(file: UploadFile, subdir: str) -> str | None:
@@ -30,17 +41,15 @@ def save_file(file: UploadFile, subdir: str) -> str | None:
         if subdir == SupportedMediaTypePath.VIDEO.name:
             if file_ext not in VIDEO_FILE_TYPES:
                 raise ValueError("File extension not supported")
+        if subdir == SupportedMediaTypePath.DOCUMENT.name:
+            if file_ext not in DOCUMENT_FILE_TYPES:
+                raise ValueError("File extension not supported")
 
         file.filename = (
             file.filename.split(".")[0] + "-" + str(ran_num) + "." + file_ext  # type: ignore
         )
-        folder = os.path.join(MEDIA_DIR, subdir)
-        os.makedirs(folder, exist_ok=True)
-        file_path = os.path.join(folder, file.filename)  # type: ignore
-        print("file_path is: ", file_path)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        return file_path
+        file_path = os.path.join(MEDIA_DIR, subdir, file.filename)  # type: ignore
+        return write_atomic(file.file, file_path)
     return None
 
 
@@ -49,7 +58,17 @@ def validate_file(file: UploadFile, media_type: str) -> bool:
     Return file path to be saved in DB.
     """
     if file:
-        file_ext = file.filename.split(".")[-1]  # type: ignore
+        return validate_filename(file.filename, media_type)  # type: ignore
+
+    return False
+
+
+def validate_filename(filename: str | None, media_type: str) -> bool:
+    """
+    Check that the extension of the file name matches the media type.
+    """
+    if filename:
+        file_ext = filename.split(".")[-1]
 
         if media_type == SupportedMediaTypePath.AUDIO.name:
             if file_ext in AUDIO_FILE_TYPES:
@@ -60,6 +79,98 @@ def validate_file(file: UploadFile, media_type: str) -> bool:
         if media_type == SupportedMediaTypePath.VIDEO.name:
             if file_ext in VIDEO_FILE_TYPES:
                 return True
+        if media_type == SupportedMediaTypePath.DOCUMENT.name:
+            if file_ext in DOCUMENT_FILE_TYPES:
+                return True
         return False
 
     return False
+
+
+async def stream_form_uploads(
+    request: Request,
+    storage: StorageBackend,
+    files: dict[str, tuple[str, str]],
+) -> tuple[dict[str, str], dict[str, StoredMedia]]:
+    """Read a multipart request and stream every file field straight to storage.
+
+    Args:
+        request (Request): The incoming multipart request.
+        storage (StorageBackend): Where the files are stored.
+        files (dict[str, tuple[str, str]]): Maps file field names to their
+            media type and storage folder.
+
+    Raises:
+        HTTPException: A file has the wrong type or is sent twice, a file
+            field is missing or the text fields are too many or too large.
+            The files stored until then are queued for deletion.
+
+    Returns:
+        tuple: The text fields and the stored files, keyed by field name.
+    """
+    reader = MultipartReader(request.headers.get("content-type", ""), request.stream())
+    fields: dict[str, str] = {}
+    fields_size = 0
+    stored: dict[str, StoredMedia] = {}
+
+    try:
+        async for part in reader:
+            if part.filename is None:
+                if len(fields) >= MAX_FIELDS:
+                    raise HTTPException(
+                        detail="Too many form fields",
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    )
+                value = await part.read(
+                    min(MAX_FIELD_SIZE, MAX_FIELDS_SIZE - fields_size)
+                )
+                fields_size += len(value)
+                fields[part.name] = value.decode()
+                continue
+            if part.name not in files:
+                continue
+
+            media_type, folder_name = files[part.name]
+            if part.name in stored or not validate_filename(
+                part.filename, media_type
+            ):
+                raise HTTPException(
+                    detail="Please provide the valid image or audio file.",
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                )
+            stored[part.name] = await storage.put_stream(
+                part.chunks(),
+                filename=part.filename,
+                public_id=storage.create_public_id(part.filename),
+                folder_name=folder_name,
+                media_type=media_type,
+            )
+
+        missing = files.keys() - stored.keys()
+        if missing:
+            raise HTTPException(
+                detail=f"Missing file field(s): {', '.join(sorted(missing))}",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+    except BaseException:
+        await discard_uploads(stored.values())
+        raise
+    return fields, stored
+
+
+async def discard_uploads(stored: Iterable[StoredMedia]) -> None:
+    """
+    Queue the deletion of files stored for a request that then failed, they
+    are deleted in the background like replaced files.
+    """
+    stored = list(stored)
+    if not stored:
+        return
+
+    def enqueue() -> None:
+        with new_session() as sess:
+            for media in stored:
+                enqueue_media_deletion(sess, media.public_id, media.resource_type)
+            sess.commit()
+
+    await asyncio.to_thread(enqueue)
@@ -0,0 +1,204 @@
+"""
+Incremental multipart/form-data reader.
+
+Unlike ``Request.form()`` nothing is spooled to a temporary file: parts are
+handed out one after the other while the request body is still arriving,
+and the data of a file part is yielded chunk by chunk as it is received.
+Reading stops whenever the consumer stops pulling, so a slow consumer
+applies backpressure all the way to the client connection.
+"""
+
+from collections import deque
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+
+# form fields that aren't files are kept in memory, so they are size limited
+MAX_FIELD_SIZE = 64 * 1024
+# and so are their number and their total size within a request
+MAX_FIELDS = 32
+MAX_FIELDS_SIZE = 256 * 1024
+
+_PART_BEGIN, _DATA, _PART_END = range(3)
+
+
+class StreamingPart:
+    """
+    A part of a multipart body whose data is read on demand.
+    """
+
+    def __init__(self, reader: "MultipartReader", headers: dict[bytes, bytes]) -> None:
+        self._reader = reader
+        disposition = headers.get(b"content-disposition", b"")
+        _, params = parse_options_header(disposition)
+        self.name: str = params.get(b"name", b"").decode()
+        filename = params.get(b"filename")
+        self.filename: str | None = filename.decode() if filename is not None else None
+        self.content_type: str = headers.get(b"content-type", b"").decode()
+        self.finished = False
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """
+        Yield the data of the part as it arrives.
+        """
+        while not self.finished:
+            next_event = await self._reader._next_event()
+            if next_event is None:
+                raise HTTPException(
+                    detail="Unexpected end of multipart body",
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                )
+            event, data = next_event
+            if event == _DATA:
+                yield data
+            elif event == _PART_END:
+                self.finished = True
+
+    async def read(self, limit: int = MAX_FIELD_SIZE) -> bytes:
+        """
+        Read the whole part into memory, failing if it is larger than limit.
+        """
+        body = bytearray()
+        async for chunk in self.chunks():
+            body += chunk
+            if len(body) > limit:
+                raise HTTPException(
+                    detail=f"Form field {self.name!r} is too large",
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                )
+        return bytes(body)
+
+
+class MultipartReader:
+    """
+    Pull based reader over a multipart request body.
+
+    Args:
+        content_type (str): Content-Type header of the request.
+        stream (AsyncIterator[bytes]): The request body, e.g. request.stream().
+    """
+
+    def __init__(self, content_type: str, stream: AsyncIterator[bytes]) -> None:
+        _, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise HTTPException(
+                detail="Missing boundary in multipart body",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+        self._stream = stream.__aiter__()
+        self._events: deque[tuple[int, object]] = deque()
+        self._current: StreamingPart | None = None
+        self._exhausted = False
+        self._ended = False
+
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: dict[bytes, bytes] = {}
+
+        self._parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_end": self._on_end,
+            },
+        )
+
+    # parser callbacks, they only record events for the async side
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self._events.append((_DATA, data[start:end]))
+
+    def _on_part_end(self) -> None:
+        self._events.append((_PART_END, None))
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        self._events.append((_PART_BEGIN, self._headers))
+
+    def _on_end(self) -> None:
+        self._ended = True
+
+    async def _next_event(self) -> tuple[int, object] | None:
+        """
+        Return the next parser event, reading more of the body when needed.
+        Returns None once the closing boundary was parsed.
+        """
+        while not self._events:
+            if self._ended:
+                return None
+            if self._exhausted:
+                raise HTTPException(
+                    detail="Unexpected end of multipart body",
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                )
+            try:
+                chunk = await self._stream.__anext__()
+            except StopAsyncIteration:
+                self._exhausted = True
+                self._parser.finalize()
+                continue
+            if chunk:
+                self._parser.write(chunk)
+        return self._events.popleft()
+
+    async def next_part(self) -> StreamingPart | None:
+        """
+        Return the next part, skipping what is left of the current one.
+        Returns None at the end of the body.
+        """
+        if self._current is not None and not self._current.finished:
+            async for _ in self._current.chunks():
+                pass
+
+        while True:
+            next_event = await self._next_event()
+            if next_event is None:
+                return None
+            event, data = next_event
+            if event == _PART_BEGIN:
+                self._current = StreamingPart(self, data)  # type: ignore
+                return self._current
+
+    async def __aiter__(self) -> AsyncIterator[StreamingPart]:
+        while (part := await self.next_part()) is not None:
+            yield part
+
+
+async def fixed_size_chunks(
+    chunks: AsyncIterator[bytes], chunk_size: int
+) -> AsyncIterator[bytes]:
+    """
+    Regroup a stream of arbitrarily sized chunks into chunks of chunk_size
+    bytes. Only the last chunk may be smaller.
+    """
+    buffer = bytearray()
+    async for data in chunks:
+        buffer += data
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    if buffer:
+        yield bytes(buffer)
@@ -0,0 +1,34 @@
+from typing import Callable, Sequence, TypeVar
+
+from fastapi import Request
+
+from ..schemas.pagination import Page
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def build_page(
+    request: Request,
+    rows: Sequence[T],
+    serialize: Callable[[T], R],
+    limit: int,
+    offset: int,
+    total: tuple[int, bool],
+) -> Page[R]:
+    """
+    Build the envelope of a list endpoint.
+
+    rows are the result of querying limit + 1 rows, the extra row only
+    tells whether there is a next page.
+    """
+    items = [serialize(row) for row in rows[:limit]]
+    next_url = None
+    if len(rows) > limit:
+        next_url = str(
+            request.url.include_query_params(limit=limit, offset=offset + limit)
+        )
+    count, estimated = total
+    # an estimate may be behind, never report fewer rows than were seen
+    count = max(count, offset + len(rows))
+    return Page(items=items, total=count, total_estimated=estimated, next=next_url)
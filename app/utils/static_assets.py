@@ -0,0 +1,224 @@
+"""
+Build and serve fingerprinted, precompressed static assets.
+
+``python -m app build-static`` copies every file in ``static/`` to
+``static/dist/`` under a content hashed name, writes gzip and brotli
+siblings next to it and records the mapping in
+``static/dist/manifest.json``. Templates resolve
+``url_for('static', path=...)`` through that manifest and the /static mount
+serves the precompressed variant the client accepts with a long lived,
+immutable cache header.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+from functools import lru_cache
+from io import BytesIO
+from typing import TYPE_CHECKING, Any
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from ..cld_media.storage import write_atomic
+
+if TYPE_CHECKING:
+    from fastapi.templating import Jinja2Templates
+
+try:
+    import brotli
+except ImportError:  # in requirements.txt, gzip is still produced without it
+    brotli = None
+
+
+STATIC_DIR = "static"
+BUILD_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+
+# only text based assets benefit from compression
+COMPRESSIBLE_EXTENSIONS = {
+    ".js",
+    ".mjs",
+    ".css",
+    ".html",
+    ".svg",
+    ".json",
+    ".map",
+    ".txt",
+    ".xml",
+}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# encodings in order of preference with the suffix of their sibling file
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(header: str) -> dict[str, float]:
+    """
+    Parse an Accept-Encoding header into the quality of each coding.
+    """
+    qualities: dict[str, float] = {}
+    for item in header.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities
+
+
+def accepts(qualities: dict[str, float], coding: str) -> bool:
+    """
+    Whether a coding is acceptable, q=0 refuses it, also through ``*``.
+    """
+    quality = qualities.get(coding, qualities.get("*", 0.0))
+    return quality > 0
+
+
+def _fingerprint(name: str, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest}{ext}"
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    write_atomic(BytesIO(data), path)
+
+
+def build_static(static_dir: str = STATIC_DIR) -> dict[str, str]:
+    """
+    Fingerprint and precompress the assets of ``static_dir``.
+
+    Returns the manifest mapping source paths to fingerprinted paths, both
+    relative to ``static_dir``.
+    """
+    build_dir = os.path.join(static_dir, BUILD_DIR)
+    manifest: dict[str, str] = {}
+
+    for root, dirs, files in os.walk(static_dir):
+        if os.path.abspath(root) == os.path.abspath(static_dir) and BUILD_DIR in dirs:
+            dirs.remove(BUILD_DIR)
+
+        for name in files:
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                data = f.read()
+
+            fingerprinted = posixpath.join(
+                BUILD_DIR, posixpath.dirname(relative), _fingerprint(name, data)
+            )
+            target = os.path.join(static_dir, *fingerprinted.split("/"))
+            _write_bytes(target, data)
+
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(gzipped) < len(data):
+                    _write_bytes(target + ".gz", gzipped)
+                if brotli is not None:
+                    compressed = brotli.compress(data, quality=11)
+                    if len(compressed) < len(data):
+                        _write_bytes(target + ".br", compressed)
+
+            manifest[relative] = fingerprinted
+
+    _write_bytes(
+        os.path.join(build_dir, MANIFEST_NAME),
+        json.dumps(manifest, indent=2, sort_keys=True).encode(),
+    )
+    load_manifest.cache_clear()
+    return manifest
+
+
+@lru_cache
+def load_manifest(static_dir: str = STATIC_DIR) -> dict[str, str]:
+    """
+    Returns the manifest of the last build, or an empty one if there is none.
+    """
+    try:
+        with open(os.path.join(static_dir, BUILD_DIR, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def asset_path(path: str, static_dir: str = STATIC_DIR) -> str:
+    """
+    Returns the fingerprinted path of an asset, or the path itself if the
+    asset wasn't built.
+    """
+    return load_manifest(static_dir).get(path.lstrip("/"), path)
+
+
+def install_asset_url_for(templates: "Jinja2Templates") -> None:
+    """
+    Make ``url_for('static', path=...)`` in templates point to built assets.
+    """
+    from jinja2 import pass_context
+
+    default_url_for = templates.env.globals["url_for"]
+
+    @pass_context
+    def url_for(context: dict, name: str, /, **path_params: Any):
+        if name == "static" and "path" in path_params:
+            path_params["path"] = asset_path(path_params["path"])
+        return default_url_for(context, name, **path_params)
+
+    templates.env.globals["url_for"] = url_for
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves the precompressed sibling of a file when the
+    client accepts its encoding and marks fingerprinted files as immutable.
+    """
+
+    def file_response(
+        self,
+        full_path: str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+
+        path, encoding = full_path, None
+        for name, suffix in ENCODINGS:
+            if accepts(accepted, name) and os.path.isfile(full_path + suffix):
+                path, encoding = full_path + suffix, name
+                stat_result = os.stat(path)
+                break
+
+        # the media type is guessed from the original name, not the .gz/.br one
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            stat_result=stat_result,
+            media_type=mimetypes.guess_type(full_path)[0] or "text/plain",
+        )
+        if encoding is not None:
+            response.headers["content-encoding"] = encoding
+        response.headers["vary"] = "Accept-Encoding"
+
+        relative = os.path.relpath(full_path, self.directory or STATIC_DIR)
+        if relative.split(os.sep)[0] == BUILD_DIR:
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["cache-control"] = "no-cache"
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
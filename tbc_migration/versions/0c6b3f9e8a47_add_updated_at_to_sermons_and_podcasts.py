@@ -0,0 +1,30 @@
+"""add updated_at to sermons and podcasts
+
+Revision ID: 0c6b3f9e8a47
+Revises: 7d4a9e2b61c8
+Create Date: 2026-10-19 16:05:12.480917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c6b3f9e8a47'
+down_revision: Union[str, None] = '7d4a9e2b61c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sermons', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    op.add_column('podcasts', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('podcasts', 'updated_at')
+    op.drop_column('sermons', 'updated_at')
@@ -0,0 +1,36 @@
+"""add content changes
+
+Revision ID: 2f7c4e9a1b53
+Revises: 6e2b8d0f4a17
+Create Date: 2026-10-19 21:08:44.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f7c4e9a1b53'
+down_revision: Union[str, None] = '6e2b8d0f4a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('content_changes',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('topic', sa.String(length=20), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('inserted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_content_changes_inserted_at', 'content_changes', ['inserted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_content_changes_inserted_at', table_name='content_changes')
+    op.drop_table('content_changes')
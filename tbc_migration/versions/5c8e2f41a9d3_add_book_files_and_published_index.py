@@ -0,0 +1,42 @@
+"""add book files and published index
+
+Revision ID: 5c8e2f41a9d3
+Revises: d27b84e1f6a0
+Create Date: 2026-10-19 12:41:05.380216
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c8e2f41a9d3'
+down_revision: Union[str, None] = 'd27b84e1f6a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('cld_image_public_id', sa.String(), nullable=True))
+    op.add_column('books', sa.Column('book_file', sa.String(), nullable=True))
+    op.add_column('books', sa.Column('cld_book_public_id', sa.String(), nullable=True))
+    op.add_column('books', sa.Column('file_size', sa.BigInteger(), nullable=True))
+    op.create_index(
+        'ix_books_published_uploaded_on',
+        'books',
+        [sa.text('uploaded_on DESC')],
+        unique=False,
+        postgresql_where=sa.text('is_published = true'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_published_uploaded_on', table_name='books')
+    op.drop_column('books', 'file_size')
+    op.drop_column('books', 'cld_book_public_id')
+    op.drop_column('books', 'book_file')
+    op.drop_column('books', 'cld_image_public_id')
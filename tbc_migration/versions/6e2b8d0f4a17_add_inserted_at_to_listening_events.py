@@ -0,0 +1,28 @@
+"""add inserted_at to listening events
+
+Revision ID: 6e2b8d0f4a17
+Revises: 0c6b3f9e8a47
+Create Date: 2026-10-19 18:42:03.117264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2b8d0f4a17'
+down_revision: Union[str, None] = '0c6b3f9e8a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('listening_events', sa.Column('inserted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('listening_events', 'inserted_at')
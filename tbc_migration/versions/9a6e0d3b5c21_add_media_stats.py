@@ -0,0 +1,34 @@
+"""add media stats
+
+Revision ID: 9a6e0d3b5c21
+Revises: 4f1c2a9d7e3b
+Create Date: 2026-10-19 10:03:17.246590
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a6e0d3b5c21'
+down_revision: Union[str, None] = '4f1c2a9d7e3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_stats',
+    sa.Column('media_kind', sa.String(length=20), nullable=False),
+    sa.Column('media_id', sa.Integer(), nullable=False),
+    sa.Column('plays', sa.Integer(), nullable=False),
+    sa.Column('downloads', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('media_kind', 'media_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('media_stats')
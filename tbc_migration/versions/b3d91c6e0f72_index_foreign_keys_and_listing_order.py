@@ -0,0 +1,91 @@
+"""index foreign keys and listing order
+
+Revision ID: b3d91c6e0f72
+Revises: 5c8e2f41a9d3
+Create Date: 2026-10-19 13:58:21.667340
+
+The indexes are built with CREATE INDEX CONCURRENTLY on PostgreSQL so the
+tables stay writable while they are built. That can't run inside a
+transaction, hence the autocommit block. A concurrent build that fails
+leaves an invalid index behind, drop it before running the upgrade again.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d91c6e0f72'
+down_revision: Union[str, None] = '5c8e2f41a9d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PUBLISHED = {'postgresql_where': sa.text('is_published = true')}
+
+INDEXES = [
+    ('ix_sermons_user_id', 'sermons', ['user_id'], {}),
+    ('ix_podcasts_user_id', 'podcasts', ['user_id'], {}),
+    ('ix_books_user_id', 'books', ['user_id'], {}),
+    ('ix_podcast_episodes_podcast_id', 'podcast_episodes', ['podcast_id'], {}),
+    (
+        'ix_podcasts_created_at_id',
+        'podcasts',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+        {},
+    ),
+    (
+        'ix_books_published_uploaded_on_id',
+        'books',
+        [sa.text('uploaded_on DESC'), sa.text('id DESC')],
+        PUBLISHED,
+    ),
+]
+
+# superseded by ix_books_published_uploaded_on_id, which also covers the
+# id tie breaker of the listing order
+OLD_BOOKS_INDEX = (
+    'ix_books_published_uploaded_on',
+    'books',
+    [sa.text('uploaded_on DESC')],
+    PUBLISHED,
+)
+
+
+def _create(name, table, columns, kwargs) -> None:
+    op.create_index(
+        name,
+        table,
+        columns,
+        unique=False,
+        if_not_exists=True,
+        postgresql_concurrently=True,
+        **kwargs,
+    )
+
+
+def _drop(name, table) -> None:
+    op.drop_index(
+        name,
+        table_name=table,
+        if_exists=True,
+        postgresql_concurrently=True,
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for index in INDEXES:
+            _create(*index)
+        _drop(*OLD_BOOKS_INDEX[:2])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        _create(*OLD_BOOKS_INDEX)
+        for name, table, _, _ in reversed(INDEXES):
+            _drop(name, table)
@@ -0,0 +1,57 @@
+"""add listening analytics
+
+Revision ID: d27b84e1f6a0
+Revises: 9a6e0d3b5c21
+Create Date: 2026-10-19 11:26:52.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd27b84e1f6a0'
+down_revision: Union[str, None] = '9a6e0d3b5c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('listening_events',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('sermon_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('duration', sa.Integer(), nullable=False),
+    sa.Column('client', sa.String(length=50), nullable=True),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('listening_hourly',
+    sa.Column('sermon_id', sa.Integer(), nullable=False),
+    sa.Column('hour', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('events', sa.Integer(), nullable=False),
+    sa.Column('seconds_listened', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('sermon_id', 'hour')
+    )
+    op.create_table('listening_retention',
+    sa.Column('sermon_id', sa.Integer(), nullable=False),
+    sa.Column('minute', sa.Integer(), nullable=False),
+    sa.Column('listens', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('sermon_id', 'minute')
+    )
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('last_id', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rollup_watermarks')
+    op.drop_table('listening_retention')
+    op.drop_table('listening_hourly')
+    op.drop_table('listening_events')
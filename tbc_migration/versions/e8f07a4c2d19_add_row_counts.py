@@ -0,0 +1,44 @@
+"""add row counts
+
+Revision ID: e8f07a4c2d19
+Revises: b3d91c6e0f72
+Create Date: 2026-10-19 14:41:07.318524
+
+The counts start at the current number of rows. Rows written by instances
+that don't maintain the counts yet, while the new code is rolled out, are
+missed; list endpoints accept exact=true to count the table instead.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8f07a4c2d19'
+down_revision: Union[str, None] = 'b3d91c6e0f72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COUNTED_TABLES = ['sermons', 'podcasts']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('row_counts',
+    sa.Column('table_name', sa.String(length=63), nullable=False),
+    sa.Column('row_count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    for table in COUNTED_TABLES:
+        op.execute(
+            f"INSERT INTO row_counts (table_name, row_count) "
+            f"SELECT '{table}', COUNT(*) FROM {table}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('row_counts')